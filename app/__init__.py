@@ -14,15 +14,32 @@ def create_app(config_name=None):
 
     db.init_app(app)
 
+    from app.utils import fragment_cache, request_timing
+    fragment_cache.init_app(app)
+    request_timing.init_app(app)
+
     from app import models  # noqa: F401 — registers models with SQLAlchemy metadata
+    from app import versions  # noqa: F401 — registers the flush hooks that stamp profile versions
 
     from app.blueprints.main import main_bp
     from app.blueprints.playing import playing_bp
     from app.blueprints.backlog import backlog_bp
+    from app.blueprints.covers import covers_bp
+    from app.blueprints.stats import stats_bp
+    from app.blueprints.search import search_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(playing_bp, url_prefix="/playing")
     app.register_blueprint(backlog_bp, url_prefix="/backlog")
+    app.register_blueprint(covers_bp)
+    app.register_blueprint(stats_bp, url_prefix="/stats")
+    app.register_blueprint(search_bp, url_prefix="/search")
+
+    if app.config.get("ADMIN_PROFILING"):
+        from app import profiling
+        from app.blueprints.admin import admin_bp
+        profiling.init_app(app)
+        app.register_blueprint(admin_bp, url_prefix="/admin/profiling")
 
     from app.seeds import seed_command
     app.cli.add_command(seed_command)
@@ -31,6 +48,26 @@ def create_app(config_name=None):
     app.cli.add_command(backup_command)
     app.cli.add_command(restore_command)
 
+    from app.transfer import export_command, import_command
+    app.cli.add_command(export_command)
+    app.cli.add_command(import_command)
+
+    from app.library_import import import_games_command
+    app.cli.add_command(import_games_command)
+
+    from app.ranking import rebuild_rankings_command
+    app.cli.add_command(rebuild_rankings_command)
+
+    from app.rollups import rebuild_rollups_command
+    app.cli.add_command(rebuild_rollups_command)
+
+    from app.explain import explain_command
+    app.cli.add_command(explain_command)
+
+    from app.rawg_commands import rawg_cache_group, rawg_refresh_command
+    app.cli.add_command(rawg_cache_group)
+    app.cli.add_command(rawg_refresh_command)
+
     @app.context_processor
     def inject_profile():
         profiles = app.config["PROFILES"]
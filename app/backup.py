@@ -1,16 +1,34 @@
 """
-flask db-backup  — dump the MySQL database to a timestamped .sql file
-flask db-restore — restore the database from a .sql file
+flask db-backup  — stream a compressed MySQL dump to a timestamped file
+flask db-restore — restore the database from a (compressed) dump
+
+Backups are streamed: mysqldump's output is read in chunks, compressed on the
+fly (gzip by default, zstd if the `zstandard` package is installed and asked
+for) and hashed as it is written. Each dump gets a sidecar
+<file>.manifest.json with its size, SHA-256 and per-table row counts.
+Restores verify the hash first, then stream-decompress straight into `mysql`.
+
+`flask db-backup --incremental` writes a small delta against the latest full
+backup instead (see app/incremental.py), and `flask db-restore --chain BASE`
+restores the base and replays its deltas in order.
 """
+import gzip
+import hashlib
+import json
 import os
 import subprocess
 import sys
+import tempfile
 from datetime import datetime
 from urllib.parse import urlparse
 
 import click
 from flask.cli import with_appcontext
 
+CHUNK_SIZE = 1024 * 1024
+
+EXTENSIONS = {"gzip": ".sql.gz", "zstd": ".sql.zst", "none": ".sql"}
+
 
 def _parse_db_url():
     """Parse DATABASE_URL and return a dict of connection components."""
@@ -29,6 +47,140 @@ def _parse_db_url():
     }
 
 
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _compression_for(filepath):
+    if filepath.endswith(".gz"):
+        return "gzip"
+    if filepath.endswith(".zst"):
+        return "zstd"
+    return "none"
+
+
+def manifest_path(filepath):
+    return f"{filepath}.manifest.json"
+
+
+class _HashingWriter:
+    """File wrapper that hashes and counts every byte written through it."""
+
+    def __init__(self, f):
+        self._f = f
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return self._f.write(data)
+
+    def flush(self):
+        self._f.flush()
+
+
+def _open_compressed_writer(raw, compression):
+    """Return a writable, closable stream that compresses into *raw*."""
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+    if compression == "zstd":
+        return _zstd().ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+    return raw
+
+
+def _open_decompressed_reader(f, compression):
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=f, mode="rb")
+    if compression == "zstd":
+        return _zstd().ZstdDecompressor().stream_reader(f)
+    return f
+
+
+def file_sha256(filepath):
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def table_row_counts():
+    """Row count per mapped table, as seen by the app at dump time."""
+    from app import db
+    return {
+        table.name: db.session.execute(db.select(db.func.count()).select_from(table)).scalar()
+        for table in db.metadata.sorted_tables
+    }
+
+
+def write_manifest(filepath, data):
+    with open(manifest_path(filepath), "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def read_manifest(filepath):
+    try:
+        with open(manifest_path(filepath)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def stream_dump(cmd, filename, compression):
+    """
+    Run *cmd* (mysqldump) and stream its stdout into *filename*, compressing
+    and hashing on the way. Returns (compressed_bytes, raw_bytes, sha256).
+    """
+    with tempfile.TemporaryFile() as err, open(filename, "wb") as raw:
+        hashed = _HashingWriter(raw)
+        out = _open_compressed_writer(hashed, compression)
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err)
+        raw_bytes = 0
+        for chunk in iter(lambda: proc.stdout.read(CHUNK_SIZE), b""):
+            out.write(chunk)
+            raw_bytes += len(chunk)
+        if out is not hashed:
+            out.close()
+        proc.stdout.close()
+        returncode = proc.wait()
+        if returncode != 0:
+            err.seek(0)
+            raise RuntimeError(err.read().decode(errors="replace"))
+    return hashed.bytes, raw_bytes, hashed.sha256.hexdigest()
+
+
+def _mysqldump_cmd(db, *extra):
+    return [
+        "mysqldump",
+        f"--host={db['host']}",
+        f"--port={db['port']}",
+        f"--user={db['user']}",
+        f"--password={db['password']}",
+        "--skip-ssl",
+        "--no-tablespaces",
+        "--single-transaction",
+        *extra,
+        db["dbname"],
+    ]
+
+
+def _mysql_cmd(db):
+    return [
+        "mysql",
+        f"--host={db['host']}",
+        f"--port={db['port']}",
+        f"--user={db['user']}",
+        f"--password={db['password']}",
+        "--skip-ssl",
+        db["dbname"],
+    ]
+
+
 @click.command("db-backup")
 @click.option(
     "--output-dir",
@@ -36,56 +188,169 @@ def _parse_db_url():
     show_default=True,
     help="Directory to write the backup file into.",
 )
+@click.option(
+    "--compress",
+    type=click.Choice(["gzip", "zstd", "none"]),
+    default="gzip",
+    show_default=True,
+    help="Compression for the dump (zstd needs the zstandard package).",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Write only the changes since the last backup in the newest chain.",
+)
 @with_appcontext
-def backup_command(output_dir):
-    """Dump the database to a timestamped SQL file."""
+def backup_command(output_dir, compress, incremental):
+    """Dump the database to a timestamped, compressed SQL file."""
+    from app.incremental import latest_link, snapshot_ids, write_delta
+
     db = _parse_db_url()
 
+    if incremental:
+        parent = latest_link(output_dir)
+        if parent is None:
+            click.echo("No full backup with a snapshot in this directory yet — taking a full backup.")
+        else:
+            os.makedirs(output_dir, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = os.path.join(output_dir, f"{db['dbname']}_{timestamp}.delta.ndjson.gz")
+            click.echo(f"Incremental backup of '{db['dbname']}' since {parent['file']} → {filename} ...")
+            try:
+                manifest = write_delta(filename, parent)
+            except Exception:
+                _remove_quietly(filename)
+                _remove_quietly(manifest_path(filename))
+                raise
+            counts = manifest["row_counts"]
+            changed = sum(counts.get(t, 0) for t in ("games", "profile_games", "checkins"))
+            deleted = sum(v for k, v in counts.items() if k.endswith("_deleted"))
+            click.echo(
+                f"Done. (delta #{manifest['seq']}: {changed} changed row(s), {deleted} deletion(s), "
+                f"{manifest['size'] / 1024:.1f} KB)"
+            )
+            return
+
+    if compress == "zstd" and _zstd() is None:
+        click.echo("ERROR: --compress zstd needs the zstandard package (pip install zstandard).", err=True)
+        sys.exit(1)
+
     os.makedirs(output_dir, exist_ok=True)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = os.path.join(output_dir, f"{db['dbname']}_{timestamp}.sql")
+    filename = os.path.join(output_dir, f"{db['dbname']}_{timestamp}{EXTENSIONS[compress]}")
 
-    cmd = [
-        "mysqldump",
-        f"--host={db['host']}",
-        f"--port={db['port']}",
-        f"--user={db['user']}",
-        f"--password={db['password']}",
-        "--skip-ssl",
-        "--no-tablespaces",
-        "--single-transaction",
-        "--routines",
-        "--triggers",
-        db["dbname"],
-    ]
+    cmd = _mysqldump_cmd(db, "--routines", "--triggers")
 
     click.echo(f"Backing up '{db['dbname']}' → {filename} ...")
+    # Taken before the dump starts, so the next delta re-reads anything written during it
+    snapshot_at = datetime.utcnow()
+    id_ranges = snapshot_ids()
+    row_counts = table_row_counts()
     try:
-        with open(filename, "w") as f:
-            result = subprocess.run(cmd, stdout=f, stderr=subprocess.PIPE, text=True)
-        if result.returncode != 0:
-            os.remove(filename)
-            click.echo(f"ERROR: mysqldump failed:\n{result.stderr}", err=True)
-            sys.exit(1)
+        size, raw_size, sha256 = stream_dump(cmd, filename, compress)
     except FileNotFoundError:
+        _remove_quietly(filename)
         click.echo("ERROR: mysqldump not found. Install MySQL client tools.", err=True)
         sys.exit(1)
+    except RuntimeError as e:
+        _remove_quietly(filename)
+        click.echo(f"ERROR: mysqldump failed:\n{e}", err=True)
+        sys.exit(1)
+
+    write_manifest(filename, {
+        "kind":        "full",
+        "file":        os.path.basename(filename),
+        "database":    db["dbname"],
+        "created_at":  datetime.now().isoformat(timespec="seconds"),
+        "compression": compress,
+        "size":        size,
+        "raw_size":    raw_size,
+        "sha256":      sha256,
+        "row_counts":  row_counts,
+        "snapshot_at": snapshot_at.isoformat(),
+        "id_ranges":   id_ranges,
+    })
+
+    ratio = f", {raw_size / size:.1f}x" if size else ""
+    click.echo(f"Done. ({size / 1024:.1f} KB{ratio}, sha256 {sha256[:12]}…)")
 
-    size_kb = os.path.getsize(filename) / 1024
-    click.echo(f"Done. ({size_kb:.1f} KB)")
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def verify_backup(filepath):
+    """
+    Check *filepath* against its manifest. Returns (ok, message); a missing
+    manifest is reported but not treated as a failure.
+    """
+    manifest = read_manifest(filepath)
+    if manifest is None:
+        return True, "no manifest — skipping checksum verification"
+    actual = file_sha256(filepath)
+    if actual != manifest.get("sha256"):
+        return False, f"checksum mismatch: manifest {manifest.get('sha256')}, file {actual}"
+    return True, f"checksum OK ({actual[:12]}…)"
+
+
+def stream_restore(cmd, filepath):
+    """Stream-decompress *filepath* into the stdin of *cmd* (mysql)."""
+    with tempfile.TemporaryFile() as err, open(filepath, "rb") as f:
+        reader = _open_decompressed_reader(f, _compression_for(filepath))
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=err)
+        try:
+            for chunk in iter(lambda: reader.read(CHUNK_SIZE), b""):
+                proc.stdin.write(chunk)
+        except BrokenPipeError:
+            pass  # mysql exited early; its stderr says why
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        returncode = proc.wait()
+        if returncode != 0:
+            err.seek(0)
+            raise RuntimeError(err.read().decode(errors="replace"))
 
 
 @click.command("db-restore")
 @click.argument("filepath")
 @click.option("--yes", is_flag=True, help="Skip confirmation prompt.")
+@click.option("--no-verify", is_flag=True, help="Skip the manifest checksum check.")
+@click.option("--chain", is_flag=True, help="Also replay the incremental backups taken on top of FILEPATH.")
 @with_appcontext
-def restore_command(filepath, yes):
-    """Restore the database from a SQL backup file."""
+def restore_command(filepath, yes, no_verify, chain):
+    """Restore the database from a .sql, .sql.gz or .sql.zst backup file."""
+    from app.incremental import apply_delta, rebuild_derived, verify_chain
+
     if not os.path.isfile(filepath):
         click.echo(f"ERROR: File not found: {filepath}", err=True)
         sys.exit(1)
 
+    deltas = []
+    if chain:
+        deltas, problems = verify_chain(filepath)
+        for problem in problems:
+            click.echo(f"ERROR: {problem}", err=True)
+        if problems:
+            sys.exit(1)
+        click.echo(f"Chain: {os.path.basename(filepath)} + {len(deltas)} delta(s)")
+
+    if _compression_for(filepath) == "zstd" and _zstd() is None:
+        click.echo("ERROR: restoring a .zst backup needs the zstandard package.", err=True)
+        sys.exit(1)
+
+    if not no_verify:
+        ok, message = verify_backup(filepath)
+        click.echo(message)
+        if not ok:
+            sys.exit(1)
+
     db = _parse_db_url()
 
     if not yes:
@@ -94,25 +359,22 @@ def restore_command(filepath, yes):
             abort=True,
         )
 
-    cmd = [
-        "mysql",
-        f"--host={db['host']}",
-        f"--port={db['port']}",
-        f"--user={db['user']}",
-        f"--password={db['password']}",
-        "--skip-ssl",
-        db["dbname"],
-    ]
-
     click.echo(f"Restoring '{db['dbname']}' from {filepath} ...")
     try:
-        with open(filepath, "r") as f:
-            result = subprocess.run(cmd, stdin=f, stderr=subprocess.PIPE, text=True)
-        if result.returncode != 0:
-            click.echo(f"ERROR: mysql restore failed:\n{result.stderr}", err=True)
-            sys.exit(1)
+        stream_restore(_mysql_cmd(db), filepath)
     except FileNotFoundError:
         click.echo("ERROR: mysql client not found. Install MySQL client tools.", err=True)
         sys.exit(1)
+    except RuntimeError as e:
+        click.echo(f"ERROR: mysql restore failed:\n{e}", err=True)
+        sys.exit(1)
+
+    if deltas:
+        directory = os.path.dirname(filepath)
+        for m in deltas:
+            click.echo(f"  replaying #{m['seq']} {m['file']} ...")
+            apply_delta(os.path.join(directory, m["file"]))
+        click.echo("Rebuilding rankings and counters ...")
+        rebuild_derived()
 
     click.echo("Done.")
@@ -0,0 +1,180 @@
+"""
+Admin profiling endpoints (/admin/profiling), for live workers.
+
+Registered only when ADMIN_PROFILING is on, and answered only for clients on
+ADMIN_NETWORKS (Tailscale's ranges and loopback by default) — everyone else
+gets a 404. The mechanics live in app/profiling.py; see the README for curl
+recipes.
+"""
+import ipaddress
+import os
+import re
+import tracemalloc
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+
+from app import profiling
+from app.utils.helpers import _int
+
+admin_bp = Blueprint("admin", __name__)
+
+SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls", "filename", "name")
+HEAP_GROUPS = ("lineno", "filename", "traceback")
+
+
+@admin_bp.before_request
+def tailnet_only():
+    networks = current_app.config["ADMIN_NETWORKS"]
+    try:
+        address = ipaddress.ip_address(request.remote_addr or "")
+    except ValueError:
+        abort(404)
+    if not any(address in ipaddress.ip_network(net) for net in networks):
+        abort(404)
+
+
+def _text(body):
+    return Response(body, mimetype="text/plain")
+
+
+def _session():
+    """?session=..., or the most recently armed one."""
+    session = request.args.get("session") or (profiling.read_control().get("profile") or {}).get("session")
+    if not session or not re.fullmatch(r"[0-9-]+", session):
+        abort(404)
+    return session
+
+
+@admin_bp.route("/")
+def status():
+    """What's armed, what's been captured, and what this worker is doing."""
+    control = profiling.read_control()
+    armed = control.get("profile")
+    sessions_root = os.path.join(profiling.profiling_dir(), "profiles")
+    sessions = sorted(os.listdir(sessions_root)) if os.path.isdir(sessions_root) else []
+    return jsonify({
+        "worker":    os.getpid(),
+        "profile":   armed and {**armed, "captured": len(profiling.profile_files(armed["session"]))},
+        "sessions":  {s: len(profiling.profile_files(s)) for s in sessions},
+        "heap":      control.get("heap") or {"tracing": False},
+        "tracing":   tracemalloc.is_tracing(),
+        "snapshots": profiling.snapshots(),
+    })
+
+
+# ------------------------------------------------------------------ #
+# cProfile                                                             #
+# ------------------------------------------------------------------ #
+
+@admin_bp.route("/profile", methods=["POST"])
+def profile_start():
+    """Profile the next ?requests=N requests to ?route= (an endpoint like backlog.play_next, or a path)."""
+    target = (request.values.get("route") or "").strip()
+    if not target:
+        return jsonify({"error": "route is required (endpoint name or path)"}), 400
+    endpoints = {rule.endpoint for rule in current_app.url_map.iter_rules()}
+    if not target.startswith("/") and target not in endpoints:
+        return jsonify({"error": f"unknown endpoint {target!r}"}), 400
+    count = min(max(_int(request.values.get("requests")) or 10, 1), profiling.MAX_PROFILED_REQUESTS)
+    control = profiling.arm(target, count)
+    return jsonify(control["profile"])
+
+
+@admin_bp.route("/profile/stop", methods=["POST"])
+def profile_stop():
+    profiling.update_control(profile=None)
+    return jsonify({"profile": None})
+
+
+@admin_bp.route("/profile/stats")
+def profile_stats():
+    """pstats report: ?sort=cumulative|tottime|...&limit=N&match=<regex, e.g. score_rows>."""
+    stats = profiling.merged_stats(_session())
+    if stats is None:
+        return _text("No requests captured yet.\n"), 404
+    sort = request.args.get("sort", "cumulative")
+    if sort not in SORT_KEYS:
+        sort = "cumulative"
+    limit = min(max(_int(request.args.get("limit")) or 60, 1), 1000)
+    return _text(profiling.stats_text(stats, sort=sort, limit=limit, match=request.args.get("match") or None))
+
+
+@admin_bp.route("/profile/download")
+def profile_download():
+    """The merged profile as a .prof file for snakeviz / python -m pstats."""
+    session = _session()
+    stats = profiling.merged_stats(session)
+    if stats is None:
+        abort(404)
+    return Response(
+        profiling.stats_bytes(stats),
+        mimetype="application/octet-stream",
+        headers={"Content-Disposition": f"attachment; filename=game-journal-{session}.prof"},
+    )
+
+
+@admin_bp.route("/profile/collapsed")
+def profile_collapsed():
+    """Folded stacks for flamegraph.pl / speedscope."""
+    stats = profiling.merged_stats(_session())
+    if stats is None:
+        abort(404)
+    return _text(profiling.collapsed_stacks(stats))
+
+
+# ------------------------------------------------------------------ #
+# tracemalloc                                                          #
+# ------------------------------------------------------------------ #
+
+@admin_bp.route("/heap/start", methods=["POST"])
+def heap_start():
+    """Start tracemalloc in every worker (each starts on its next request). ?frames=N."""
+    frames = min(max(_int(request.values.get("frames")) or 10, 1), 100)
+    heap = {"tracing": True, "frames": frames, "snapshots": []}
+    profiling.update_control(heap=heap)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return jsonify(heap)
+
+
+@admin_bp.route("/heap/stop", methods=["POST"])
+def heap_stop():
+    profiling.update_control(heap={"tracing": False})
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return jsonify({"tracing": False})
+
+
+@admin_bp.route("/heap/snapshot", methods=["POST"])
+def heap_snapshot():
+    """Snapshot every worker's heap as ?label= (this one now, the rest on their next request)."""
+    label = request.values.get("label", "")
+    if not profiling.LABEL_RE.fullmatch(label):
+        return jsonify({"error": "label must be 1-40 letters, digits, '.', '_' or '-'"}), 400
+    heap = dict(profiling.read_control().get("heap") or {})
+    if not heap.get("tracing"):
+        return jsonify({"error": "tracemalloc isn't running — POST /admin/profiling/heap/start first"}), 409
+    if label not in heap.get("snapshots", []):
+        heap["snapshots"] = [*heap.get("snapshots", []), label]
+        profiling.update_control(heap=heap)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(heap.get("frames", 10))
+    profiling.take_snapshot(label)
+    return jsonify({"worker": os.getpid(), "label": label, "snapshots": profiling.snapshots()})
+
+
+@admin_bp.route("/heap/diff")
+def heap_diff():
+    """Growth between ?base= and ?current= snapshots of ?pid= (default: this worker)."""
+    pid = _int(request.args.get("pid")) or os.getpid()
+    base, current = request.args.get("base", ""), request.args.get("current", "")
+    taken = profiling.snapshots().get(pid, [])
+    missing = [label for label in (base, current) if label not in taken]
+    if missing:
+        return _text(f"Worker {pid} has no snapshot {missing[0]!r}; it has {taken}.\n"), 404
+    group = request.args.get("group", "lineno")
+    if group not in HEAP_GROUPS:
+        group = "lineno"
+    limit = min(max(_int(request.args.get("limit")) or 30, 1), 500)
+    return _text(profiling.heap_diff(pid, base, current, group=group, limit=limit,
+                                     match=request.args.get("match") or None))
@@ -1,62 +1,43 @@
+import hashlib
 from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+from sqlalchemy.orm import contains_eager, selectinload
 from app import db
 from app.models import Game, ProfileGame, Category, MoodPreferences
-from app.utils.helpers import _int, current_profile
-from app.scoring import (
-    HYPE_MULTIPLIER, SERIES_CONTINUITY_BONUS, LENGTH_SCORES,
-    CAT_RANK_MAX, CAT_RANK_STEP, MOOD_MAX_POINTS,
-    STATUS_PLAYING_BONUS, STATUS_ON_HOLD_PENALTY,
-)
+from app.utils.helpers import _int, current_profile, load_options
+from app.ranking import ranked_play_next, refresh_play_next
+from app.stats import refresh_counts
+from app.rollups import forget_profile_game
+from app.library_import import import_csv
+from app.versions import bump, conditional
 
 backlog_bp = Blueprint("backlog", __name__)
 
 
-def _play_next_score(pg, prefs=None):
-    """
-    Compute a priority score for play-next ordering (higher = play sooner).
-    Weights are defined in app/scoring.py.
-    """
-    score  = (pg.hype or 0) * HYPE_MULTIPLIER
-    score += SERIES_CONTINUITY_BONUS if pg.series_continuity else 0
-    score += LENGTH_SCORES.get(pg.estimated_length or "", 0)
-
-    if pg.categories:
-        best_rank = min((c.rank for c in pg.categories if c.rank), default=0)
-        if best_rank:
-            score += max(0, CAT_RANK_MAX - (best_rank - 1) * CAT_RANK_STEP)
-
-    if prefs:
-        dot = (
-            (pg.mood_chill       or 0) * (prefs.mood_chill       or 0) +
-            (pg.mood_intense     or 0) * (prefs.mood_intense     or 0) +
-            (pg.mood_story       or 0) * (prefs.mood_story       or 0) +
-            (pg.mood_action      or 0) * (prefs.mood_action      or 0) +
-            (pg.mood_exploration or 0) * (prefs.mood_exploration or 0)
-        )
-        score += int((dot / 125) * MOOD_MAX_POINTS)
-
-    if pg.status == "Playing":
-        score += STATUS_PLAYING_BONUS
-    elif pg.status == "On Hold":
-        score -= STATUS_ON_HOLD_PENALTY
-
-    return score
-
-
 # ------------------------------------------------------------------ #
 # Routes                                                               #
 # ------------------------------------------------------------------ #
 
 @backlog_bp.route("/")
+@conditional
 def index():
     profile = current_profile()
-    categories = Category.query.filter_by(profile_id=profile).order_by(Category.rank, Category.name).all()
+    categories = (
+        Category.query
+        .options(*load_options(
+            selectinload(Category.profile_games.and_(ProfileGame.section == "backlog"))
+            .joinedload(ProfileGame.game)
+        ))
+        .filter_by(profile_id=profile)
+        .order_by(Category.rank, Category.name)
+        .all()
+    )
     has_games = ProfileGame.query.filter_by(profile_id=profile, section="backlog").count() > 0
     uncategorized = (
         ProfileGame.query
         .filter_by(profile_id=profile, section="backlog")
         .filter(~ProfileGame.categories.any())
         .join(ProfileGame.game)
+        .options(*load_options(contains_eager(ProfileGame.game)))
         .order_by(Game.name)
         .all()
     )
@@ -127,6 +108,8 @@ def add():
             pg.categories = Category.query.filter(Category.id.in_(cat_ids), Category.profile_id == profile).all()
 
         try:
+            refresh_play_next(profile, touched=[pg.id])
+            refresh_counts(profile)
             db.session.commit()
             flash(f"'{game.name}' added to backlog.", "success")
             return redirect(url_for("backlog.index"))
@@ -138,26 +121,53 @@ def add():
     return render_template("backlog/add.html", categories=categories)
 
 
+# The upload is matched inside one request, and gunicorn kills a sync worker
+# after 30s: 50 titles at 5 searches/s is ~10s, and the budget stops any
+# search from starting after 12s. Larger files belong to `flask import-games`.
+IMPORT_MATCH_LIMIT = 50
+IMPORT_MATCH_SECONDS = 12
+
+
+@backlog_bp.route("/import", methods=["GET", "POST"])
+def import_games():
+    profile = current_profile()
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            flash("Choose a CSV file to import.", "error")
+            return redirect(url_for("backlog.import_games"))
+        try:
+            text = upload.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            flash("That file isn't UTF-8 text — export it as CSV and try again.", "error")
+            return redirect(url_for("backlog.import_games"))
+
+        try:
+            report = import_csv(
+                profile, text,
+                match=bool(request.form.get("match_rawg")),
+                match_limit=IMPORT_MATCH_LIMIT,
+                match_budget=IMPORT_MATCH_SECONDS,
+            )
+        except Exception:
+            flash("Something went wrong. Nothing was imported.", "error")
+            return redirect(url_for("backlog.import_games"))
+        flash(f"Import finished: {report.summary()}.", "success")
+        return render_template("backlog/import.html", report=report, match_limit=IMPORT_MATCH_LIMIT)
+
+    return render_template("backlog/import.html", report=None, match_limit=IMPORT_MATCH_LIMIT)
+
+
 @backlog_bp.route("/play-next")
+@conditional
 def play_next():
     profile = current_profile()
-    prefs = MoodPreferences.get(profile)
-    backlog_pgs = ProfileGame.query.filter_by(profile_id=profile, section="backlog").all()
-    active_pgs = (
-        ProfileGame.query
-        .filter(
-            ProfileGame.profile_id == profile,
-            ProfileGame.section == "active",
-            ProfileGame.status.in_(["Playing", "On Hold"]),
-        )
-        .all()
-    )
-    ranked = sorted(backlog_pgs + active_pgs, key=lambda pg: _play_next_score(pg, prefs), reverse=True)
-    scores = {pg.id: _play_next_score(pg, prefs) for pg in ranked}
-    return render_template("backlog/play_next.html", ranked=ranked, scores=scores)
+    ranked = ranked_play_next(profile)
+    return render_template("backlog/play_next.html", ranked=ranked)
 
 
 @backlog_bp.route("/<int:pg_id>/edit", methods=["GET", "POST"])
+@conditional
 def edit(pg_id):
     profile = current_profile()
     pg = ProfileGame.query.filter_by(id=pg_id, profile_id=profile, section="backlog").first_or_404()
@@ -192,6 +202,7 @@ def edit(pg_id):
         pg.categories = Category.query.filter(Category.id.in_(cat_ids), Category.profile_id == profile).all() if cat_ids else []
 
         try:
+            refresh_play_next(profile, touched=[pg_id])
             db.session.commit()
             flash(f"'{pg.name}' updated.", "success")
             return redirect(url_for("backlog.index"))
@@ -212,6 +223,8 @@ def promote(pg_id):
     pg.rank           = 0
     pg.play_next_rank = None
     try:
+        refresh_play_next(profile, touched=[pg_id])
+        refresh_counts(profile)
         db.session.commit()
         flash(f"'{pg.name}' promoted to active library.", "success")
         return redirect(url_for("playing.index"))
@@ -226,8 +239,12 @@ def delete(pg_id):
     profile = current_profile()
     pg = ProfileGame.query.filter_by(id=pg_id, profile_id=profile).first_or_404()
     name = pg.name
-    db.session.delete(pg)
     try:
+        # Before the delete is flushed — the check-ins go with it
+        forget_profile_game(pg)
+        db.session.delete(pg)
+        refresh_play_next(profile, touched=[pg_id])
+        refresh_counts(profile)
         db.session.commit()
         flash(f"'{name}' removed from backlog.", "success")
     except Exception:
@@ -237,6 +254,7 @@ def delete(pg_id):
 
 
 @backlog_bp.route("/categories", methods=["GET", "POST"])
+@conditional
 def categories():
     profile = current_profile()
     if request.method == "POST":
@@ -254,7 +272,9 @@ def categories():
 
     all_cats = Category.query.filter_by(profile_id=profile).order_by(Category.rank, Category.name).all()
     prefs = MoodPreferences.get(profile)
-    return render_template("backlog/categories.html", categories=all_cats, prefs=prefs)
+    return render_template(
+        "backlog/categories.html", categories=all_cats, prefs=prefs, order_version=_order_version(all_cats),
+    )
 
 
 @backlog_bp.route("/categories/mood-preferences", methods=["POST"])
@@ -267,6 +287,7 @@ def save_mood_preferences():
     prefs.mood_action      = _int(request.form.get("mood_action"))      or 0
     prefs.mood_exploration = _int(request.form.get("mood_exploration")) or 0
     try:
+        refresh_play_next(profile)
         db.session.commit()
         flash("Mood preferences saved.", "success")
     except Exception:
@@ -275,19 +296,60 @@ def save_mood_preferences():
     return redirect(url_for("backlog.categories"))
 
 
+def _order_version(cats):
+    """
+    Token for a profile's current category order (cats in rank, name order).
+    The categories page sends it back with a reorder; if the order changed in
+    the meantime (another tab, an added or deleted category) it won't match.
+    """
+    key = ",".join(f"{c.id}:{c.rank}" for c in cats)
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
 @backlog_bp.route("/categories/reorder", methods=["POST"])
 def categories_reorder():
-    """Receives an ordered list of category IDs and updates their rank fields."""
+    """
+    Receives {"order": [category ids], "version": token} (or, from older
+    pages, a bare list of ids) and saves the new ranks in one UPDATE.
+    """
     profile = current_profile()
     data = request.get_json(silent=True)
-    if not data or not isinstance(data, list):
+    version = None
+    if isinstance(data, dict):
+        version = data.get("version")
+        data = data.get("order")
+    if not data or not isinstance(data, list) or not all(isinstance(i, int) for i in data):
         return jsonify({"error": "invalid payload"}), 400
 
     try:
-        for rank, cat_id in enumerate(data, start=1):
-            Category.query.filter_by(id=cat_id, profile_id=profile).update({"rank": rank})
+        # Lock the profile's categories so concurrent reorders apply one after the other
+        cats = (
+            Category.query.filter_by(profile_id=profile)
+            .order_by(Category.rank, Category.name).with_for_update().all()
+        )
+        current = _order_version(cats)
+        if version is not None and version != current:
+            db.session.rollback()
+            return jsonify({"error": "order changed elsewhere", "version": current}), 409
+        if sorted(data) != sorted(c.id for c in cats):
+            db.session.rollback()
+            return jsonify({"error": "payload must list each of the profile's categories once"}), 400
+
+        old_ranks = {c.id: c.rank for c in cats}
+        changed = {cat_id: rank for rank, cat_id in enumerate(data, start=1) if old_ranks[cat_id] != rank}
+        if changed:
+            db.session.execute(
+                db.update(Category)
+                .where(Category.profile_id == profile, Category.id.in_(changed))
+                .values(rank=db.case(changed, value=Category.id))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.expire_all()
+            bump(profile)
+            refresh_play_next(profile)
+            cats = Category.query.filter_by(profile_id=profile).order_by(Category.rank, Category.name).all()
         db.session.commit()
-        return jsonify({"ok": True})
+        return jsonify({"ok": True, "updated": len(changed), "version": _order_version(cats)})
     except Exception:
         db.session.rollback()
         return jsonify({"error": "reorder failed"}), 500
@@ -316,6 +378,7 @@ def delete_category(cat_id):
     name = cat.name
     db.session.delete(cat)
     try:
+        refresh_play_next(profile)
         db.session.commit()
         flash(f"Category '{name}' deleted. Its games are now uncategorized.", "success")
     except Exception:
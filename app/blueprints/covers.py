@@ -0,0 +1,151 @@
+"""
+Local cover-art cache.
+
+/covers/<game_id>?size=card fetches the game's RAWG cover once, keeps the
+original on disk, and serves a fixed-size JPEG thumbnail for it. Thumbnail
+URLs carry a version derived from Game.cover_url, so responses can be cached
+by the browser for a year and a changed cover simply gets a new URL.
+
+Only http(s) URLs on COVER_HOSTS (RAWG's media host) are downloaded, through
+the pooled RAWG session; anything else is left to the browser. A failed
+download or thumbnail leaves a <hash>.failed marker, and the cover isn't
+tried again for COVER_RETRY_AFTER seconds.
+"""
+import hashlib
+import os
+import time
+from urllib.parse import urlsplit
+
+from flask import Blueprint, abort, current_app, redirect, request, send_file, url_for
+
+from app import db
+from app.models import Game
+from app.utils.rawg import get_client
+
+covers_bp = Blueprint("covers", __name__)
+
+# (width, height) per template slot — 2× the CSS box for high-DPI screens
+COVER_SIZES = {
+    "thumb":  (96, 128),    # backlog / play-next / dashboard rows
+    "card":   (360, 480),   # playing index cards (3:4)
+    "detail": (240, 340),   # game detail header
+}
+
+MAX_COVER_BYTES = 20 * 1024 * 1024
+FETCH_TIMEOUT = (3.05, 10)
+ONE_YEAR = 365 * 24 * 3600
+
+
+def _cover_hash(cover_url):
+    return hashlib.sha1(cover_url.encode()).hexdigest()[:16]
+
+
+def _cache_dir():
+    path = current_app.config.get("COVER_CACHE_DIR") or os.path.join(current_app.instance_path, "covers")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _write_atomic(path, data):
+    # Workers may race on the same cover; os.replace makes the last write win cleanly
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _fetchable(cover_url):
+    parts = urlsplit(cover_url)
+    return parts.scheme in ("http", "https") and (parts.hostname or "") in current_app.config["COVER_HOSTS"]
+
+
+def _recently_failed(marker_path):
+    try:
+        return time.time() - os.path.getmtime(marker_path) < current_app.config["COVER_RETRY_AFTER"]
+    except OSError:
+        return False
+
+
+def _remote_cover(cover_url):
+    """Let the browser load a cover we can't serve — unless it isn't even http(s)."""
+    if urlsplit(cover_url).scheme not in ("http", "https"):
+        abort(404)
+    return redirect(cover_url)
+
+
+def _fetch_original(cover_url, path):
+    # The no-retry RAWG client: this runs inside a page's image request.
+    # Redirects aren't followed, so the host check can't be sidestepped.
+    session = get_client(interactive=True).session
+    with session.get(cover_url, timeout=FETCH_TIMEOUT, stream=True, allow_redirects=False) as resp:
+        if resp.status_code != 200:
+            raise ValueError(f"cover fetch returned HTTP {resp.status_code}")
+        chunks, total = [], 0
+        for chunk in resp.iter_content(64 * 1024):
+            total += len(chunk)
+            if total > MAX_COVER_BYTES:
+                raise ValueError(f"cover larger than {MAX_COVER_BYTES} bytes")
+            chunks.append(chunk)
+    _write_atomic(path, b"".join(chunks))
+
+
+def _make_thumbnail(original_path, thumb_path, size):
+    from io import BytesIO
+    from PIL import Image, ImageOps
+
+    with Image.open(original_path) as img:
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        thumb = ImageOps.fit(img, size, method=Image.LANCZOS, centering=(0.5, 0.4))
+    buf = BytesIO()
+    thumb.save(buf, "JPEG", quality=82, optimize=True, progressive=True)
+    _write_atomic(thumb_path, buf.getvalue())
+
+
+@covers_bp.app_template_global()
+def cover_src(game, size="card"):
+    """URL of the cached cover for a Game or ProfileGame, or None if it has no cover."""
+    cover_url = game.cover_url
+    if not cover_url:
+        return None
+    game_id = getattr(game, "game_id", None) or game.id
+    return url_for("covers.cover", game_id=game_id, size=size, v=_cover_hash(cover_url)[:8])
+
+
+@covers_bp.route("/covers/<int:game_id>")
+def cover(game_id):
+    size = request.args.get("size", "card")
+    if size not in COVER_SIZES:
+        abort(404)
+    game = db.session.get(Game, game_id)
+    if game is None or not game.cover_url:
+        abort(404)
+
+    digest = _cover_hash(game.cover_url)
+    cache_dir = _cache_dir()
+    original_path = os.path.join(cache_dir, f"{digest}.orig")
+    thumb_path = os.path.join(cache_dir, f"{digest}_{size}.jpg")
+
+    if not os.path.exists(thumb_path):
+        failed_path = os.path.join(cache_dir, f"{digest}.failed")
+        if not _fetchable(game.cover_url) or _recently_failed(failed_path):
+            return _remote_cover(game.cover_url)
+        try:
+            if not os.path.exists(original_path):
+                _fetch_original(game.cover_url, original_path)
+            _make_thumbnail(original_path, thumb_path, COVER_SIZES[size])
+        except Exception as exc:
+            current_app.logger.warning("cover cache failed for game %s: %s", game_id, exc)
+            _write_atomic(failed_path, str(exc).encode())
+            # Fall back to the remote image so the page still shows a cover
+            return _remote_cover(game.cover_url)
+
+    response = send_file(
+        thumb_path,
+        mimetype="image/jpeg",
+        etag=f"{digest}-{size}",
+        conditional=True,
+        max_age=ONE_YEAR,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
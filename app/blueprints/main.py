@@ -1,42 +1,35 @@
 import os
 from flask import Blueprint, render_template, jsonify, request, session, redirect, current_app
-from app.models import ProfileGame, MoodPreferences
 from app.utils.helpers import current_profile
+from app.ranking import ranked_play_next
+from app.stats import get_counts
+from app.rollups import current_totals
+from app.versions import conditional
 
 main_bp = Blueprint("main", __name__)
 
 
 @main_bp.route("/")
+@conditional(daily=True)
 def index():
     profile = current_profile()
 
-    playing_count   = ProfileGame.query.filter_by(profile_id=profile, section="active",  status="Playing").count()
-    on_hold_count   = ProfileGame.query.filter_by(profile_id=profile, section="active",  status="On Hold").count()
-    backlog_count   = ProfileGame.query.filter_by(profile_id=profile, section="backlog").count()
-    completed_count = ProfileGame.query.filter_by(profile_id=profile, status="Completed").count()
+    counts = get_counts(profile)
 
-    # Top 5 games from the dynamic play-next scoring
-    from app.blueprints.backlog import _play_next_score
-    prefs = MoodPreferences.get(profile)
-    backlog_pgs = ProfileGame.query.filter_by(profile_id=profile, section="backlog").all()
-    active_pgs = (
-        ProfileGame.query
-        .filter(
-            ProfileGame.profile_id == profile,
-            ProfileGame.section == "active",
-            ProfileGame.status.in_(["Playing", "On Hold"]),
-        )
-        .all()
-    )
-    play_next = sorted(backlog_pgs + active_pgs, key=lambda pg: _play_next_score(pg, prefs), reverse=True)[:5]
+    # Top 5 games from the stored play-next ranking
+    play_next = ranked_play_next(profile, limit=5)
+
+    hours = current_totals(profile)
 
     return render_template(
         "main/index.html",
-        playing_count=playing_count,
-        on_hold_count=on_hold_count,
-        backlog_count=backlog_count,
-        completed_count=completed_count,
+        playing_count=counts["playing"],
+        on_hold_count=counts["on_hold"],
+        backlog_count=counts["backlog"],
+        completed_count=counts["completed"],
         play_next=play_next,
+        hours_week=hours["week"],
+        hours_month=hours["month"],
     )
 
 
@@ -56,8 +49,8 @@ def search():
     if not q or not os.environ.get("RAWG_API_KEY"):
         return jsonify([])
     try:
-        from app.utils.rawg import search_games
-        results = search_games(q, page_size=8)
+        from app.utils.rawg_cache import cached_search
+        results = cached_search(q, page_size=8, interactive=True)
         return jsonify([
             {
                 "id":           r.get("id"),
@@ -1,24 +1,43 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from datetime import datetime
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, abort
+from sqlalchemy.orm import contains_eager, selectinload
 from app import db
 from app.models import Game, ProfileGame, Category, CheckIn, STATUSES
-from app.utils.helpers import _int, _float, current_profile
+from app.utils.helpers import _int, _float, current_profile, load_options
+from app.ranking import refresh_play_next
+from app.stats import refresh_counts
+from app.rollups import forget_checkin, forget_profile_game, record_checkin
+from app.versions import conditional
 
 playing_bp = Blueprint("playing", __name__)
 
+CHECKINS_PER_PAGE = 20
+
+# ?sort= options for the library index
+SORTS = {
+    "name":   (Game.name,),
+    "recent": (ProfileGame.last_checkin_at.desc(), Game.name),
+}
+
 
 @playing_bp.route("/")
+@conditional
 def index():
     profile = current_profile()
+    sort = request.args.get("sort", "name")
+    if sort not in SORTS:
+        sort = "name"
+    options = load_options(contains_eager(ProfileGame.game), selectinload(ProfileGame.categories))
     playing = (
         ProfileGame.query
         .filter_by(profile_id=profile, section="active", status="Playing")
-        .join(ProfileGame.game).order_by(Game.name)
+        .join(ProfileGame.game).options(*options).order_by(*SORTS[sort])
         .all()
     )
     on_hold = (
         ProfileGame.query
         .filter_by(profile_id=profile, section="active", status="On Hold")
-        .join(ProfileGame.game).order_by(Game.name)
+        .join(ProfileGame.game).options(*options).order_by(*SORTS[sort])
         .all()
     )
     archived = (
@@ -28,20 +47,69 @@ def index():
             ProfileGame.section == "active",
             ProfileGame.status.in_(["Dropped", "Completed"]),
         )
-        .join(ProfileGame.game).order_by(ProfileGame.status, Game.name)
+        .join(ProfileGame.game).options(*options).order_by(ProfileGame.status, Game.name)
         .all()
     )
-    return render_template("playing/index.html", playing=playing, on_hold=on_hold, archived=archived)
+    return render_template("playing/index.html", playing=playing, on_hold=on_hold, archived=archived, sort=sort)
 
 
 @playing_bp.route("/<int:pg_id>")
+@conditional
 def detail(pg_id):
     profile = current_profile()
     pg = ProfileGame.query.filter_by(id=pg_id, profile_id=profile).first_or_404()
-    return render_template("playing/detail.html", game=pg, statuses=STATUSES, checkins=pg.checkins)
+    checkins, next_cursor = checkin_page(pg)
+    return render_template(
+        "playing/detail.html", game=pg, statuses=STATUSES, checkins=checkins, next_cursor=next_cursor,
+    )
+
+
+def checkin_page(pg, cursor=None, limit=CHECKINS_PER_PAGE):
+    """
+    One page of *pg*'s check-ins, newest first, plus the cursor for the next
+    page (None on the last one). Keyset pagination on (created_at, id): each
+    page is an index range read, so its cost doesn't depend on how far back it is.
+    """
+    query = pg.checkins
+    if cursor is not None:
+        query = query.filter(db.tuple_(CheckIn.created_at, CheckIn.id) < cursor)
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _encode_cursor(rows[-1])
+
+
+def _encode_cursor(ci):
+    return f"{ci.created_at.isoformat()}_{ci.id}"
+
+
+def _decode_cursor(value):
+    try:
+        created_at, _, ci_id = value.rpartition("_")
+        return datetime.fromisoformat(created_at), int(ci_id)
+    except ValueError:
+        return None
+
+
+@playing_bp.route("/<int:pg_id>/checkins")
+@conditional
+def checkins(pg_id):
+    """Next page of the check-in history as rendered HTML, for the detail page's "Load more"."""
+    profile = current_profile()
+    pg = ProfileGame.query.filter_by(id=pg_id, profile_id=profile).first_or_404()
+    cursor = _decode_cursor(request.args.get("before", ""))
+    if cursor is None:
+        abort(400)
+    rows, next_cursor = checkin_page(pg, cursor)
+    return jsonify({
+        "html": render_template("playing/_checkins.html", checkins=rows),
+        "next": next_cursor,
+    })
 
 
 @playing_bp.route("/<int:pg_id>/edit", methods=["GET", "POST"])
+@conditional
 def edit(pg_id):
     profile = current_profile()
     pg = ProfileGame.query.filter_by(id=pg_id, profile_id=profile).first_or_404()
@@ -77,6 +145,8 @@ def edit(pg_id):
         pg.categories = Category.query.filter(Category.id.in_(cat_ids), Category.profile_id == profile).all() if cat_ids else []
 
         try:
+            refresh_play_next(profile, touched=[pg_id])
+            refresh_counts(profile)
             db.session.commit()
             flash(f"'{pg.name}' updated.", "success")
             return redirect(url_for("playing.index"))
@@ -96,6 +166,8 @@ def set_status(pg_id):
     if new_status in STATUSES:
         pg.status = new_status
         try:
+            refresh_play_next(profile, touched=[pg_id])
+            refresh_counts(profile)
             db.session.commit()
         except Exception:
             db.session.rollback()
@@ -131,6 +203,10 @@ def checkin(pg_id):
 
     db.session.add(checkin_obj)
     try:
+        db.session.flush()
+        record_checkin(profile, checkin_obj)
+        refresh_play_next(profile, touched=[pg_id])
+        refresh_counts(profile)
         db.session.commit()
         flash(f"Check-in saved for '{pg.name}'.", "success")
     except Exception:
@@ -140,6 +216,22 @@ def checkin(pg_id):
     return redirect(url_for("playing.index"))
 
 
+@playing_bp.route("/<int:pg_id>/checkins/<int:checkin_id>/delete", methods=["POST"])
+def delete_checkin(pg_id, checkin_id):
+    profile = current_profile()
+    pg = ProfileGame.query.filter_by(id=pg_id, profile_id=profile).first_or_404()
+    checkin_obj = pg.checkins.filter(CheckIn.id == checkin_id).first_or_404()
+    try:
+        forget_checkin(profile, checkin_obj)
+        db.session.delete(checkin_obj)
+        db.session.commit()
+        flash("Check-in removed.", "success")
+    except Exception:
+        db.session.rollback()
+        flash("Could not remove the check-in. Please try again.", "error")
+    return redirect(url_for("playing.detail", pg_id=pg_id))
+
+
 @playing_bp.route("/<int:pg_id>/finish", methods=["GET", "POST"])
 def finish(pg_id):
     profile = current_profile()
@@ -167,8 +259,12 @@ def delete(pg_id):
     profile = current_profile()
     pg = ProfileGame.query.filter_by(id=pg_id, profile_id=profile).first_or_404()
     name = pg.name
-    db.session.delete(pg)
     try:
+        # Before the delete is flushed — the check-ins go with it
+        forget_profile_game(pg)
+        db.session.delete(pg)
+        refresh_play_next(profile, touched=[pg_id])
+        refresh_counts(profile)
         db.session.commit()
         flash(f"'{name}' removed.", "success")
         return redirect(url_for("playing.index"))
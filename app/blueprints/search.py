@@ -0,0 +1,32 @@
+from flask import Blueprint, render_template, jsonify, request
+from app.utils.helpers import current_profile, _int
+from app.search import PER_PAGE, search
+from app.versions import conditional
+
+search_bp = Blueprint("search", __name__)
+
+
+@search_bp.route("/")
+@conditional
+def index():
+    profile = current_profile()
+    query = request.args.get("q", "").strip()
+    page = _int(request.args.get("page")) or 1
+    hits, has_next = search(profile, query, page=page) if query else ([], False)
+    return render_template("search/index.html", query=query, hits=hits, page=page, has_next=has_next)
+
+
+@search_bp.route("/api")
+def api():
+    """Search results as JSON: ?q=...&page=N&per_page=N."""
+    profile = current_profile()
+    query = request.args.get("q", "").strip()
+    page = _int(request.args.get("page")) or 1
+    per_page = min(max(_int(request.args.get("per_page")) or PER_PAGE, 1), 100)
+    hits, has_next = search(profile, query, page=page, per_page=per_page)
+    return jsonify({
+        "query":    query,
+        "page":     page,
+        "has_next": has_next,
+        "results":  [h.to_dict() for h in hits],
+    })
@@ -0,0 +1,42 @@
+from flask import Blueprint, render_template, jsonify, request
+from app.utils.helpers import current_profile, _int
+from app.rollups import PERIODS, current_totals, recent_buckets, most_played
+from app.versions import conditional
+
+stats_bp = Blueprint("stats", __name__)
+
+# How many buckets of each period the page/API returns by default
+DEFAULT_COUNTS = {"day": 30, "week": 12, "month": 12}
+MAX_BUCKETS = 366
+
+
+@stats_bp.route("/")
+@conditional(daily=True)
+def index():
+    profile = current_profile()
+    return render_template(
+        "stats/index.html",
+        totals=current_totals(profile),
+        weeks=recent_buckets(profile, "week", DEFAULT_COUNTS["week"]),
+        months=recent_buckets(profile, "month", DEFAULT_COUNTS["month"]),
+        top_games=most_played(profile),
+    )
+
+
+@stats_bp.route("/api")
+def api():
+    """Play-time rollups as JSON: ?period=day|week|month&count=N."""
+    profile = current_profile()
+    period = request.args.get("period", "week")
+    if period not in PERIODS:
+        return jsonify({"error": f"period must be one of {', '.join(PERIODS)}"}), 400
+    count = min(max(_int(request.args.get("count")) or DEFAULT_COUNTS[period], 1), MAX_BUCKETS)
+    return jsonify({
+        "profile": profile,
+        "current": current_totals(profile),
+        "buckets": recent_buckets(profile, period, count),
+        "top_games": [
+            {"id": pg.id, "name": pg.name, "hours": float(pg.total_hours), "checkins": pg.checkin_count}
+            for pg in most_played(profile)
+        ],
+    })
@@ -0,0 +1,127 @@
+"""
+flask db-explain — run EXPLAIN on the hot route queries and flag full scans
+
+Mirrors the queries the routes issue for one profile and checks that each
+table access in the plan uses an index. Run it against a database with
+realistic volume (hundreds of thousands of rows) — on tiny tables MySQL is
+free to prefer a full scan and the check isn't meaningful.
+"""
+import sys
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import Category, CheckIn, Game, MoodPreferences, ProfileGame
+
+
+def route_queries(profile, pg_id):
+    """(label, SQLAlchemy Select) for the queries each route runs."""
+    from app.ranking import play_next_query
+
+    pg = ProfileGame
+    return [
+        ("dashboard: counters aggregate",
+         db.session.query(pg.section, pg.status, db.func.count())
+         .filter(pg.profile_id == profile).group_by(pg.section, pg.status).statement),
+        ("dashboard/play-next: stored ranking",
+         pg.query.filter(pg.profile_id == profile, pg.play_next_rank.isnot(None))
+         .order_by(pg.play_next_rank).statement),
+        ("backlog: categories",
+         Category.query.filter_by(profile_id=profile).order_by(Category.rank, Category.name).statement),
+        ("backlog: uncategorized",
+         pg.query.filter_by(profile_id=profile, section="backlog")
+         .filter(~pg.categories.any()).join(pg.game).order_by(Game.name).statement),
+        ("backlog.add: duplicate check",
+         pg.query.filter_by(profile_id=profile, game_id=1).statement),
+        ("backlog.import: existing games by title",
+         db.select(Game.title_key, Game.id).where(Game.title_key.in_(["hollow knight"])).order_by(Game.id)),
+        ("playing: sorted by last played",
+         pg.query.filter_by(profile_id=profile, section="active", status="Playing")
+         .join(pg.game).order_by(pg.last_checkin_at.desc(), Game.name).statement),
+        ("stats: most played",
+         pg.query.filter(pg.profile_id == profile, pg.total_hours > 0)
+         .order_by(pg.total_hours.desc()).limit(10).statement),
+        ("playing: archived",
+         pg.query.filter(pg.profile_id == profile, pg.section == "active",
+                         pg.status.in_(["Dropped", "Completed"]))
+         .join(pg.game).order_by(pg.status, Game.name).statement),
+        ("playing.detail: check-ins (later page)",
+         CheckIn.query.filter(CheckIn.profile_game_id == pg_id,
+                              db.tuple_(CheckIn.created_at, CheckIn.id) < (datetime(2100, 1, 1), 0))
+         .order_by(CheckIn.created_at.desc(), CheckIn.id.desc()).limit(21).statement),
+        ("rebuild-rankings --check: score expression",
+         play_next_query(profile, MoodPreferences.query.filter_by(profile_id=profile).first()).statement),
+    ] + _search_queries(profile)
+
+
+def _search_queries(profile):
+    """The FULLTEXT queries behind /search — MySQL only; elsewhere search runs in-process."""
+    if db.engine.dialect.name != "mysql":
+        return []
+    from app.search import _mysql_sources
+    return [(f"search: {kind}", stmt.limit(21)) for kind, stmt in _mysql_sources(profile, "+game*").items()]
+
+
+def _compile(stmt):
+    return str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _full_scans_mysql(sql):
+    rows = db.session.execute(db.text(f"EXPLAIN {sql}")).mappings().all()
+    # type=ALL is a table scan, type=index a full index scan. Derived tables
+    # (<derived2>) are materialized subqueries, not base tables.
+    return [
+        f"{r['table']} (type={r['type']}, rows={r['rows']})"
+        for r in rows
+        if r["type"] in ("ALL", "index") and not str(r["table"]).startswith("<")
+    ], rows
+
+
+def _full_scans_sqlite(sql):
+    rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")).mappings().all()
+    # "SCAN t" / "SCAN t USING [COVERING] INDEX" both read the whole table or
+    # index; only scans of real tables count, not of materialized subqueries.
+    tables = set(db.metadata.tables)
+    scans = [
+        r["detail"] for r in rows
+        if r["detail"].startswith("SCAN ") and r["detail"].split()[1] in tables
+    ]
+    return scans, rows
+
+
+@click.command("db-explain")
+@click.option("--profile", default=None, help="Profile to build the queries for (default: first profile).")
+@click.option("--verbose", "-v", is_flag=True, help="Print every plan row.")
+@with_appcontext
+def explain_command(profile, verbose):
+    """EXPLAIN the hot route queries; exit 1 if any does a full table scan."""
+    profile = profile or current_app.config["PROFILES"][0]
+    dialect = db.engine.dialect.name
+    if dialect == "mysql":
+        check = _full_scans_mysql
+    elif dialect == "sqlite":
+        check = _full_scans_sqlite
+    else:
+        click.echo(f"ERROR: db-explain doesn't know how to read {dialect} plans.", err=True)
+        sys.exit(1)
+
+    pg_id = db.session.query(db.func.max(ProfileGame.id)).filter(ProfileGame.profile_id == profile).scalar() or 0
+
+    failures = 0
+    for label, stmt in route_queries(profile, pg_id):
+        scans, rows = check(_compile(stmt))
+        click.echo(f"{'FULL SCAN' if scans else 'ok':>9}  {label}")
+        for s in scans:
+            click.echo(f"           ↳ {s}")
+        if verbose:
+            for r in rows:
+                click.echo(f"             {dict(r)}")
+        failures += bool(scans)
+
+    if failures:
+        click.echo(f"{failures} query(s) fell back to a full table scan.", err=True)
+        sys.exit(1)
+    click.echo("All route queries use an index.")
@@ -0,0 +1,293 @@
+"""
+Incremental backups: a full mysqldump (the base) followed by small deltas.
+
+A delta holds every row changed since the previous link in the chain —
+ProfileGames by created_at/updated_at, CheckIns by created_at, Games by
+created_at/updated_at/rawg_synced_at or because a changed ProfileGame points at them —
+plus tombstones for rows that disappeared. Small tables (categories, mood
+preferences, category links) are copied whole in every delta. Derived tables
+(dashboard counters, play-time rollups, the stored play-next ranking, profile
+version stamps) are not backed up; they are rebuilt (or bumped) after a chain
+is replayed.
+
+Tombstones come from id sets: every manifest in a chain records the id
+ranges of the tracked tables at snapshot time, and a delta deletes the ids
+that were present in its parent but are gone now.
+
+Deltas are gzip'd NDJSON, one operation per line:
+    {"op": "replace", "table": "categories"}           empty the table
+    {"op": "row", "table": "categories", "row": {...}}  insert into a replaced table
+    {"op": "upsert", "table": "games", "row": {...}}    insert or overwrite by id
+    {"op": "delete", "table": "checkins", "ids": [...]}
+"""
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+from app import db
+from app.backup import _HashingWriter, file_sha256, read_manifest, write_manifest
+from app.utils.serialize import expand_ranges, id_ranges, row_from_json, row_to_json
+
+# Rows stamped within this window before the parent snapshot are re-sent,
+# so a write that committed mid-snapshot can't fall between two links.
+SNAPSHOT_OVERLAP = timedelta(seconds=5)
+
+BATCH_SIZE = 500
+
+# Large tables tracked by timestamp, with id-set tombstones
+TRACKED_TABLES = ("games", "profile_games", "checkins")
+
+# Rebuilt from the other tables after a restore, never backed up in deltas
+DERIVED_TABLES = ("profile_stats", "playtime_buckets", "profile_versions")
+
+
+def _tables():
+    return {t.name: t for t in db.metadata.sorted_tables}
+
+
+def _changed_filter(name, since):
+    t = _tables()
+    if name == "profile_games":
+        pg = t["profile_games"]
+        return db.or_(pg.c.created_at > since, pg.c.updated_at > since)
+    if name == "checkins":
+        return t["checkins"].c.created_at > since
+    if name == "games":
+        g, pg = t["games"], t["profile_games"]
+        touched = db.select(pg.c.game_id).where(db.or_(pg.c.created_at > since, pg.c.updated_at > since))
+        return db.or_(g.c.created_at > since, g.c.updated_at > since, g.c.rawg_synced_at > since,
+                      g.c.id.in_(touched))
+    raise KeyError(name)
+
+
+def snapshot_ids():
+    """{table: [[start, end], ...]} of the current ids in each tracked table."""
+    t = _tables()
+    result = {}
+    for name in TRACKED_TABLES:
+        ids = db.session.execute(
+            db.select(t[name].c.id).order_by(t[name].c.id).execution_options(yield_per=10000)
+        ).scalars()
+        result[name] = id_ranges(ids)
+    return result
+
+
+def _missing_ids(prev_ranges, cur_ranges):
+    """Ids in prev but not in cur — both sorted, walked in step without building sets."""
+    cur = expand_ranges(cur_ranges)
+    nxt = next(cur, None)
+    for i in expand_ranges(prev_ranges):
+        while nxt is not None and nxt < i:
+            nxt = next(cur, None)
+        if nxt != i:
+            yield i
+
+
+# ------------------------------------------------------------------ #
+# Chain discovery                                                      #
+# ------------------------------------------------------------------ #
+
+def chain_manifests(directory):
+    """All backup manifests in *directory*, keyed by backup file name."""
+    manifests = {}
+    if not os.path.isdir(directory):
+        return manifests
+    for entry in os.listdir(directory):
+        if entry.endswith(".manifest.json"):
+            m = read_manifest(os.path.join(directory, entry[: -len(".manifest.json")]))
+            if m and m.get("snapshot_at"):
+                manifests[m["file"]] = m
+    return manifests
+
+
+def latest_link(directory):
+    """Manifest of the newest full backup's last link (the base itself if no deltas yet)."""
+    manifests = chain_manifests(directory)
+    fulls = [m for m in manifests.values() if m["kind"] == "full"]
+    if not fulls:
+        return None
+    base = max(fulls, key=lambda m: m["snapshot_at"])
+    deltas = deltas_for(base["file"], manifests)
+    return deltas[-1] if deltas else base
+
+
+def deltas_for(base_file, manifests):
+    """Deltas of a base in replay order."""
+    return sorted(
+        (m for m in manifests.values() if m["kind"] == "delta" and m["base"] == base_file),
+        key=lambda m: m["seq"],
+    )
+
+
+# ------------------------------------------------------------------ #
+# Writing a delta                                                      #
+# ------------------------------------------------------------------ #
+
+def write_delta(filename, parent):
+    """
+    Write the delta since *parent* (a manifest dict) to *filename*.
+    Returns the new manifest (also written beside the file).
+    """
+    tables = _tables()
+    snapshot_at = datetime.utcnow()
+    since = datetime.fromisoformat(parent["snapshot_at"]) - SNAPSHOT_OVERLAP
+    ids = snapshot_ids()
+    counts = {}
+
+    with open(filename, "wb") as raw:
+        hashed = _HashingWriter(raw)
+        with gzip.GzipFile(fileobj=hashed, mode="wb", compresslevel=6) as gz:
+            out = io.TextIOWrapper(gz, encoding="utf-8")
+
+            def emit(obj):
+                out.write(json.dumps(obj, separators=(",", ":")) + "\n")
+
+            for name, table in tables.items():
+                if name in DERIVED_TABLES:
+                    continue
+                if name in TRACKED_TABLES:
+                    op, query = "upsert", db.select(table).where(_changed_filter(name, since))
+                else:
+                    op, query = "row", db.select(table)
+                    emit({"op": "replace", "table": name})
+                n = 0
+                rows = db.session.execute(query.execution_options(yield_per=1000)).mappings()
+                for row in rows:
+                    emit({"op": op, "table": name, "row": row_to_json(row)})
+                    n += 1
+                counts[name] = n
+
+            for name in reversed(TRACKED_TABLES):
+                gone, chunk = 0, []
+                for i in _missing_ids(parent["id_ranges"].get(name, []), ids[name]):
+                    chunk.append(i)
+                    if len(chunk) == BATCH_SIZE:
+                        emit({"op": "delete", "table": name, "ids": chunk})
+                        gone, chunk = gone + len(chunk), []
+                if chunk:
+                    emit({"op": "delete", "table": name, "ids": chunk})
+                    gone += len(chunk)
+                counts[f"{name}_deleted"] = gone
+
+            out.flush()
+            out.detach()
+
+    manifest = {
+        "kind":        "delta",
+        "file":        os.path.basename(filename),
+        "base":        parent["base"] if parent["kind"] == "delta" else parent["file"],
+        "parent":      parent["file"],
+        "seq":         parent.get("seq", 0) + 1,
+        "created_at":  datetime.now().isoformat(timespec="seconds"),
+        "since":       since.isoformat(),
+        "snapshot_at": snapshot_at.isoformat(),
+        "compression": "gzip",
+        "size":        hashed.bytes,
+        "sha256":      hashed.sha256.hexdigest(),
+        "row_counts":  counts,
+        "id_ranges":   ids,
+    }
+    write_manifest(filename, manifest)
+    return manifest
+
+
+# ------------------------------------------------------------------ #
+# Replaying deltas                                                     #
+# ------------------------------------------------------------------ #
+
+def verify_chain(base_path):
+    """
+    Return (deltas, problems) for the chain rooted at *base_path*: the delta
+    manifests in order and a list of human-readable problems (empty = OK).
+    """
+    directory = os.path.dirname(base_path) or "."
+    manifests = chain_manifests(directory)
+    base = manifests.get(os.path.basename(base_path))
+    problems = []
+    if base is None or base["kind"] != "full":
+        return [], [f"{base_path} has no full-backup manifest"]
+
+    deltas = deltas_for(base["file"], manifests)
+    parent = base["file"]
+    for expected_seq, m in enumerate(deltas, start=1):
+        if m["seq"] != expected_seq or m["parent"] != parent:
+            problems.append(f"{m['file']}: expected seq {expected_seq} after {parent}")
+        path = os.path.join(directory, m["file"])
+        if not os.path.isfile(path):
+            problems.append(f"{m['file']}: file missing")
+        elif file_sha256(path) != m["sha256"]:
+            problems.append(f"{m['file']}: checksum mismatch")
+        parent = m["file"]
+    return deltas, problems
+
+
+def _set_foreign_key_checks(conn, enabled):
+    """MySQL only: delete-then-insert must not cascade into child rows. Session-scoped, so *conn* matters."""
+    if conn.dialect.name == "mysql":
+        conn.execute(db.text(f"SET FOREIGN_KEY_CHECKS={1 if enabled else 0}"))
+
+
+def apply_delta(path):
+    """
+    Replay one delta file into the database in a single transaction, on one
+    dedicated connection: FOREIGN_KEY_CHECKS is per connection, so it is
+    turned off and back on (before the commit, or before the rollback on
+    error) on the same connection that does the replay, never on a pooled one.
+    """
+    tables = _tables()
+    pending = {}   # table name -> list of rows awaiting upsert/insert
+
+    with db.engine.connect() as conn:
+        def flush(name):
+            rows = pending.pop(name, None)
+            if not rows:
+                return
+            table = tables[name]
+            if "id" in table.c and rows[0].get("id") is not None:
+                conn.execute(table.delete().where(table.c.id.in_([r["id"] for r in rows])))
+            conn.execute(table.insert(), rows)
+
+        _set_foreign_key_checks(conn, False)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    name = entry["table"]
+                    if name not in tables:
+                        continue
+                    op = entry["op"]
+                    if op == "replace":
+                        flush(name)
+                        conn.execute(tables[name].delete())
+                    elif op in ("row", "upsert"):
+                        pending.setdefault(name, []).append(row_from_json(tables[name], entry["row"]))
+                        if len(pending[name]) >= BATCH_SIZE:
+                            flush(name)
+                    elif op == "delete":
+                        for other in list(pending):
+                            flush(other)
+                        table = tables[name]
+                        conn.execute(table.delete().where(table.c.id.in_(entry["ids"])))
+            for name in list(pending):
+                flush(name)
+        finally:
+            _set_foreign_key_checks(conn, True)
+        conn.commit()   # on error, leaving the block rolls back instead
+
+
+def rebuild_derived():
+    """Recompute tables that deltas don't carry (counters, stored ranking) and bump every version stamp."""
+    from app.ranking import _all_profiles, refresh_play_next
+    from app.rollups import rebuild_rollups
+    from app.stats import refresh_counts
+    from app.versions import bump
+    profiles = _all_profiles()
+    for profile in profiles:
+        refresh_play_next(profile)
+        refresh_counts(profile)
+        rebuild_rollups(profile)
+    # Restored rows must not be answered with a 304 for a page cached before the restore
+    bump(*profiles)
+    db.session.commit()
@@ -0,0 +1,416 @@
+"""
+Bulk backlog import from a CSV of titles (Steam-style library exports work).
+
+    flask import-games library.csv --profile "Player 1"
+    /backlog/import (upload form)
+
+Recognised columns (header names are case-insensitive; only a title or a
+RAWG id is required per row):
+    name | title | game          game title
+    rawg_id | rawg              RAWG id, if already known
+    categories | category       category names, separated by ";" or "|"
+
+The whole file is handled in a fixed number of queries rather than a few per
+row: titles without a RAWG id are matched against RAWG concurrently (through
+the shared search cache), existing games are found by rawg_id or by their
+indexed Game.title_key (normalize_title of the name) in a few IN queries, and new Games, ProfileGames and category links are written
+with executemany batches in a single transaction.
+"""
+import csv
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from dataclasses import dataclass, field
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import Category, Game, ProfileGame, profile_game_categories
+from app.utils.helpers import normalize_title
+from app.utils.rawg import extract_metadata
+
+BATCH_SIZE = 500
+
+# A RAWG hit whose name isn't an exact (normalized) match must be at least
+# this similar to the title to be used; otherwise the row keeps its own title.
+MATCH_THRESHOLD = 0.85
+
+TITLE_COLUMNS = ("name", "title", "game")
+RAWG_COLUMNS = ("rawg_id", "rawg")
+CATEGORY_COLUMNS = ("categories", "category")
+
+GAME_FIELDS = ("rawg_id", "cover_url", "release_year", "genres", "platforms")
+
+
+@dataclass
+class ImportRow:
+    line: int
+    title: str
+    rawg_id: int = None
+    categories: list = field(default_factory=list)
+    meta: dict = field(default_factory=dict)   # RAWG metadata for a new Game
+    matched_name: str = None                    # RAWG's name, when matched by search
+    game_id: int = None
+
+
+@dataclass
+class ImportReport:
+    added: list = field(default_factory=list)
+    already_in_library: list = field(default_factory=list)
+    duplicates_in_file: list = field(default_factory=list)
+    matched: list = field(default_factory=list)      # (title, RAWG name)
+    unmatched: list = field(default_factory=list)
+    unknown_categories: set = field(default_factory=set)
+    errors: list = field(default_factory=list)       # (line, message)
+    new_games: int = 0
+
+    def summary(self):
+        parts = [f"{len(self.added)} added"]
+        if self.already_in_library:
+            parts.append(f"{len(self.already_in_library)} already in library")
+        if self.duplicates_in_file:
+            parts.append(f"{len(self.duplicates_in_file)} duplicate row(s)")
+        if self.matched or self.unmatched:
+            parts.append(f"{len(self.matched)} matched on RAWG, {len(self.unmatched)} unmatched")
+        if self.errors:
+            parts.append(f"{len(self.errors)} bad row(s)")
+        return ", ".join(parts)
+
+
+# ------------------------------------------------------------------ #
+# Parsing                                                              #
+# ------------------------------------------------------------------ #
+
+def _column(header, names):
+    for i, h in enumerate(header):
+        if h.strip().lower() in names:
+            return i
+    return None
+
+
+def parse_csv(text, report):
+    """ImportRows from CSV *text*; blank rows are skipped, unreadable ones go to report.errors."""
+    reader = csv.reader(io.StringIO(text.lstrip("﻿")))
+    header = next(reader, None)
+    if header is None:
+        return []
+    title_col = _column(header, TITLE_COLUMNS)
+    rawg_col = _column(header, RAWG_COLUMNS)
+    cat_col = _column(header, CATEGORY_COLUMNS)
+    first_line = 2
+    if title_col is None and rawg_col is None:
+        # No recognisable header: a plain list of titles, one per line
+        reader = csv.reader(io.StringIO(text.lstrip("﻿")))
+        title_col, first_line = 0, 1
+
+    rows = []
+    for line, record in enumerate(reader, start=first_line):
+        def cell(col):
+            return record[col].strip() if col is not None and col < len(record) else ""
+
+        title, rawg = cell(title_col), cell(rawg_col)
+        if not title and not rawg:
+            continue
+        rawg_id = None
+        if rawg:
+            try:
+                rawg_id = int(rawg)
+            except ValueError:
+                report.errors.append((line, f"rawg_id {rawg!r} is not a number"))
+                continue
+        categories = [c.strip() for c in re.split(r"[;|]", cell(cat_col)) if c.strip()]
+        rows.append(ImportRow(line=line, title=title or f"RAWG #{rawg_id}", rawg_id=rawg_id, categories=categories))
+    return rows
+
+
+# ------------------------------------------------------------------ #
+# RAWG matching                                                        #
+# ------------------------------------------------------------------ #
+
+def _best_match(title, results):
+    """
+    The result whose normalized name equals the title's, else the most
+    similar one if it clears MATCH_THRESHOLD, else None (unmatched).
+    """
+    key = normalize_title(title)
+    best, best_ratio = None, MATCH_THRESHOLD
+    for r in results:
+        name = normalize_title(r.get("name"))
+        if name == key:
+            return r
+        ratio = SequenceMatcher(None, key, name).ratio()
+        if ratio >= best_ratio:
+            best, best_ratio = r, ratio
+    return best
+
+
+def match_rawg(rows, report, workers=4, rate=5.0, limit=None, budget=None):
+    """
+    Look up rows that have no rawg_id on RAWG, *workers* at a time and at
+    most *rate* requests/second. Titles that already name a local game are
+    not searched, and searches go through the shared cache, so re-importing
+    the same file costs no API calls. At most *limit* rows are searched; the
+    rest are imported by title alone.
+
+    A *budget* (seconds) means we're inside a web request: searches use the
+    no-retry RAWG client, and titles not yet searched when it runs out are
+    imported by title alone too.
+    """
+    from app.rawg_commands import RateLimiter
+    from app.utils.rawg_cache import cached_search
+
+    _, local = _existing_games([r for r in rows if r.rawg_id is None])
+    todo, repeats = {}, []   # one search per distinct title; repeats share its result
+    for r in rows:
+        key = normalize_title(r.title)
+        if r.rawg_id is not None or key in local:
+            continue
+        if key in todo:
+            repeats.append(r)
+        else:
+            todo[key] = r
+    todo = list(todo.values())
+    if limit is not None:
+        report.unmatched.extend(r.title for r in todo[limit:])
+        todo = todo[:limit]
+    if not todo:
+        return
+
+    app = current_app._get_current_object()
+    limiter = RateLimiter(rate)
+    stop_at = time.monotonic() + budget if budget is not None else None
+
+    def search(row):
+        with app.app_context():
+            if not limiter.acquire(stop_at):
+                return row, None, None
+            try:
+                return row, cached_search(row.title, page_size=5, interactive=budget is not None), None
+            except Exception as exc:
+                return row, None, exc
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for row, results, error in pool.map(search, todo):
+            best = _best_match(row.title, results or []) if error is None else None
+            if best is None:
+                report.unmatched.append(row.title)
+                continue
+            row.meta = extract_metadata(best)
+            row.rawg_id = row.meta["rawg_id"]
+            row.matched_name = best.get("name") or row.title
+            report.matched.append((row.title, row.matched_name))
+
+    searched = {normalize_title(r.title): r for r in todo}
+    for r in repeats:
+        first = searched.get(normalize_title(r.title))
+        if first is not None and first.rawg_id is not None:
+            r.meta, r.rawg_id, r.matched_name = first.meta, first.rawg_id, first.matched_name
+
+
+# ------------------------------------------------------------------ #
+# Writing                                                              #
+# ------------------------------------------------------------------ #
+
+def _backfill_title_keys():
+    """
+    Key games written before games.title_key existed (see
+    migration_games_title_key.sql; SQL can't fold accents and punctuation the
+    way normalize_title() does). A no-op index lookup once they all have one.
+    """
+    table = Game.__table__
+    missing = db.session.execute(
+        db.select(table.c.id, table.c.name).where(table.c.title_key.is_(None))
+    ).all()
+    # Keep updated_at: this isn't an edit, and deltas shouldn't re-send every game
+    stmt = (
+        table.update()
+        .where(table.c.id == db.bindparam("b_id"))
+        .values(title_key=db.bindparam("b_key"), updated_at=table.c.updated_at)
+    )
+    for start in range(0, len(missing), BATCH_SIZE):
+        db.session.execute(stmt, [
+            {"b_id": gid, "b_key": normalize_title(name)} for gid, name in missing[start:start + BATCH_SIZE]
+        ])
+
+
+def _existing_games(rows):
+    """
+    Every Game a row could be: same rawg_id, or the same normalize_title()
+    key, looked up on the indexed games.title_key — only the file's own keys
+    are read, however big the games table is. Returns ({rawg_id: id},
+    {normalized name: id}), the oldest game winning a shared name.
+    """
+    rawg_ids = sorted({r.rawg_id for r in rows if r.rawg_id is not None})
+    keys = sorted({normalize_title(n) for r in rows for n in (r.title, r.matched_name) if n})
+    by_rawg, by_name = {}, {}
+    for start in range(0, len(rawg_ids), BATCH_SIZE):
+        by_rawg.update(db.session.execute(
+            db.select(Game.rawg_id, Game.id).where(Game.rawg_id.in_(rawg_ids[start:start + BATCH_SIZE]))
+        ).all())
+    if keys:
+        _backfill_title_keys()
+    for start in range(0, len(keys), BATCH_SIZE):
+        for key, gid in db.session.execute(
+            db.select(Game.title_key, Game.id)
+            .where(Game.title_key.in_(keys[start:start + BATCH_SIZE]))
+            .order_by(Game.id)
+        ):
+            by_name.setdefault(key, gid)
+    return by_rawg, by_name
+
+
+def _insert_games(rows):
+    """Batch-insert Games for rows that had no match and set row.game_id."""
+    table = Game.__table__
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start:start + BATCH_SIZE]
+        db.session.execute(table.insert(), [
+            {"name": r.matched_name or r.title, **{f: r.meta.get(f) for f in GAME_FIELDS}, "rawg_id": r.rawg_id}
+            for r in batch
+        ])
+        with_rawg = {r.rawg_id: r for r in batch if r.rawg_id is not None}
+        if with_rawg:
+            for gid, rawg_id in db.session.execute(
+                db.select(table.c.id, table.c.rawg_id).where(table.c.rawg_id.in_(list(with_rawg)))
+            ):
+                with_rawg[rawg_id].game_id = gid
+        by_name = {r.title: r for r in batch if r.rawg_id is None}
+        if by_name:
+            # Newest row per name — the ones just inserted
+            for name, gid in db.session.execute(
+                db.select(table.c.name, db.func.max(table.c.id))
+                .where(table.c.rawg_id.is_(None), table.c.name.in_(list(by_name)))
+                .group_by(table.c.name)
+            ):
+                by_name[name].game_id = gid
+
+
+def import_rows(profile, rows, report):
+    """Add *rows* to *profile*'s backlog. Runs in the caller's transaction; caller commits."""
+    from app.ranking import refresh_play_next
+    from app.stats import refresh_counts
+    from app.versions import bump
+
+    by_rawg, by_name = _existing_games(rows)
+
+    # Resolve each row to an existing game, or queue it for insert; drop in-file duplicates
+    seen, new_rows, resolved = set(), [], []
+    for r in rows:
+        key = ("rawg", r.rawg_id) if r.rawg_id is not None else ("name", normalize_title(r.title))
+        if key in seen:
+            report.duplicates_in_file.append(r.title)
+            continue
+        seen.add(key)
+        if r.rawg_id is not None:
+            r.game_id = by_rawg.get(r.rawg_id)
+        else:
+            r.game_id = by_name.get(normalize_title(r.title))
+        (resolved if r.game_id else new_rows).append(r)
+
+    _insert_games(new_rows)
+    report.new_games = len(new_rows)
+    rows = resolved + new_rows
+
+    # One query for what's already in the library
+    game_ids = [r.game_id for r in rows]
+    in_library = set(db.session.execute(
+        db.select(ProfileGame.game_id).where(ProfileGame.profile_id == profile, ProfileGame.game_id.in_(game_ids))
+    ).scalars()) if game_ids else set()
+    to_add, adding = [], set()
+    for r in rows:
+        if r.game_id in in_library:
+            report.already_in_library.append(r.title)
+        elif r.game_id in adding:
+            # Two rows that resolved to the same game (e.g. by rawg_id and by name)
+            report.duplicates_in_file.append(r.title)
+        else:
+            to_add.append(r)
+            adding.add(r.game_id)
+
+    categories = {
+        c.name.casefold(): c.id
+        for c in Category.query.filter_by(profile_id=profile)
+    }
+    pg = ProfileGame.__table__
+    for start in range(0, len(to_add), BATCH_SIZE):
+        batch = to_add[start:start + BATCH_SIZE]
+        db.session.execute(pg.insert(), [
+            {"profile_id": profile, "game_id": r.game_id, "section": "backlog", "status": None, "rank": 0}
+            for r in batch
+        ])
+        pg_ids = dict(db.session.execute(
+            db.select(pg.c.game_id, pg.c.id).where(
+                pg.c.profile_id == profile, pg.c.game_id.in_([r.game_id for r in batch])
+            )
+        ).all())
+        links = set()
+        for r in batch:
+            for name in r.categories:
+                cat_id = categories.get(name.casefold())
+                if cat_id is None:
+                    report.unknown_categories.add(name)
+                else:
+                    links.add((pg_ids[r.game_id], cat_id))
+        if links:
+            db.session.execute(profile_game_categories.insert(), [
+                {"profile_game_id": pg_id, "category_id": cat_id} for pg_id, cat_id in sorted(links)
+            ])
+        report.added.extend(r.matched_name or r.title for r in batch)
+
+    if to_add:
+        bump(profile)
+        refresh_play_next(profile)
+        refresh_counts(profile)
+    return report
+
+
+def import_csv(profile, text, match=True, workers=4, rate=5.0, match_limit=None, match_budget=None):
+    """Parse, match and import a CSV into *profile*'s backlog in one transaction. Returns an ImportReport."""
+    report = ImportReport()
+    rows = parse_csv(text, report)
+    if match and os.environ.get("RAWG_API_KEY"):
+        match_rawg(rows, report, workers=workers, rate=rate, limit=match_limit, budget=match_budget)
+    try:
+        import_rows(profile, rows, report)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return report
+
+
+@click.command("import-games")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--profile", required=True, help="Profile whose backlog receives the games.")
+@click.option("--no-match", is_flag=True, help="Don't look titles up on RAWG; import them by name only.")
+@click.option("--workers", default=4, show_default=True, help="Concurrent RAWG searches.")
+@click.option("--rate", default=5.0, show_default=True, help="Max RAWG requests per second (0 = unlimited).")
+@with_appcontext
+def import_games_command(path, profile, no_match, workers, rate):
+    """Add every game in a CSV (name, rawg_id, categories columns) to a profile's backlog."""
+    if not no_match and not os.environ.get("RAWG_API_KEY"):
+        click.echo("RAWG_API_KEY is not set — importing titles without RAWG matching.")
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        text = f.read()
+    try:
+        report = import_csv(profile, text, match=not no_match, workers=workers, rate=rate)
+    except Exception as exc:
+        click.echo(f"Import failed, nothing was written: {exc}", err=True)
+        sys.exit(1)
+
+    for line, message in report.errors:
+        click.echo(f"  line {line}: {message}")
+    for title, name in report.matched:
+        if normalize_title(title) != normalize_title(name):
+            click.echo(f"  matched {title!r} → {name!r}")
+    for title in report.unmatched:
+        click.echo(f"  no RAWG match for {title!r}")
+    if report.unknown_categories:
+        click.echo(f"  unknown categories ignored: {', '.join(sorted(report.unknown_categories))}")
+    click.echo(f"{profile}: {report.summary()} ({report.new_games} new game record(s)).")
@@ -1,5 +1,9 @@
 from datetime import datetime
+
+from sqlalchemy.orm import validates
+
 from app import db
+from app.utils.helpers import normalize_title
 
 STATUSES = ["Playing", "On Hold", "Dropped", "Completed"]
 
@@ -8,11 +12,17 @@ profile_game_categories = db.Table(
     "profile_game_categories",
     db.Column("profile_game_id", db.Integer, db.ForeignKey("profile_games.id", ondelete="CASCADE"), primary_key=True),
     db.Column("category_id",     db.Integer, db.ForeignKey("categories.id",     ondelete="CASCADE"), primary_key=True),
+    # Reverse lookup (category → games) for the backlog page and play-next scoring
+    db.Index("ix_profile_game_categories_category", "category_id", "profile_game_id"),
 )
 
 
 class Category(db.Model):
     __tablename__ = "categories"
+    __table_args__ = (
+        # Category lists: WHERE profile_id = ? ORDER BY rank, name
+        db.Index("ix_categories_profile_rank_name", "profile_id", "rank", "name"),
+    )
 
     id         = db.Column(db.Integer,     primary_key=True, autoincrement=True)
     profile_id = db.Column(db.String(100), nullable=False)
@@ -34,6 +44,15 @@ class Category(db.Model):
 class Game(db.Model):
     """Shared game record — RAWG metadata only. Per-profile data lives in ProfileGame."""
     __tablename__ = "games"
+    __table_args__ = (
+        db.Index("ix_games_rawg_synced_at", "rawg_synced_at"),
+        # Incremental backups: games edited since the previous link
+        db.Index("ix_games_updated_at", "updated_at"),
+        # Library import: existing games by normalized title (app.library_import)
+        db.Index("ix_games_title_key", "title_key"),
+        # Library search (app.search); MySQL only — other databases use the in-process index
+        db.Index("ix_games_name_fulltext", "name", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
     id           = db.Column(db.Integer,     primary_key=True, autoincrement=True)
     name         = db.Column(db.String(200), nullable=False)
@@ -43,6 +62,15 @@ class Game(db.Model):
     genres       = db.Column(db.String(200), nullable=True)   # "RPG, Action"
     platforms    = db.Column(db.String(300), nullable=True)   # "PC, PS5"
     created_at   = db.Column(db.DateTime,   nullable=False, default=datetime.utcnow)
+    updated_at   = db.Column(db.DateTime,   nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Last successful metadata fetch by `flask rawg-refresh` (NULL = never)
+    rawg_synced_at = db.Column(db.DateTime, nullable=True)
+    # normalize_title(name), kept in step by the default (Core inserts) and
+    # _set_title_key (ORM writes). NULL only on rows older than the column.
+    title_key = db.Column(
+        db.String(255), nullable=True,
+        default=lambda ctx: normalize_title(ctx.get_current_parameters().get("name")),
+    )
 
     # One game can have many per-profile entries (one per profile that tracks it).
     profile_games = db.relationship(
@@ -51,6 +79,11 @@ class Game(db.Model):
         cascade="all, delete-orphan",
     )
 
+    @validates("name")
+    def _set_title_key(self, key, name):
+        self.title_key = normalize_title(name)
+        return name
+
     def to_dict(self) -> dict:
         return {
             "id":           self.id,
@@ -69,6 +102,22 @@ class Game(db.Model):
 class ProfileGame(db.Model):
     """Per-profile tracking data for a game."""
     __tablename__ = "profile_games"
+    __table_args__ = (
+        # Library/backlog lists and dashboard counts: profile + section and/or status
+        db.Index("ix_profile_games_profile_section_status", "profile_id", "section", "status"),
+        db.Index("ix_profile_games_profile_status", "profile_id", "status"),
+        # Stored play-next ranking reads: WHERE profile_id = ? ORDER BY play_next_rank
+        db.Index("ix_profile_games_profile_play_next_rank", "profile_id", "play_next_rank"),
+        # Playing index sorted by recency: profile + section + status ORDER BY last_checkin_at DESC
+        db.Index("ix_profile_games_profile_section_status_last_checkin",
+                 "profile_id", "section", "status", "last_checkin_at"),
+        # Stats page "most played": WHERE profile_id = ? ORDER BY total_hours DESC
+        db.Index("ix_profile_games_profile_total_hours", "profile_id", "total_hours"),
+        # One entry per game per profile (also serves the duplicate check in backlog.add)
+        db.UniqueConstraint("profile_id", "game_id", name="uq_profile_games_profile_game"),
+        # Library search (app.search), MySQL only
+        db.Index("ix_profile_games_notes_fulltext", "notes", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
     id         = db.Column(db.Integer,      primary_key=True, autoincrement=True)
     profile_id = db.Column(db.String(100),  nullable=False)
@@ -86,7 +135,15 @@ class ProfileGame(db.Model):
         nullable=True,
     )
     rank           = db.Column(db.Integer, nullable=False, default=0)
-    play_next_rank = db.Column(db.Integer, nullable=True)
+    # Materialized play-next position/score, maintained by app.ranking.refresh_play_next.
+    # NULL for games that aren't play-next candidates (Dropped/Completed).
+    play_next_rank  = db.Column(db.Integer, nullable=True)
+    play_next_score = db.Column(db.Integer, nullable=True)
+
+    # Check-in summary, maintained by app.rollups alongside the play-time buckets
+    last_checkin_at = db.Column(db.DateTime,      nullable=True)
+    total_hours     = db.Column(db.Numeric(8, 1), nullable=False, default=0)
+    checkin_count   = db.Column(db.Integer,       nullable=False, default=0)
 
     # ------------------------------------------------------------------ #
     # Play-next survey                                                     #
@@ -144,11 +201,16 @@ class ProfileGame(db.Model):
         order_by="Category.rank",
     )
 
+    # Never loaded wholesale — pg.checkins is a query (see playing.checkin_page
+    # for the paginated history). Deleting a ProfileGame leaves the check-ins
+    # to the FK's ON DELETE CASCADE instead of loading them first.
     checkins = db.relationship(
         "CheckIn",
         back_populates="profile_game",
-        order_by="CheckIn.created_at.desc()",
+        order_by="(CheckIn.created_at.desc(), CheckIn.id.desc())",
         cascade="all, delete-orphan",
+        lazy="dynamic",
+        passive_deletes=True,
     )
 
     # ------------------------------------------------------------------ #
@@ -206,8 +268,68 @@ class MoodPreferences(db.Model):
         return prefs
 
 
+class ProfileStats(db.Model):
+    """Per-profile dashboard counters, kept in sync by app.stats.refresh_counts."""
+    __tablename__ = "profile_stats"
+
+    id         = db.Column(db.Integer,     primary_key=True, autoincrement=True)
+    profile_id = db.Column(db.String(100), nullable=False, unique=True)
+    playing    = db.Column(db.Integer,     nullable=False, default=0)
+    on_hold    = db.Column(db.Integer,     nullable=False, default=0)
+    backlog    = db.Column(db.Integer,     nullable=False, default=0)
+    completed  = db.Column(db.Integer,     nullable=False, default=0)
+
+    def to_dict(self) -> dict:
+        return {
+            "playing":   self.playing,
+            "on_hold":   self.on_hold,
+            "backlog":   self.backlog,
+            "completed": self.completed,
+        }
+
+
+class ProfileVersion(db.Model):
+    """Per-profile change counter behind conditional GETs, bumped by app.versions on every write."""
+    __tablename__ = "profile_versions"
+
+    id         = db.Column(db.Integer,     primary_key=True, autoincrement=True)
+    profile_id = db.Column(db.String(100), nullable=False, unique=True)
+    version    = db.Column(db.Integer,     nullable=False, default=0)
+    changed_at = db.Column(db.DateTime,    nullable=False, default=datetime.utcnow)
+
+
+class PlaytimeBucket(db.Model):
+    """Per-profile play time for one day, week (starting Monday) or month, maintained by app.rollups."""
+    __tablename__ = "playtime_buckets"
+    __table_args__ = (
+        db.UniqueConstraint("profile_id", "period", "period_start", name="uq_playtime_buckets_profile_period"),
+    )
+
+    id           = db.Column(db.Integer,     primary_key=True, autoincrement=True)
+    profile_id   = db.Column(db.String(100), nullable=False)
+    period       = db.Column(db.Enum("day", "week", "month", name="playtime_period_enum"), nullable=False)
+    period_start = db.Column(db.Date,        nullable=False)
+    hours        = db.Column(db.Numeric(10, 1), nullable=False, default=0)
+    checkins     = db.Column(db.Integer,     nullable=False, default=0)
+
+    def to_dict(self) -> dict:
+        return {
+            "period":   self.period,
+            "start":    self.period_start.isoformat(),
+            "hours":    float(self.hours),
+            "checkins": self.checkins,
+        }
+
+
 class CheckIn(db.Model):
     __tablename__ = "checkins"
+    __table_args__ = (
+        # Check-in history, keyset-paginated:
+        # WHERE profile_game_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+        db.Index("ix_checkins_profile_game_created_id", "profile_game_id", "created_at", "id"),
+        # Library search (app.search), MySQL only
+        db.Index("ix_checkins_note_fulltext", "note", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
     id              = db.Column(db.Integer, primary_key=True, autoincrement=True)
     profile_game_id = db.Column(
@@ -0,0 +1,322 @@
+"""
+On-demand profiling of live gunicorn workers.
+
+Workers are separate processes, so the admin endpoints (app/blueprints/admin.py)
+don't act on "the" worker that happens to answer them. They write a small
+control file under the profiling directory, and every worker reads it again
+(one stat() per request) whenever its mtime changes:
+
+* profile — the next N requests to one endpoint (or path), across all
+  workers, run under cProfile. Each is dumped as <pid>-<ns>.prof into the
+  session's folder. merged_stats() combines them for pstats text, a .prof
+  download (snakeviz, `python -m pstats`), or collapsed stacks for
+  flamegraph.pl / speedscope.
+* heap — start/stop tracemalloc, and named snapshots. Each worker dumps a
+  requested snapshot on its next request as heap/<pid>-<label>.snap, along
+  with a count of live ORM instances per model. heap_diff() compares two
+  snapshots of the same worker.
+
+None of this is imported unless ADMIN_PROFILING is on.
+"""
+import cProfile
+import gc
+import json
+import marshal
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from io import StringIO
+
+from flask import current_app, g, request
+
+from app import db
+
+MAX_PROFILED_REQUESTS = 500
+LABEL_RE = re.compile(r"^[A-Za-z0-9_.-]{1,40}$")
+
+_control_cache = {"stamp": None, "data": {}}
+_lock = threading.Lock()
+
+
+# ------------------------------------------------------------------ #
+# Control file                                                         #
+# ------------------------------------------------------------------ #
+
+def profiling_dir():
+    return current_app.config.get("PROFILING_DIR") or os.path.join(current_app.instance_path, "profiling")
+
+
+def _control_path():
+    return os.path.join(profiling_dir(), "control.json")
+
+
+def read_control():
+    """The control file's contents, re-read only when it changed on disk."""
+    path = _control_path()
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _control_cache["stamp"] != stamp:
+        with open(path) as f:
+            data = json.load(f)
+        with _lock:
+            _control_cache.update(stamp=stamp, data=data)
+    return _control_cache["data"]
+
+
+def update_control(**changes):
+    """Merge *changes* into the control file (None removes a key), atomically."""
+    data = dict(read_control())
+    for key, value in changes.items():
+        if value is None:
+            data.pop(key, None)
+        else:
+            data[key] = value
+    os.makedirs(profiling_dir(), exist_ok=True)
+    tmp = _control_path() + f".{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, _control_path())
+    return data
+
+
+# ------------------------------------------------------------------ #
+# cProfile                                                             #
+# ------------------------------------------------------------------ #
+
+def session_dir(session):
+    return os.path.join(profiling_dir(), "profiles", session)
+
+
+def profile_files(session):
+    folder = session_dir(session)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".prof"))
+
+
+def arm(target, count):
+    """Profile the next *count* requests whose endpoint or path is *target*."""
+    session = time.strftime("%Y%m%d-%H%M%S")
+    os.makedirs(session_dir(session), exist_ok=True)
+    return update_control(profile={"session": session, "target": target, "requests": count})
+
+
+def _matches(target):
+    return request.blueprint != "admin" and target in (request.endpoint, request.path)
+
+
+def merged_stats(session):
+    """One pstats.Stats over every request captured in *session*, or None."""
+    files = profile_files(session)
+    if not files:
+        return None
+    stats = pstats.Stats(files[0], stream=StringIO())
+    for path in files[1:]:
+        stats.add(path)
+    return stats
+
+
+def stats_text(stats, sort="cumulative", limit=60, match=None):
+    out = StringIO()
+    out.write(f"{len(stats.files)} request(s) captured\n")
+    stats.stream = out
+    stats.files = []   # print_stats lists every .prof path otherwise
+    stats.sort_stats(sort)
+    restrictions = [match] if match else []
+    stats.print_stats(*restrictions, limit)
+    if match:
+        stats.print_callers(match)
+    return out.getvalue()
+
+
+def stats_bytes(stats):
+    """The merged profile in .prof format (what Stats.dump_stats writes)."""
+    return marshal.dumps(stats.stats)
+
+
+def _frame_name(func):
+    filename, line, name = func
+    if filename == "~":               # built-ins: ('~', 0, "<method 'join' of 'str' objects>")
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{line})"
+    return label.replace(";", ",")
+
+
+def collapsed_stacks(stats, min_us=1):
+    """
+    Folded stacks ("a;b;c microseconds" per line) for flamegraph.pl or
+    speedscope. cProfile keeps caller→callee edges rather than full stacks, so
+    time is split down the tree in proportion to each edge's cumulative time
+    — the same approximation flameprof and snakeviz make.
+    """
+    children = {}
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, entry in stats.stats.items() if not entry[4]]
+
+    folded = {}
+
+    def walk(func, budget, path, depth):
+        cc, nc, tt, ct, _ = stats.stats[func]
+        scale = budget / ct if ct else 0.0
+        own = tt * scale * 1e6
+        if own >= min_us:
+            key = ";".join(path)
+            folded[key] = folded.get(key, 0) + own
+        if depth >= 200:
+            return
+        for child, edge_ct in children.get(func, ()):
+            share = edge_ct * scale
+            if share * 1e6 < min_us or _frame_name(child) in path:
+                continue
+            walk(child, share, path + [_frame_name(child)], depth + 1)
+
+    for root in roots:
+        walk(root, stats.stats[root][3], [_frame_name(root)], 0)
+    return "".join(f"{stack} {round(us)}\n" for stack, us in sorted(folded.items()))
+
+
+def _start_profile(control):
+    settings = control.get("profile")
+    if not settings or not _matches(settings["target"]):
+        return
+    # Shared across workers through the folder; a race can add a request or two
+    if len(profile_files(settings["session"])) >= settings["requests"]:
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:    # another profiler is already active in this process
+        return
+    g.profiler = (profiler, settings["session"])
+
+
+def _stop_profile(exc=None):
+    running = g.pop("profiler", None)
+    if running is None:
+        return
+    profiler, session = running
+    profiler.disable()
+    folder = session_dir(session)
+    os.makedirs(folder, exist_ok=True)
+    profiler.dump_stats(os.path.join(folder, f"{os.getpid()}-{time.time_ns()}.prof"))
+
+
+# ------------------------------------------------------------------ #
+# tracemalloc                                                          #
+# ------------------------------------------------------------------ #
+
+def heap_dir():
+    return os.path.join(profiling_dir(), "heap")
+
+
+def _snapshot_path(pid, label, ext="snap"):
+    return os.path.join(heap_dir(), f"{pid}-{label}.{ext}")
+
+
+def orm_counts():
+    """Live ORM instances in this process, per model — ProfileGame list loads show up here."""
+    models = {mapper.class_ for mapper in db.Model.registry.mappers}
+    counts = {}
+    for obj in gc.get_objects():
+        cls = type(obj)
+        if cls in models:
+            counts[cls.__name__] = counts.get(cls.__name__, 0) + 1
+    return counts
+
+
+def take_snapshot(label):
+    """Dump this worker's heap as *label* (tracemalloc must be running)."""
+    os.makedirs(heap_dir(), exist_ok=True)
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot()
+    snapshot.dump(_snapshot_path(os.getpid(), label))
+    traced, peak = tracemalloc.get_traced_memory()
+    with open(_snapshot_path(os.getpid(), label, "json"), "w") as f:
+        json.dump({"taken_at": time.time(), "traced": traced, "peak": peak, "orm": orm_counts()}, f)
+
+
+def snapshots():
+    """{pid: [label, ...]} for every snapshot on disk."""
+    found = {}
+    if os.path.isdir(heap_dir()):
+        for name in sorted(os.listdir(heap_dir())):
+            if name.endswith(".snap"):
+                pid, label = name[:-len(".snap")].split("-", 1)
+                found.setdefault(int(pid), []).append(label)
+    return found
+
+
+def _apply_heap(control):
+    settings = control.get("heap") or {}
+    if settings.get("tracing"):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(settings.get("frames", 10))
+        for label in settings.get("snapshots", []):
+            if not os.path.exists(_snapshot_path(os.getpid(), label)):
+                take_snapshot(label)
+    elif tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def heap_diff(pid, base, current, group="lineno", limit=30, match=None):
+    """Text report: allocation growth from snapshot *base* to *current* in worker *pid*, plus ORM counts."""
+    old = tracemalloc.Snapshot.load(_snapshot_path(pid, base)).filter_traces(_IGNORED)
+    new = tracemalloc.Snapshot.load(_snapshot_path(pid, current)).filter_traces(_IGNORED)
+    if match:
+        keep = (tracemalloc.Filter(True, f"*{match}*"),)
+        old, new = old.filter_traces(keep), new.filter_traces(keep)
+    with open(_snapshot_path(pid, base, "json")) as f:
+        old_meta = json.load(f)
+    with open(_snapshot_path(pid, current, "json")) as f:
+        new_meta = json.load(f)
+
+    lines = [
+        f"worker {pid}: {base} -> {current}, "
+        f"traced {old_meta['traced'] / 1024:.0f} KiB -> {new_meta['traced'] / 1024:.0f} KiB "
+        f"(peak {new_meta['peak'] / 1024:.0f} KiB)",
+        "",
+        "ORM instances:",
+    ]
+    for model in sorted(set(old_meta["orm"]) | set(new_meta["orm"])):
+        before, after = old_meta["orm"].get(model, 0), new_meta["orm"].get(model, 0)
+        lines.append(f"  {model:<20} {before:>8} -> {after:<8} ({after - before:+d})")
+    lines += ["", f"Top {limit} by growth ({group}):"]
+    for stat in new.compare_to(old, group)[:limit]:
+        lines.append(f"  {stat}")
+        if group == "traceback":
+            lines += [f"      {frame}" for frame in stat.traceback.format()]
+    return "\n".join(lines) + "\n"
+
+
+# ------------------------------------------------------------------ #
+# Request hooks                                                        #
+# ------------------------------------------------------------------ #
+
+def _before_request():
+    control = read_control()
+    if not control:
+        return
+    _apply_heap(control)
+    _start_profile(control)
+
+
+def init_app(app):
+    app.before_request(_before_request)
+    app.teardown_request(_stop_profile)
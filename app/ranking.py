@@ -0,0 +1,443 @@
+"""
+Batch play-next scoring — the one implementation of the play-next score
+(weights in app/scoring.py).
+
+Scores a whole profile's candidates in one pass. Candidates are flattened
+into a columnar feature matrix (one row per ProfileGame) and scored with NumPy
+when it is installed, or with an equivalent pure-Python loop when it isn't.
+Both paths produce exactly the same integers.
+
+play_next_query() compiles the same weights into one SQL column expression so
+the database can do the ranking (ORDER BY score ... LIMIT n) when only the top
+few games are needed.
+
+The ranking is also materialized per profile in ProfileGame.play_next_rank /
+play_next_score. Every write that can change a score calls
+refresh_play_next(profile) before committing, so reads are a single ordered
+SELECT (ranked_play_next). A write to one game passes touched=[pg.id]: only
+that row is rescored and the ranks around it shifted. Writes that move every
+score (mood preferences, category ranks) recompute the profile, and
+`flask rebuild-rankings` recomputes everything and `--check` reports drift.
+"""
+import sys
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.orm import joinedload, selectinload
+
+from app import db
+from app.models import Category, MoodPreferences, ProfileGame, profile_game_categories
+from app.utils.helpers import load_options
+from app.versions import bump
+from app.scoring import (
+    HYPE_MULTIPLIER, SERIES_CONTINUITY_BONUS, LENGTH_SCORES,
+    CAT_RANK_MAX, CAT_RANK_STEP, MOOD_MAX_POINTS,
+    STATUS_PLAYING_BONUS, STATUS_ON_HOLD_PENALTY,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover — NumPy is optional
+    np = None
+
+MOOD_FIELDS = ["mood_chill", "mood_intense", "mood_story", "mood_action", "mood_exploration"]
+
+# Max raw mood dot product: 5 dimensions × 5 × 5
+MOOD_DOT_MAX = 125
+
+# Feature matrix column layout
+COL_HYPE      = 0
+COL_LENGTH    = 1   # LENGTH_SCORES points, already looked up
+COL_SERIES    = 2   # 1 / 0
+COL_CAT_RANK  = 3   # best (lowest non-zero) category rank, 0 = none
+COL_MOOD      = 4   # five columns, in MOOD_FIELDS order
+COL_STATUS    = 9   # STATUS_CODES value
+N_COLS        = 10
+
+STATUS_NONE, STATUS_PLAYING, STATUS_ON_HOLD = 0, 1, 2
+STATUS_CODES = {"Playing": STATUS_PLAYING, "On Hold": STATUS_ON_HOLD}
+
+
+def feature_row(pg):
+    """Flatten one ProfileGame into a feature row (list of ints)."""
+    best_rank = min((c.rank for c in pg.categories if c.rank), default=0) if pg.categories else 0
+    return [
+        pg.hype or 0,
+        LENGTH_SCORES.get(pg.estimated_length or "", 0),
+        1 if pg.series_continuity else 0,
+        best_rank,
+        *((getattr(pg, f) or 0) for f in MOOD_FIELDS),
+        STATUS_CODES.get(pg.status, STATUS_NONE),
+    ]
+
+
+def feature_matrix(pgs):
+    """Return the feature rows for *pgs* as a list of lists."""
+    return [feature_row(pg) for pg in pgs]
+
+
+def _pref_vector(prefs):
+    if not prefs:
+        return None
+    return [getattr(prefs, f) or 0 for f in MOOD_FIELDS]
+
+
+def _score_rows_python(rows, pref_vec):
+    scores = []
+    for r in rows:
+        score  = r[COL_HYPE] * HYPE_MULTIPLIER
+        score += SERIES_CONTINUITY_BONUS if r[COL_SERIES] else 0
+        score += r[COL_LENGTH]
+        if r[COL_CAT_RANK]:
+            score += max(0, CAT_RANK_MAX - (r[COL_CAT_RANK] - 1) * CAT_RANK_STEP)
+        if pref_vec is not None:
+            dot = sum(m * p for m, p in zip(r[COL_MOOD:COL_MOOD + 5], pref_vec))
+            score += int((dot / MOOD_DOT_MAX) * MOOD_MAX_POINTS)
+        if r[COL_STATUS] == STATUS_PLAYING:
+            score += STATUS_PLAYING_BONUS
+        elif r[COL_STATUS] == STATUS_ON_HOLD:
+            score -= STATUS_ON_HOLD_PENALTY
+        scores.append(score)
+    return scores
+
+
+def _score_rows_numpy(rows, pref_vec):
+    m = np.asarray(rows, dtype=np.int64).reshape(-1, N_COLS)
+    score  = m[:, COL_HYPE] * HYPE_MULTIPLIER
+    score += m[:, COL_SERIES] * SERIES_CONTINUITY_BONUS
+    score += m[:, COL_LENGTH]
+
+    cat_rank = m[:, COL_CAT_RANK]
+    cat_bonus = np.maximum(0, CAT_RANK_MAX - (cat_rank - 1) * CAT_RANK_STEP)
+    score += np.where(cat_rank != 0, cat_bonus, 0)
+
+    if pref_vec is not None:
+        dot = m[:, COL_MOOD:COL_MOOD + 5] @ np.asarray(pref_vec, dtype=np.int64)
+        # Same float64 arithmetic and truncation toward zero as int() in Python
+        score += np.trunc((dot / MOOD_DOT_MAX) * MOOD_MAX_POINTS).astype(np.int64)
+
+    status = m[:, COL_STATUS]
+    score += np.where(status == STATUS_PLAYING, STATUS_PLAYING_BONUS, 0)
+    score -= np.where(status == STATUS_ON_HOLD, STATUS_ON_HOLD_PENALTY, 0)
+    return score.tolist()
+
+
+def score_rows(rows, prefs=None, use_numpy=None):
+    """
+    Score a feature matrix. Returns a list of ints in row order.
+
+    use_numpy=None picks NumPy when it is importable; pass False to force the
+    pure-Python path (or True to require NumPy).
+    """
+    if not rows:
+        return []
+    if use_numpy is None:
+        use_numpy = np is not None
+    pref_vec = _pref_vector(prefs)
+    if use_numpy:
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+        return _score_rows_numpy(rows, pref_vec)
+    return _score_rows_python(rows, pref_vec)
+
+
+def score_games(pgs, prefs=None, use_numpy=None):
+    """Return {pg.id: score} for every ProfileGame in *pgs*."""
+    scores = score_rows(feature_matrix(pgs), prefs, use_numpy=use_numpy)
+    return {pg.id: s for pg, s in zip(pgs, scores)}
+
+
+def rank_games(pgs, prefs=None, use_numpy=None):
+    """
+    Score and order *pgs* for play-next (highest first).
+
+    Ties keep their input order, matching sorted(..., reverse=True).
+    Returns (ranked_list, {pg.id: score}).
+    """
+    pgs = list(pgs)
+    scores = score_rows(feature_matrix(pgs), prefs, use_numpy=use_numpy)
+    order = sorted(range(len(pgs)), key=lambda i: scores[i], reverse=True)
+    ranked = [pgs[i] for i in order]
+    return ranked, {pg.id: s for pg, s in zip(pgs, scores)}
+
+
+def play_next_candidates(profile):
+    """All ProfileGames eligible for play-next: the backlog plus Playing/On Hold games."""
+    options = load_options(joinedload(ProfileGame.game), selectinload(ProfileGame.categories))
+    backlog_pgs = (
+        ProfileGame.query
+        .options(*options)
+        .filter_by(profile_id=profile, section="backlog")
+        .order_by(ProfileGame.id)
+        .all()
+    )
+    active_pgs = (
+        ProfileGame.query
+        .options(*options)
+        .filter(
+            ProfileGame.profile_id == profile,
+            ProfileGame.section == "active",
+            ProfileGame.status.in_(["Playing", "On Hold"]),
+        )
+        .order_by(ProfileGame.id)
+        .all()
+    )
+    return backlog_pgs + active_pgs
+
+
+def play_next_query(profile, prefs=None):
+    """
+    Query of (ProfileGame, score) rows for *profile*, ordered best-first.
+
+    The score is a single SQL expression built from app/scoring.py and gives
+    the same integers as score_rows(). Ties are broken backlog-first, then
+    by id — the order play_next_candidates() feeds into rank_games().
+    Add .limit(n) to let the database stop after the top n.
+    """
+    best = (
+        db.session.query(
+            profile_game_categories.c.profile_game_id.label("profile_game_id"),
+            db.func.min(Category.rank).label("best_rank"),
+        )
+        .join(Category, Category.id == profile_game_categories.c.category_id)
+        .filter(Category.profile_id == profile, Category.rank != 0)
+        .group_by(profile_game_categories.c.profile_game_id)
+        .subquery("best_category")
+    )
+    cat_bonus = CAT_RANK_MAX - (best.c.best_rank - 1) * CAT_RANK_STEP
+
+    score = (
+        db.func.coalesce(ProfileGame.hype, 0) * HYPE_MULTIPLIER
+        + db.case((ProfileGame.series_continuity.is_(True), SERIES_CONTINUITY_BONUS), else_=0)
+        + db.case(LENGTH_SCORES, value=ProfileGame.estimated_length, else_=0)
+        + db.case((best.c.best_rank.is_(None), 0), (cat_bonus > 0, cat_bonus), else_=0)
+        + db.case(
+            (ProfileGame.status == "Playing", STATUS_PLAYING_BONUS),
+            (ProfileGame.status == "On Hold", -STATUS_ON_HOLD_PENALTY),
+            else_=0,
+        )
+    )
+    pref_vec = _pref_vector(prefs)
+    if pref_vec is not None:
+        dot = sum(
+            db.func.coalesce(getattr(ProfileGame, f), 0) * w
+            for f, w in zip(MOOD_FIELDS, pref_vec)
+        )
+        # Moods are non-negative, so integer division matches int() truncation
+        score = score + (dot * MOOD_MAX_POINTS) // MOOD_DOT_MAX
+    score = score.label("score")
+
+    return (
+        db.session.query(ProfileGame, score)
+        .options(*load_options(joinedload(ProfileGame.game), selectinload(ProfileGame.categories)))
+        .outerjoin(best, best.c.profile_game_id == ProfileGame.id)
+        .filter(
+            ProfileGame.profile_id == profile,
+            db.or_(
+                ProfileGame.section == "backlog",
+                db.and_(
+                    ProfileGame.section == "active",
+                    ProfileGame.status.in_(["Playing", "On Hold"]),
+                ),
+            ),
+        )
+        .order_by(score.desc(), ProfileGame.section == "active", ProfileGame.id)
+    )
+
+
+# ------------------------------------------------------------------ #
+# Materialized ranking                                                 #
+# ------------------------------------------------------------------ #
+
+def _is_candidate(pg):
+    return pg.section == "backlog" or (pg.section == "active" and pg.status in ("Playing", "On Hold"))
+
+
+def refresh_play_next(profile, touched=None):
+    """
+    Recompute the stored play-next ranking for *profile* inside the current
+    transaction. Only rows whose rank or score actually changed are written.
+    Call after mutating and before db.session.commit().
+
+    *touched* (ProfileGame ids, including deleted ones) limits rescoring to
+    those rows; every other stored score is trusted and only shifted. Leave it
+    out when a change can move every score.
+    """
+    prefs = MoodPreferences.query.filter_by(profile_id=profile).first()
+    if touched is not None:
+        changes = _rescore_touched(profile, set(touched), prefs)
+    else:
+        changes = _rescore_all(profile, prefs)
+    if changes is None:   # nothing ranked yet to shift
+        changes = _rescore_all(profile, prefs)
+    return _write_ranks(profile, changes)
+
+
+def _rescore_all(profile, prefs):
+    ranked, scores = rank_games(play_next_candidates(profile), prefs)
+
+    wanted = {pg.id: (pos, scores[pg.id]) for pos, pg in enumerate(ranked, start=1)}
+    current = db.session.query(
+        ProfileGame.id, ProfileGame.play_next_rank, ProfileGame.play_next_score,
+    ).filter(ProfileGame.profile_id == profile)
+
+    changes = []
+    for pg_id, rank, score in current:
+        new_rank, new_score = wanted.get(pg_id, (None, None))
+        if (rank, score) != (new_rank, new_score):
+            changes.append({"b_id": pg_id, "b_rank": new_rank, "b_score": new_score})
+    return changes
+
+
+def _rescore_touched(profile, touched, prefs):
+    """
+    Changes for rescoring *touched* alone: the stored ranking minus those
+    rows, plus their new scores, re-sorted with rank_games()' order (score
+    desc, backlog before active, then id). Returns None if nothing is ranked.
+    """
+    stored = (
+        db.session.query(ProfileGame.id, ProfileGame.section, ProfileGame.play_next_rank, ProfileGame.play_next_score)
+        .filter(ProfileGame.profile_id == profile, ProfileGame.play_next_rank.isnot(None),
+                ProfileGame.id.notin_(touched))
+        .order_by(ProfileGame.play_next_rank)
+        .all()
+    )
+    if not stored:
+        return None
+    pgs = (
+        ProfileGame.query
+        .options(selectinload(ProfileGame.categories))
+        .filter(ProfileGame.profile_id == profile, ProfileGame.id.in_(touched))
+        .all()
+    )
+    candidates = [pg for pg in pgs if _is_candidate(pg)]
+    scores = score_games(candidates, prefs)
+
+    # (sort key, id, old rank, old score, new score)
+    order = [((-score, section == "active", pg_id), pg_id, rank, score, score)
+             for pg_id, section, rank, score in stored]
+    order += [((-scores[pg.id], pg.section == "active", pg.id), pg.id, pg.play_next_rank, pg.play_next_score,
+               scores[pg.id]) for pg in candidates]
+    order.sort()   # already sorted but for the touched rows: a near-linear merge
+
+    changes = []
+    for pos, (_, pg_id, rank, old_score, score) in enumerate(order, start=1):
+        if (rank, old_score) != (pos, score):
+            changes.append({"b_id": pg_id, "b_rank": pos, "b_score": score})
+    changes += [{"b_id": pg.id, "b_rank": None, "b_score": None}
+                for pg in pgs if not _is_candidate(pg) and (pg.play_next_rank, pg.play_next_score) != (None, None)]
+    return changes
+
+
+def _write_ranks(profile, changes):
+    if changes:
+        table = ProfileGame.__table__
+        stmt = (
+            table.update()
+            .where(table.c.id == db.bindparam("b_id"))
+            .values(
+                play_next_rank=db.bindparam("b_rank"),
+                play_next_score=db.bindparam("b_score"),
+                # Re-ranking isn't a user edit — leave updated_at alone
+                updated_at=table.c.updated_at,
+            )
+        )
+        db.session.execute(stmt, changes)
+        bump(profile)
+    return len(changes)
+
+
+def ranked_play_next(profile, limit=None):
+    """
+    Read the stored play-next ranking: ProfileGames best-first.
+
+    A profile that has candidates but has never been ranked (fresh install,
+    rows loaded outside the app) is ranked on first read.
+    """
+    # A short page (the dashboard's top 5) joins its categories in the same
+    # round-trip; the full list uses a second selectin query instead.
+    load_categories = joinedload if limit else selectinload
+    query = (
+        ProfileGame.query
+        .options(*load_options(joinedload(ProfileGame.game), load_categories(ProfileGame.categories)))
+        .filter(ProfileGame.profile_id == profile, ProfileGame.play_next_rank.isnot(None))
+        .order_by(ProfileGame.play_next_rank)
+    )
+    if limit:
+        query = query.limit(limit)
+    ranked = query.all()
+    if not ranked and _has_unranked_candidates(profile):
+        refresh_play_next(profile)
+        db.session.commit()
+        ranked = query.all()
+    return ranked
+
+
+def _has_unranked_candidates(profile):
+    return db.session.query(
+        ProfileGame.query
+        .filter(
+            ProfileGame.profile_id == profile,
+            ProfileGame.play_next_rank.is_(None),
+            db.or_(
+                ProfileGame.section == "backlog",
+                ProfileGame.status.in_(["Playing", "On Hold"]),
+            ),
+        )
+        .exists()
+    ).scalar()
+
+
+def check_play_next(profile):
+    """
+    Compare the stored ranking with a fresh SQL-side computation.
+    Returns a list of (pg_id, stored (rank, score), expected (rank, score)).
+    """
+    prefs = MoodPreferences.query.filter_by(profile_id=profile).first()
+    expected = {
+        pg.id: (pos, score)
+        for pos, (pg, score) in enumerate(play_next_query(profile, prefs), start=1)
+    }
+    stored = db.session.query(
+        ProfileGame.id, ProfileGame.play_next_rank, ProfileGame.play_next_score,
+    ).filter(ProfileGame.profile_id == profile)
+
+    drift = []
+    for pg_id, rank, score in stored:
+        want = expected.get(pg_id, (None, None))
+        if (rank, score) != want:
+            drift.append((pg_id, (rank, score), want))
+    return drift
+
+
+def _all_profiles():
+    from flask import current_app
+    rows = db.session.query(ProfileGame.profile_id).distinct()
+    return sorted(set(current_app.config["PROFILES"]) | {p for (p,) in rows})
+
+
+@click.command("rebuild-rankings")
+@click.option("--profile", default=None, help="Only this profile (default: all).")
+@click.option("--check", is_flag=True, help="Report drift without writing; exit 1 if any.")
+@with_appcontext
+def rebuild_rankings_command(profile, check):
+    """Recompute the stored play-next ranking, or verify it with --check."""
+    profiles = [profile] if profile else _all_profiles()
+
+    if check:
+        total = 0
+        for p in profiles:
+            drift = check_play_next(p)
+            total += len(drift)
+            for pg_id, stored, want in drift:
+                click.echo(f"  {p}: profile_game {pg_id} stored rank/score={stored} expected={want}")
+            click.echo(f"{p}: {'OK' if not drift else f'{len(drift)} row(s) out of date'}")
+        if total:
+            sys.exit(1)
+        return
+
+    for p in profiles:
+        changed = refresh_play_next(p)
+        db.session.commit()
+        click.echo(f"{p}: {changed} row(s) updated.")
+    click.echo("Done.")
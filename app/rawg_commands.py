@@ -0,0 +1,222 @@
+"""
+flask rawg-cache stats — show RAWG search cache size and hit/miss counters
+flask rawg-cache purge — empty the cache (or just its expired entries)
+flask rawg-refresh     — re-fetch RAWG metadata for games that are missing it or stale
+"""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import Game
+from app.utils.rawg import extract_metadata
+from app.utils.rawg_cache import get_cache
+from app.versions import bump_for_games
+
+
+@click.group("rawg-cache")
+def rawg_cache_group():
+    """Inspect and purge the shared RAWG search cache."""
+
+
+def _cache_or_exit():
+    cache = get_cache()
+    if cache is None:
+        click.echo("RAWG cache is disabled (RAWG_CACHE_TTL=0).", err=True)
+        sys.exit(1)
+    return cache
+
+
+@rawg_cache_group.command("stats")
+@with_appcontext
+def cache_stats_command():
+    """Show entry counts and hit/miss totals across all workers (each adds its counts every 30s)."""
+    cache = _cache_or_exit()
+    s = cache.stats()
+    lookups = s["memory_hits"] + s["disk_hits"] + s["misses"]
+    hit_rate = (s["memory_hits"] + s["disk_hits"]) / lookups * 100 if lookups else 0.0
+    click.echo(f"File:        {cache.path} ({s['file_bytes'] / 1024:.1f} KB)")
+    click.echo(f"Entries:     {s['entries']} live, {s['expired']} expired (TTL {cache.ttl}s)")
+    click.echo(f"Memory hits: {s['memory_hits']}")
+    click.echo(f"Disk hits:   {s['disk_hits']}")
+    click.echo(f"Misses:      {s['misses']}")
+    click.echo(f"Hit rate:    {hit_rate:.1f}% of {lookups} lookups")
+
+
+@rawg_cache_group.command("purge")
+@click.option("--expired", is_flag=True, help="Only remove expired entries.")
+@click.option("--reset-counters", is_flag=True, help="Also zero the hit/miss counters.")
+@with_appcontext
+def cache_purge_command(expired, reset_counters):
+    """Remove cached search results."""
+    cache = _cache_or_exit()
+    removed = cache.purge(expired_only=expired, reset_counters=reset_counters)
+    click.echo(f"Removed {removed} entr{'y' if removed == 1 else 'ies'}.")
+
+
+# ------------------------------------------------------------------ #
+# flask rawg-refresh                                                   #
+# ------------------------------------------------------------------ #
+
+REFRESH_FIELDS = ("cover_url", "release_year", "genres", "platforms")
+
+
+class RateLimiter:
+    """Token bucket shared by the worker threads: at most *rate* calls/second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        """Wait for the next slot; False, without waiting, if it comes after *deadline* (monotonic)."""
+        if not self.interval:
+            return deadline is None or time.monotonic() <= deadline
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            if deadline is not None and slot > deadline:
+                return False
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+        return True
+
+
+def _stale_games_query(since):
+    """Games with a rawg_id whose metadata is missing, never synced, or synced before *since*."""
+    stale = db.or_(
+        *(getattr(Game, f).is_(None) for f in REFRESH_FIELDS),
+        Game.rawg_synced_at.is_(None),
+        *([Game.rawg_synced_at < since] if since else []),
+    )
+    return Game.query.filter(Game.rawg_id.isnot(None), stale).order_by(Game.id)
+
+
+def _load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_checkpoint(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _fetch(rawg_id, limiter):
+    from app.utils.rawg import get_game
+    limiter.acquire()
+    try:
+        return rawg_id, get_game(rawg_id), None
+    except Exception as exc:
+        return rawg_id, None, exc
+
+
+@click.command("rawg-refresh")
+@click.option("--since", type=click.DateTime(), default=None,
+              help="Also refresh games last synced before this date (default: only missing/never-synced).")
+@click.option("--workers", default=4, show_default=True, help="Concurrent RAWG requests.")
+@click.option("--rate", default=4.0, show_default=True, help="Max RAWG requests per second.")
+@click.option("--batch-size", default=100, show_default=True, help="Games fetched and written per batch.")
+@click.option("--limit", default=0, help="Stop after this many games (0 = no limit).")
+@click.option("--dry-run", is_flag=True, help="List what would be refreshed without calling RAWG or writing.")
+@click.option("--restart", is_flag=True, help="Ignore any saved checkpoint and start from the beginning.")
+@with_appcontext
+def rawg_refresh_command(since, workers, rate, batch_size, limit, dry_run, restart):
+    """Fetch fresh RAWG metadata for games that are missing it or stale."""
+    query = _stale_games_query(since)
+
+    if dry_run:
+        total = query.count()
+        click.echo(f"{total} game(s) would be refreshed.")
+        for game in query.limit(20):
+            missing = [f for f in REFRESH_FIELDS if getattr(game, f) is None]
+            click.echo(f"  #{game.id} {game.name!r} rawg_id={game.rawg_id} "
+                       f"synced={game.rawg_synced_at or 'never'} missing={','.join(missing) or '-'}")
+        if total > 20:
+            click.echo(f"  ... and {total - 20} more")
+        return
+
+    if not os.environ.get("RAWG_API_KEY"):
+        click.echo("ERROR: RAWG_API_KEY is not set.", err=True)
+        sys.exit(1)
+
+    os.makedirs(current_app.instance_path, exist_ok=True)
+    checkpoint_path = os.path.join(current_app.instance_path, "rawg_refresh.checkpoint.json")
+    run_args = {"since": since.isoformat() if since else None}
+    checkpoint = None if restart else _load_checkpoint(checkpoint_path)
+    if checkpoint and checkpoint.get("args") != run_args:
+        click.echo("Saved checkpoint was for different options — starting over.")
+        checkpoint = None
+    last_id = checkpoint["last_id"] if checkpoint else 0
+    if last_id:
+        click.echo(f"Resuming after game #{last_id} (use --restart to start over).")
+
+    limiter = RateLimiter(rate)
+    started = time.monotonic()
+    updated = failed = seen = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            size = batch_size if not limit else min(batch_size, limit - seen)
+            if size <= 0:
+                break
+            batch = (
+                query.filter(Game.id > last_id)
+                .with_entities(Game.id, Game.rawg_id, *(getattr(Game, f) for f in REFRESH_FIELDS))
+                .limit(size)
+                .all()
+            )
+            if not batch:
+                break
+
+            by_rawg = {row.rawg_id: row for row in batch}
+            now = datetime.utcnow()
+            rows = []
+            for rawg_id, data, error in pool.map(lambda r: _fetch(r, limiter), list(by_rawg)):
+                game = by_rawg[rawg_id]
+                if error is not None:
+                    failed += 1
+                    click.echo(f"  #{game.id} rawg_id={rawg_id}: {error}", err=True)
+                    continue
+                meta = extract_metadata(data)
+                row = {"id": game.id, "rawg_synced_at": now}
+                for f in REFRESH_FIELDS:
+                    # Never blank out a value RAWG no longer returns
+                    row[f] = meta[f] if meta[f] is not None else getattr(game, f)
+                rows.append(row)
+
+            if rows:
+                db.session.execute(db.update(Game), rows)
+                # Bulk UPDATE by primary key skips the flush hooks — stamp the profiles that show these games
+                bump_for_games([row["id"] for row in rows])
+            db.session.commit()
+
+            updated += len(rows)
+            seen += len(batch)
+            last_id = batch[-1].id
+            _save_checkpoint(checkpoint_path, {"last_id": last_id, "args": run_args})
+            click.echo(f"  {seen} processed, {updated} updated, {failed} failed "
+                       f"({time.monotonic() - started:.0f}s)")
+
+    if not limit or seen < limit:
+        # Finished the whole set — the next run starts fresh
+        try:
+            os.remove(checkpoint_path)
+        except FileNotFoundError:
+            pass
+    click.echo(f"Done. {updated} updated, {failed} failed in {time.monotonic() - started:.1f}s.")
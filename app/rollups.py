@@ -0,0 +1,309 @@
+"""
+Play-time rollups.
+
+CheckIn.hours_played is stored per check-in; summing it over every check-in
+on each view doesn't scale with years of history. Running sums are kept
+instead:
+
+    ProfileGame.total_hours / checkin_count / last_checkin_at
+                      per-game summary, shown on the library cards
+    playtime_buckets  hours and check-in count per profile for each day,
+                      week (starting Monday) and month, by UTC date
+
+Routes that add a check-in call record_checkin(), routes that delete one call
+forget_checkin(), and routes that delete a ProfileGame call
+forget_profile_game() — all before committing, so the sums move in the same
+transaction as the check-ins. Reads (the stats page, the dashboard's "this
+week / this month", the playing index) only touch the summary rows.
+
+`flask rebuild-rollups` recomputes everything from the checkins table — the
+backfill for existing databases, and the fix if the sums ever drift.
+"""
+import sys
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.orm import contains_eager
+
+from app import db
+from app.models import CheckIn, Game, PlaytimeBucket, ProfileGame
+from app.versions import bump
+
+PERIODS = ("day", "week", "month")
+
+ZERO = Decimal("0.0")
+
+
+def period_start(period, day):
+    """First day of the *period* containing *day*."""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _hours(value):
+    return Decimal(str(value)) if value is not None else ZERO
+
+
+# ------------------------------------------------------------------ #
+# Incremental maintenance                                              #
+# ------------------------------------------------------------------ #
+
+def _add(table, key, hours, checkins):
+    """hours/checkins += delta on the row matching *key*, inserting it if missing."""
+    where = [table.c[col] == value for col, value in key.items()]
+    updated = db.session.execute(
+        table.update().where(*where).values(
+            hours=table.c.hours + hours,
+            checkins=table.c.checkins + checkins,
+        )
+    ).rowcount
+    if not updated:
+        db.session.execute(table.insert().values(**key, hours=hours, checkins=checkins))
+
+
+def _add_buckets(profile, day, hours, checkins):
+    table = PlaytimeBucket.__table__
+    for period in PERIODS:
+        key = {"profile_id": profile, "period": period, "period_start": period_start(period, day)}
+        _add(table, key, hours, checkins)
+
+
+def record_checkin(profile, checkin):
+    """Add a new (flushed) CheckIn to the rollups."""
+    # Read back what the column stored (DECIMAL(5,1) rounds), so sums match a rebuild
+    db.session.refresh(checkin, ["hours_played", "created_at"])
+    hours = _hours(checkin.hours_played)
+    pg = ProfileGame.__table__
+    db.session.execute(
+        pg.update().where(pg.c.id == checkin.profile_game_id).values(
+            total_hours=pg.c.total_hours + hours,
+            checkin_count=pg.c.checkin_count + 1,
+            last_checkin_at=db.case(
+                (pg.c.last_checkin_at > checkin.created_at, pg.c.last_checkin_at),
+                else_=checkin.created_at,
+            ),
+        )
+    )
+    _add_buckets(profile, checkin.created_at.date(), hours, 1)
+
+
+def forget_checkin(profile, checkin):
+    """Take one CheckIn back out of the rollups. Call before deleting it."""
+    hours = _hours(checkin.hours_played)
+    pg = ProfileGame.__table__
+    previous = (
+        db.select(db.func.max(CheckIn.created_at))
+        .where(CheckIn.profile_game_id == checkin.profile_game_id, CheckIn.id != checkin.id)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        pg.update().where(pg.c.id == checkin.profile_game_id).values(
+            total_hours=pg.c.total_hours - hours,
+            checkin_count=pg.c.checkin_count - 1,
+            last_checkin_at=previous,
+        )
+    )
+    _add_buckets(profile, checkin.created_at.date(), -hours, -1)
+    _drop_empty_buckets(profile)
+
+
+def _drop_empty_buckets(profile):
+    buckets = PlaytimeBucket.__table__
+    db.session.execute(buckets.delete().where(buckets.c.profile_id == profile, buckets.c.checkins <= 0))
+
+
+def forget_profile_game(pg):
+    """
+    Take a ProfileGame's check-ins back out of the rollups. Call before
+    deleting it — the check-ins themselves go with the FK cascade.
+    """
+    per_day = defaultdict(lambda: [ZERO, 0])
+    rows = db.session.execute(
+        db.select(CheckIn.created_at, CheckIn.hours_played).where(CheckIn.profile_game_id == pg.id)
+    )
+    for created_at, hours in rows:
+        bucket = per_day[created_at.date()]
+        bucket[0] += _hours(hours)
+        bucket[1] += 1
+
+    for day, (hours, checkins) in per_day.items():
+        _add_buckets(pg.profile_id, day, -hours, -checkins)
+    _drop_empty_buckets(pg.profile_id)
+
+
+# ------------------------------------------------------------------ #
+# Reads                                                                #
+# ------------------------------------------------------------------ #
+
+def current_totals(profile, today=None):
+    """{"day", "week", "month"} → hours for the periods containing *today* — at most three rows."""
+    today = today or datetime.utcnow().date()
+    b = PlaytimeBucket
+    rows = b.query.filter(
+        b.profile_id == profile,
+        db.or_(*[
+            db.and_(b.period == period, b.period_start == period_start(period, today))
+            for period in PERIODS
+        ]),
+    )
+    totals = {period: 0.0 for period in PERIODS}
+    for row in rows:
+        totals[row.period] = float(row.hours)
+    return totals
+
+
+def _step_back(period, start, n):
+    if period == "day":
+        return start - timedelta(days=n)
+    if period == "week":
+        return start - timedelta(weeks=n)
+    month = start.year * 12 + start.month - 1 - n
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def recent_buckets(profile, period, count, today=None):
+    """The last *count* buckets of *period* up to today, oldest first, zero-filled."""
+    today = today or datetime.utcnow().date()
+    last = period_start(period, today)
+    first = _step_back(period, last, count - 1)
+    stored = {
+        row.period_start: row
+        for row in PlaytimeBucket.query.filter(
+            PlaytimeBucket.profile_id == profile,
+            PlaytimeBucket.period == period,
+            PlaytimeBucket.period_start >= first,
+            PlaytimeBucket.period_start <= last,
+        )
+    }
+    buckets = []
+    for i in range(count - 1, -1, -1):
+        start = _step_back(period, last, i)
+        row = stored.get(start)
+        buckets.append(row.to_dict() if row else
+                       {"period": period, "start": start.isoformat(), "hours": 0.0, "checkins": 0})
+    return buckets
+
+
+def most_played(profile, limit=10):
+    """The ProfileGames with the most logged hours."""
+    return (
+        ProfileGame.query
+        .join(ProfileGame.game)
+        .options(contains_eager(ProfileGame.game))
+        .filter(ProfileGame.profile_id == profile, ProfileGame.total_hours > 0)
+        .order_by(ProfileGame.total_hours.desc(), Game.name)
+        .limit(limit)
+        .all()
+    )
+
+
+# ------------------------------------------------------------------ #
+# Rebuild                                                              #
+# ------------------------------------------------------------------ #
+
+def compute_rollups(profile):
+    """Rollups for *profile* straight from the checkins table: (totals, buckets) dicts."""
+    totals = defaultdict(lambda: [ZERO, 0, None])   # profile_game_id -> [hours, checkins, last]
+    buckets = defaultdict(lambda: [ZERO, 0])   # (period, period_start) -> [hours, checkins]
+    rows = db.session.execute(
+        db.select(CheckIn.profile_game_id, CheckIn.created_at, CheckIn.hours_played)
+        .join(ProfileGame, ProfileGame.id == CheckIn.profile_game_id)
+        .where(ProfileGame.profile_id == profile)
+        .execution_options(yield_per=5000)
+    )
+    for pg_id, created_at, hours in rows:
+        hours = _hours(hours)
+        total = totals[pg_id]
+        total[0] += hours
+        total[1] += 1
+        if total[2] is None or created_at > total[2]:
+            total[2] = created_at
+        for period in PERIODS:
+            bucket = buckets[(period, period_start(period, created_at.date()))]
+            bucket[0] += hours
+            bucket[1] += 1
+    return totals, buckets
+
+
+def stored_rollups(profile):
+    pg = ProfileGame
+    totals = {
+        pg_id: [hours, n, last]
+        for pg_id, hours, n, last in db.session.query(
+            pg.id, pg.total_hours, pg.checkin_count, pg.last_checkin_at
+        ).filter(
+            pg.profile_id == profile,
+            db.or_(pg.checkin_count != 0, pg.total_hours != 0, pg.last_checkin_at.isnot(None)),
+        )
+    }
+    buckets = {
+        (r.period, r.period_start): [r.hours, r.checkins]
+        for r in PlaytimeBucket.query.filter_by(profile_id=profile)
+    }
+    return totals, buckets
+
+
+def rebuild_rollups(profile):
+    """Replace *profile*'s rollup rows with freshly computed ones (caller commits)."""
+    totals, buckets = compute_rollups(profile)
+    pg, b = ProfileGame.__table__, PlaytimeBucket.__table__
+    # A rebuild isn't a user edit — leave updated_at alone
+    db.session.execute(
+        pg.update().where(pg.c.profile_id == profile).values(
+            total_hours=0, checkin_count=0, last_checkin_at=None, updated_at=pg.c.updated_at,
+        )
+    )
+    if totals:
+        db.session.execute(
+            pg.update().where(pg.c.id == db.bindparam("b_id")).values(
+                total_hours=db.bindparam("b_hours"),
+                checkin_count=db.bindparam("b_count"),
+                last_checkin_at=db.bindparam("b_last"),
+                updated_at=pg.c.updated_at,
+            ),
+            [{"b_id": pg_id, "b_hours": h, "b_count": n, "b_last": last} for pg_id, (h, n, last) in totals.items()],
+        )
+    db.session.execute(b.delete().where(b.c.profile_id == profile))
+    if buckets:
+        db.session.execute(b.insert(), [
+            {"profile_id": profile, "period": period, "period_start": start, "hours": h, "checkins": n}
+            for (period, start), (h, n) in buckets.items()
+        ])
+    bump(profile)
+    return len(totals), len(buckets)
+
+
+@click.command("rebuild-rollups")
+@click.option("--profile", default=None, help="Only this profile (default: all).")
+@click.option("--check", is_flag=True, help="Report drift without writing; exit 1 if any.")
+@with_appcontext
+def rebuild_rollups_command(profile, check):
+    """Recompute play-time buckets and per-game check-in summaries from the checkins table."""
+    from app.ranking import _all_profiles
+
+    profiles = [profile] if profile else _all_profiles()
+    drifted = 0
+    for p in profiles:
+        if check:
+            expected, stored = compute_rollups(p), stored_rollups(p)
+            games, buckets = (
+                sum(e.get(k) != s.get(k) for k in set(e) | set(s)) for e, s in zip(expected, stored)
+            )
+            if games or buckets:
+                drifted += 1
+                click.echo(f"{p}: {games} game summary(ies) and {buckets} bucket(s) differ from check-ins")
+            else:
+                click.echo(f"{p}: ok")
+            continue
+        n_totals, n_buckets = rebuild_rollups(p)
+        db.session.commit()
+        click.echo(f"{p}: {n_totals} game total(s), {n_buckets} bucket(s)")
+
+    if drifted:
+        sys.exit(1)
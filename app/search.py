@@ -0,0 +1,425 @@
+"""
+Per-profile full-text search over game names, library notes and check-in notes.
+
+On MySQL the three sources are FULLTEXT-indexed (see
+migration_fulltext_search.sql) and each is queried with MATCH ... AGAINST in
+boolean mode — every term required, each matched as a word prefix so
+"dragon" finds "dragons" and results appear while typing. Other databases
+(SQLite in development and tests) use an in-process inverted index per
+profile, built on first search and brought up to date when the profile's
+version stamp (app.versions) moves: game rows are re-read and diffed, and
+only new or deleted check-ins are touched, so a check-in doesn't rebuild the
+index.
+
+Both backends match the same hits: terms shorter than MySQL's
+innodb_ft_min_token_size (3) are dropped before either runs, and each source
+contributes at most its top `limit` rows. Scores differ (InnoDB's relevance
+vs tf-idf here), so the order of similarly relevant hits can too. Results are
+ranked by relevance (game-name matches weigh more than note matches), a page
+at a time, with a highlighted snippet of the matching text.
+"""
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+
+from markupsafe import Markup, escape
+
+from app import db
+from app.models import CheckIn, Game, ProfileGame
+
+PER_PAGE = 20
+MAX_PAGE = 50
+SNIPPET_WIDTH = 160
+
+# Relevance multiplier per source: a title hit beats a passing mention in a note
+WEIGHTS = {"game": 3.0, "notes": 1.0, "checkin": 1.0}
+
+# InnoDB's default innodb_ft_min_token_size; shorter terms are never indexed
+MYSQL_MIN_TOKEN = 3
+
+
+@dataclass
+class Hit:
+    kind: str          # "game", "notes" or "checkin"
+    pg_id: int
+    game: str
+    section: str
+    status: str
+    text: str
+    score: float
+    checkin_id: int = None
+    created_at: object = None
+    snippet: Markup = None
+
+    def to_dict(self):
+        return {
+            "kind":       self.kind,
+            "pg_id":      self.pg_id,
+            "game":       self.game,
+            "section":    self.section,
+            "status":     self.status,
+            "checkin_id": self.checkin_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "score":      round(self.score, 4),
+            "snippet":    str(self.snippet),
+        }
+
+
+def tokenize(text):
+    """Lower-cased, accent-free word tokens."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r"\w+", text.casefold())
+
+
+def searchable_terms(terms):
+    """The terms FULLTEXT can match; both backends search only these."""
+    return [t for t in terms if len(t) >= MYSQL_MIN_TOKEN]
+
+
+# ------------------------------------------------------------------ #
+# Snippets                                                             #
+# ------------------------------------------------------------------ #
+
+def _term_pattern(terms):
+    # Every term matches as a word prefix, like the search itself
+    alternatives = sorted({re.escape(t) for t in terms}, key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\w*", re.IGNORECASE)
+
+
+def highlight(text, terms, width=SNIPPET_WIDTH):
+    """
+    Up to *width* characters of *text* around the first match, HTML-escaped,
+    with every matching word wrapped in <mark>.
+    """
+    text = " ".join((text or "").split())
+    pattern = _term_pattern(terms) if terms else None
+    first = pattern.search(text) if pattern else None
+    start = 0
+    if first and len(text) > width:
+        start = max(0, min(first.start() - width // 3, len(text) - width))
+        # Don't cut a word in half
+        if start:
+            space = text.find(" ", start)
+            start = space + 1 if 0 <= space < first.start() else start
+    window = text[start:start + width]
+
+    parts, pos = [], 0
+    for m in (pattern.finditer(window) if pattern else ()):
+        parts.append(escape(window[pos:m.start()]))
+        parts.append(Markup("<mark>") + escape(m.group()) + Markup("</mark>"))
+        pos = m.end()
+    parts.append(escape(window[pos:]))
+    snippet = Markup("").join(parts)
+    if start:
+        snippet = Markup("…") + snippet
+    if start + width < len(text):
+        snippet += Markup("…")
+    return snippet
+
+
+# ------------------------------------------------------------------ #
+# MySQL FULLTEXT                                                       #
+# ------------------------------------------------------------------ #
+
+def _boolean_query(terms):
+    """'+dark* +soul*' — every term required, each matched as a word prefix."""
+    terms = searchable_terms(terms)
+    if not terms:
+        return None
+    return " ".join(f"+{t}*" for t in terms)
+
+
+def _mysql_sources(profile, against):
+    from sqlalchemy.dialects.mysql import match
+
+    pg = ProfileGame
+    name_score = match(Game.name, against=against).in_boolean_mode()
+    notes_score = match(pg.notes, against=against).in_boolean_mode()
+    note_score = match(CheckIn.note, against=against).in_boolean_mode()
+    base = (pg.id, Game.name, pg.section, pg.status)
+    return {
+        "game": db.select(*base, Game.name, name_score, db.null(), db.null())
+        .join(Game, Game.id == pg.game_id)
+        .where(pg.profile_id == profile, name_score)
+        .order_by(name_score.desc(), pg.id),
+        "notes": db.select(*base, pg.notes, notes_score, db.null(), pg.updated_at)
+        .join(Game, Game.id == pg.game_id)
+        .where(pg.profile_id == profile, notes_score)
+        .order_by(notes_score.desc(), pg.id),
+        "checkin": db.select(*base, CheckIn.note, note_score, CheckIn.id, CheckIn.created_at)
+        .join(pg, pg.id == CheckIn.profile_game_id)
+        .join(Game, Game.id == pg.game_id)
+        .where(pg.profile_id == profile, note_score)
+        .order_by(note_score.desc(), CheckIn.id.desc()),
+    }
+
+
+def _search_mysql(profile, terms, limit):
+    """Top *limit* hits from each source, merged by weighted relevance."""
+    against = _boolean_query(terms)
+    if against is None:
+        return []
+    hits = []
+    for kind, stmt in _mysql_sources(profile, against).items():
+        for pg_id, game, section, status, text, score, checkin_id, created_at in db.session.execute(stmt.limit(limit)):
+            hits.append(Hit(kind, pg_id, game, section, status, text, float(score) * WEIGHTS[kind],
+                            checkin_id=checkin_id, created_at=created_at))
+    return hits
+
+
+# ------------------------------------------------------------------ #
+# In-process inverted index                                            #
+# ------------------------------------------------------------------ #
+
+class InvertedIndex:
+    """Token → {doc: term frequency} over one profile's searchable text."""
+
+    def __init__(self):
+        self.docs = []                     # doc id -> Hit template (score 0), None once removed
+        self.lengths = []                  # doc id -> token count
+        self.counts = []                   # doc id -> {token: tf}, to undo add()
+        self.postings = defaultdict(dict)  # token -> {doc id: tf}
+        self.vocabulary = []               # sorted tokens, for prefix lookups
+        self.live = 0
+        self._new_tokens = False
+
+    def add(self, hit):
+        """Index *hit*; returns its doc id, or None if it has no tokens."""
+        tokens = tokenize(hit.text)
+        if not tokens:
+            return None
+        doc = len(self.docs)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        self.docs.append(hit)
+        self.lengths.append(len(tokens))
+        self.counts.append(counts)
+        for token, tf in counts.items():
+            self._new_tokens |= token not in self.postings
+            self.postings[token][doc] = tf
+        self.live += 1
+        return doc
+
+    def remove(self, doc):
+        for token in self.counts[doc]:
+            postings = self.postings[token]
+            del postings[doc]
+            if not postings:
+                del self.postings[token]
+        self.docs[doc], self.counts[doc] = None, {}
+        self.live -= 1
+
+    def freeze(self):
+        # Removed tokens may linger in the vocabulary; _expand skips them
+        if self._new_tokens:
+            self.vocabulary = sorted(self.postings)
+            self._new_tokens = False
+        return self
+
+    def _expand(self, term):
+        """Every indexed token starting with *term*."""
+        i = bisect_left(self.vocabulary, term)
+        tokens = []
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+            if self.vocabulary[i] in self.postings:
+                tokens.append(self.vocabulary[i])
+            i += 1
+        return tokens
+
+    def search(self, terms):
+        """Docs containing every term (as a word prefix), scored by tf-idf."""
+        n_docs = self.live or 1
+        scores = None
+        for term in terms:
+            term_scores = defaultdict(float)
+            for token in self._expand(term):
+                postings = self.postings[token]
+                idf = math.log(1 + n_docs / len(postings))
+                for doc, tf in postings.items():
+                    term_scores[doc] += (1 + math.log(tf)) * idf / math.sqrt(self.lengths[doc])
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc: s + term_scores[doc] for doc, s in scores.items() if doc in term_scores}
+            if not scores:
+                return []
+        hits = []
+        for doc, score in (scores or {}).items():
+            template = self.docs[doc]
+            hits.append(Hit(**{**template.__dict__, "score": score * WEIGHTS[template.kind]}))
+        return hits
+
+
+class ProfileIndex:
+    """
+    One profile's InvertedIndex plus what it was built from, so refresh()
+    can apply just the differences: every ProfileGame row is re-read and
+    compared (one row per game), check-ins newer than the last one seen are
+    added, and deleted check-ins are found from a count + id sum of the old
+    range before their ids are fetched.
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.index = InvertedIndex()
+        self.lock = threading.Lock()
+        self.games = {}          # pg id -> (name, section, status, notes, updated_at)
+        self.game_docs = {}      # pg id -> [doc ids of its name and notes]
+        self.checkins = {}       # check-in id -> (pg id, doc id)
+        self.checkins_of = defaultdict(set)   # pg id -> check-in ids
+        self.max_checkin_id = 0
+
+    def _add_game(self, pg_id, state):
+        name, section, status, notes, updated_at = state
+        docs = [self.index.add(Hit("game", pg_id, name, section, status, name, 0.0))]
+        if notes:
+            docs.append(self.index.add(Hit("notes", pg_id, name, section, status, notes, 0.0, created_at=updated_at)))
+        self.games[pg_id] = state
+        self.game_docs[pg_id] = [d for d in docs if d is not None]
+        # Check-in hits show their game's name, section and status
+        for checkin_id in self.checkins_of.get(pg_id, ()):
+            hit = self.index.docs[self.checkins[checkin_id][1]]
+            hit.game, hit.section, hit.status = name, section, status
+
+    def _drop_game_docs(self, pg_id):
+        for doc in self.game_docs.pop(pg_id, ()):
+            self.index.remove(doc)
+        self.games.pop(pg_id, None)
+
+    def _drop_checkin(self, checkin_id):
+        pg_id, doc = self.checkins.pop(checkin_id)
+        self.checkins_of[pg_id].discard(checkin_id)
+        self.index.remove(doc)
+
+    def _checkin_rows(self, *where):
+        pg = ProfileGame
+        return (
+            db.select(pg.id, Game.name, pg.section, pg.status, CheckIn.note, CheckIn.id, CheckIn.created_at)
+            .join(pg, pg.id == CheckIn.profile_game_id)
+            .join(Game, Game.id == pg.game_id)
+            .where(pg.profile_id == self.profile, CheckIn.note.isnot(None), CheckIn.note != "", *where)
+        )
+
+    def refresh(self):
+        """Bring the index up to date with the database. Returns self."""
+        pg = ProfileGame
+        seen = set()
+        rows = db.session.execute(
+            db.select(pg.id, Game.name, pg.section, pg.status, pg.notes, pg.updated_at)
+            .join(Game, Game.id == pg.game_id)
+            .where(pg.profile_id == self.profile)
+        )
+        for pg_id, *state in rows:
+            state = tuple(state)
+            seen.add(pg_id)
+            if self.games.get(pg_id) != state:
+                self._drop_game_docs(pg_id)
+                self._add_game(pg_id, state)
+        for pg_id in set(self.games) - seen:
+            self._drop_game_docs(pg_id)
+            for checkin_id in list(self.checkins_of.pop(pg_id, ())):
+                self._drop_checkin(checkin_id)
+
+        if self.checkins:
+            old = CheckIn.id <= self.max_checkin_id
+            count, total = db.session.execute(
+                self._checkin_rows(old).with_only_columns(db.func.count(CheckIn.id), db.func.sum(CheckIn.id))
+            ).one()
+            if (count, total or 0) != (len(self.checkins), sum(self.checkins)):
+                kept = set(db.session.execute(self._checkin_rows(old).with_only_columns(CheckIn.id)).scalars())
+                for checkin_id in set(self.checkins) - kept:
+                    self._drop_checkin(checkin_id)
+
+        rows = db.session.execute(
+            self._checkin_rows(CheckIn.id > self.max_checkin_id).execution_options(yield_per=5000)
+        )
+        for pg_id, name, section, status, note, checkin_id, created_at in rows:
+            doc = self.index.add(Hit("checkin", pg_id, name, section, status, note, 0.0,
+                                     checkin_id=checkin_id, created_at=created_at))
+            if doc is not None:
+                self.checkins[checkin_id] = (pg_id, doc)
+                self.checkins_of[pg_id].add(checkin_id)
+            self.max_checkin_id = max(self.max_checkin_id, checkin_id)
+        self.index.freeze()
+        return self
+
+
+def build_index(profile):
+    """A new, fully built InvertedIndex of *profile*'s game names, notes and check-in notes."""
+    return ProfileIndex(profile).refresh().index
+
+
+_indexes = {}   # profile -> (version stamp, ProfileIndex)
+_indexes_lock = threading.Lock()
+
+
+def profile_index(profile):
+    """The profile's ProfileIndex, refreshed if the profile's version moved since it was last read."""
+    from app.versions import get_version
+    signature = get_version(profile)
+    with _indexes_lock:
+        cached = _indexes.get(profile)
+        if cached is None:
+            cached = _indexes[profile] = (None, ProfileIndex(profile))
+    stamp, index = cached
+    if stamp != signature:
+        with index.lock:
+            if _indexes[profile][0] != signature:
+                index.refresh()
+                _indexes[profile] = (signature, index)
+    return index
+
+
+def _top_per_source(hits, limit):
+    """Each source's best *limit* hits, in the order _mysql_sources() sorts them."""
+    by_kind = defaultdict(list)
+    for hit in hits:
+        by_kind[hit.kind].append(hit)
+    kept = []
+    for kind, group in by_kind.items():
+        if kind == "checkin":
+            group.sort(key=lambda h: (-h.score, -h.checkin_id))
+        else:
+            group.sort(key=lambda h: (-h.score, h.pg_id))
+        kept += group[:limit]
+    return kept
+
+
+def _search_memory(profile, terms, limit):
+    index = profile_index(profile)
+    with index.lock:
+        hits = index.index.search(terms)
+    return _top_per_source(hits, limit)
+
+
+# ------------------------------------------------------------------ #
+# Entry point                                                          #
+# ------------------------------------------------------------------ #
+
+def search(profile, query, page=1, per_page=PER_PAGE):
+    """
+    Search *profile*'s library. Returns (hits, has_next) for *page*
+    (1-based), best match first, each hit carrying a highlighted snippet.
+    """
+    terms = searchable_terms(tokenize(query))
+    page = min(max(page, 1), MAX_PAGE)
+    if not terms:
+        return [], False
+    offset = (page - 1) * per_page
+    # Each source's top (offset + per_page + 1) is enough to rank this page and see if there's another
+    limit = offset + per_page + 1
+    if db.engine.dialect.name == "mysql":
+        hits = _search_mysql(profile, terms, limit)
+    else:
+        hits = _search_memory(profile, terms, limit)
+    hits.sort(key=lambda h: (-h.score, h.game.casefold(), -(h.checkin_id or 0)))
+    page_hits = hits[offset:offset + per_page]
+    for hit in page_hits:
+        hit.snippet = highlight(hit.text, terms)
+    return page_hits, len(hits) > offset + per_page
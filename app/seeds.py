@@ -1,8 +1,32 @@
-import os
+"""
+flask seed — wipe the database and seed categories, optionally with a
+synthetic library for load testing:
+
+    flask seed                                            # categories only
+    flask seed --games 50000 --checkins-per-game 40 --profiles 5
+
+Synthetic rows are generated as a stream (deterministic for a given --seed)
+and written with Core executemany in large batches, parents before children,
+so memory stays flat however big the library is. Foreign-key checks and
+per-statement durability are relaxed for the duration of the load (see
+bulk_load_connection) and derived data — check-in summaries, rollups, stored
+ranking, counters — is rebuilt once at the end.
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
 import click
+from flask import current_app
 from flask.cli import with_appcontext
+
 from app import db
-from app.models import Category, Game, ProfileGame
+from app.models import (
+    STATUSES, Category, CheckIn, Game, MoodPreferences, PlaytimeBucket, ProfileGame, ProfileStats,
+    ProfileVersion, profile_game_categories,
+)
+from app.versions import _bump
 
 
 # RAWG genre categories in default rank order (user can reorder via the UI)
@@ -28,28 +52,290 @@ CATEGORIES = [
     "Educational",
 ]
 
+# Rows per executemany; transactions are committed every COMMIT_EVERY batches
+BATCH_SIZE = 10000
+COMMIT_EVERY = 20
+
+# Game "archetypes": mean mood ratings (chill, intense, story, action, exploration)
+ARCHETYPES = {
+    "cozy":        (4.5, 0.5, 2.0, 0.5, 3.0),
+    "action":      (1.0, 4.0, 1.5, 4.5, 2.0),
+    "story":       (3.0, 1.5, 4.5, 1.5, 3.0),
+    "open_world":  (2.5, 2.5, 3.5, 3.0, 4.5),
+    "competitive": (0.5, 4.5, 0.5, 4.0, 1.0),
+    "puzzle":      (3.5, 2.0, 1.5, 0.5, 2.0),
+}
+MOODS = ("mood_chill", "mood_intense", "mood_story", "mood_action", "mood_exploration")
+
+# Weighted choices, roughly what a real library looks like
+HYPE       = ((None, 15), (1, 5), (2, 15), (3, 30), (4, 25), (5, 10))
+LENGTHS    = ((None, 10), ("Short", 25), ("Medium", 35), ("Long", 20), ("Very Long", 10))
+SECTIONS   = (("active", 35), ("backlog", 65))
+STATUS_W   = tuple(zip(STATUSES, (20, 25, 15, 40)))   # Playing, On Hold, Dropped, Completed
+CATS_PER_GAME = ((0, 15), (1, 45), (2, 30), (3, 10))
+
+WORDS = ("boss", "castle", "dragon", "grind", "quest", "story", "combat", "puzzle", "ending",
+         "dungeon", "build", "map", "side", "loot", "level", "co-op", "soundtrack", "chapter")
+TITLE_WORDS = ("Hollow", "Star", "Iron", "Shadow", "Crystal", "Last", "Wild", "Neon", "Ancient",
+               "Silent", "Broken", "Eternal", "Crimson", "Sky", "Deep", "Lost", "Solar", "Frozen")
+TITLE_NOUNS = ("Knight", "Frontier", "Legacy", "Odyssey", "Tactics", "Garden", "Protocol",
+               "Kingdom", "Drift", "Saga", "Harbor", "Machine", "Requiem", "Valley", "Circuit")
+
+
+# ------------------------------------------------------------------ #
+# Loading                                                              #
+# ------------------------------------------------------------------ #
+
+@contextmanager
+def bulk_load_connection():
+    """
+    A dedicated connection with integrity checks and per-statement
+    durability relaxed, for bulk loads. Rows are generated with consistent
+    explicit ids, so nothing is lost by not checking them one at a time.
+
+    One connection for the whole load: these are session variables, and the
+    ORM session may hand back a different pooled connection after a commit.
+    """
+    with db.engine.connect() as conn:
+        dialect = conn.dialect.name
+        if dialect == "mysql":
+            conn.execute(db.text("SET FOREIGN_KEY_CHECKS=0"))
+            conn.execute(db.text("SET UNIQUE_CHECKS=0"))
+            conn.execute(db.text("SET autocommit=0"))
+        elif dialect == "sqlite":
+            previous = {
+                pragma: conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+                for pragma in ("foreign_keys", "synchronous")
+            }
+            conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.rollback()
+            if dialect == "mysql":
+                conn.execute(db.text("SET UNIQUE_CHECKS=1"))
+                conn.execute(db.text("SET FOREIGN_KEY_CHECKS=1"))
+            elif dialect == "sqlite":
+                for pragma, value in previous.items():
+                    conn.exec_driver_sql(f"PRAGMA {pragma}={int(value)}")
+
+
+class BatchWriter:
+    """
+    Buffers rows per table and writes them with executemany. Whenever any
+    buffer fills, every buffer is written in the order the tables were
+    registered, so children never land before their parents.
+    """
+
+    def __init__(self, conn, tables, batch_size=BATCH_SIZE, commit_every=COMMIT_EVERY):
+        self.conn = conn
+        self.tables = tables
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.buffers = {table.name: [] for table in tables}
+        self.counts = {table.name: 0 for table in tables}
+        self._batches = 0
+
+    def add(self, table, row):
+        buffer = self.buffers[table.name]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self, commit=False):
+        for table in self.tables:
+            rows = self.buffers[table.name]
+            if rows:
+                self.conn.execute(table.insert(), rows)
+                self.counts[table.name] += len(rows)
+                self.buffers[table.name] = []
+                self._batches += 1
+        if commit or self._batches >= self.commit_every:
+            self.conn.commit()
+            self._batches = 0
+
+
+def _pick(rnd, weighted):
+    values, weights = zip(*weighted)
+    return rnd.choices(values, weights)[0]
+
+
+def _rating(rnd, mean):
+    return min(5, max(0, round(rnd.gauss(mean, 1.0))))
+
+
+def _note(rnd, words=8):
+    return " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(3, words))).capitalize() + "."
+
+
+def category_names(n):
+    return (CATEGORIES + [f"Category {i}" for i in range(len(CATEGORIES) + 1, n + 1)])[:n]
+
+
+def generate_library(conn, profiles, games, checkins_per_game, categories=len(CATEGORIES), seed=1,
+                     today=None, batch_size=BATCH_SIZE, progress=None):
+    """
+    Stream a synthetic library into an empty database over *conn* (see
+    bulk_load_connection) and return row counts per table. Every profile
+    tracks all *games*; its active games get about *checkins_per_game*
+    check-ins each (between half and one and a half times that), spread over
+    the past year. Same arguments, same rows.
+    """
+    rnd = random.Random(seed)
+    uniform = rnd.random
+    today = today or date.today()
+    now = datetime.combine(today, datetime.min.time()) + timedelta(hours=20)
+    # Check-ins are most of the rows: draw them from precomputed pools with
+    # plain random() calls rather than randint()/choice() per field
+    notes = [_note(rnd) for _ in range(512)]
+    minutes_in_year = 365 * 24 * 60
+    games_t, cats_t, prefs_t = Game.__table__, Category.__table__, MoodPreferences.__table__
+    pgs_t, checkins_t = ProfileGame.__table__, CheckIn.__table__
+    writer = BatchWriter(
+        conn, [games_t, prefs_t, cats_t, pgs_t, profile_game_categories, checkins_t], batch_size=batch_size,
+    )
+
+    archetypes = []
+    for game_id in range(1, games + 1):
+        archetypes.append(rnd.choice(list(ARCHETYPES)))
+        writer.add(games_t, {
+            "id": game_id,
+            "name": f"{rnd.choice(TITLE_WORDS)} {rnd.choice(TITLE_NOUNS)} {game_id}",
+            "rawg_id": 100000 + game_id,
+            "cover_url": f"https://media.example.com/games/{game_id}.jpg",
+            "release_year": rnd.randint(1995, today.year),
+            "genres": archetypes[-1].replace("_", " ").title(),
+            "platforms": "PC",
+            "created_at": now - timedelta(days=rnd.randint(0, 900)),
+        })
+
+    pg_id = checkin_id = 0
+    for p, profile in enumerate(profiles):
+        writer.add(prefs_t, {"profile_id": profile, **{m: rnd.randint(0, 5) for m in MOODS}})
+        cat_ids = list(range(p * categories + 1, (p + 1) * categories + 1))
+        for rank, (cat_id, name) in enumerate(zip(cat_ids, category_names(categories)), start=1):
+            writer.add(cats_t, {"id": cat_id, "profile_id": profile, "name": name, "rank": rank})
+
+        ranks = {"active": 0, "backlog": 0}
+        for game_id, archetype in zip(range(1, games + 1), archetypes):
+            pg_id += 1
+            section = _pick(rnd, SECTIONS)
+            status = _pick(rnd, STATUS_W) if section == "active" else None
+            finished = status == "Completed"
+            added = now - timedelta(days=rnd.randint(30, 900))
+            ranks[section] += 1
+            surveyed = rnd.random() < 0.75   # a quarter of games never got the mood survey
+            writer.add(pgs_t, {
+                "id": pg_id, "profile_id": profile, "game_id": game_id,
+                "section": section, "status": status, "rank": ranks[section],
+                "hype": _pick(rnd, HYPE), "estimated_length": _pick(rnd, LENGTHS),
+                "series_continuity": rnd.random() < 0.15,
+                **{m: _rating(rnd, mean) if surveyed else None for m, mean in zip(MOODS, ARCHETYPES[archetype])},
+                "notes": _note(rnd, 30) if rnd.random() < 0.3 else None,
+                "finished": finished,
+                "overall_rating": rnd.randint(1, 5) if finished else None,
+                "would_play_again": rnd.choice(("Yes", "No", "Maybe")) if finished else None,
+                "hours_to_finish": rnd.randint(2, 120) if finished else None,
+                "difficulty": rnd.randint(1, 5) if finished else None,
+                "total_hours": 0, "checkin_count": 0,
+                "created_at": added, "updated_at": added,
+            })
+            for cat_id in rnd.sample(cat_ids, min(len(cat_ids), _pick(rnd, CATS_PER_GAME))):
+                writer.add(profile_game_categories, {"profile_game_id": pg_id, "category_id": cat_id})
+            if section == "active" and checkins_per_game:
+                half = checkins_per_game // 2
+                for _ in range(rnd.randint(checkins_per_game - half, checkins_per_game + half)):
+                    checkin_id += 1
+                    writer.add(checkins_t, {
+                        "id": checkin_id, "profile_game_id": pg_id,
+                        "motivation": 1 + int(uniform() * 5), "enjoyment": 1 + int(uniform() * 5),
+                        "note": notes[int(uniform() * 512)] if uniform() < 0.6 else None,
+                        "hours_played": round(max(0.1, rnd.gauss(1.8, 1.0)), 1) if uniform() < 0.9 else None,
+                        "status": status,
+                        "created_at": now - timedelta(minutes=int(uniform() * minutes_in_year)),
+                    })
+            if progress and pg_id % 10000 == 0:
+                progress(pg_id, checkin_id)
+
+    writer.flush(commit=True)
+    return writer.counts
+
+
+def _wipe(conn):
+    """
+    Empty every library table (children first) and bump every profile's
+    version, so nothing cached against the old data (ETags, the search
+    index) is served for the new.
+    """
+    _bump(conn, set(conn.execute(db.select(ProfileVersion.__table__.c.profile_id)).scalars()))
+    tables = [CheckIn.__table__, profile_game_categories, ProfileGame.__table__, Game.__table__,
+              Category.__table__, MoodPreferences.__table__, ProfileStats.__table__, PlaytimeBucket.__table__]
+    truncate = conn.dialect.name == "mysql"
+    for table in tables:
+        if truncate:   # instant on big tables; needs FOREIGN_KEY_CHECKS=0
+            conn.execute(db.text(f"TRUNCATE TABLE {table.name}"))
+        else:
+            conn.execute(table.delete())
+    conn.commit()
+
+
+def _profile_names(count):
+    """The configured PROFILES, padded with "Player N" up to *count*."""
+    configured = current_app.config["PROFILES"]
+    if count is None:
+        return configured
+    extra = [f"Player {i}" for i in range(1, count + len(configured) + 1) if f"Player {i}" not in configured]
+    return (configured + extra)[:count]
+
 
 @click.command("seed")
+@click.option("--games", default=0, show_default=True, help="Synthetic games to generate (0 = categories only).")
+@click.option("--checkins-per-game", default=0, show_default=True,
+              help="Average check-ins per active game in each profile.")
+@click.option("--profiles", type=int, default=None,
+              help="Profiles to fill (default: PROFILES; extras are named 'Player N').")
+@click.option("--categories", default=len(CATEGORIES), show_default=True, help="Categories per profile.")
+@click.option("--seed", "random_seed", default=1, show_default=True, help="Random seed for synthetic data.")
+@click.option("--batch-size", default=BATCH_SIZE, show_default=True, help="Rows per INSERT batch.")
 @with_appcontext
-def seed_command():
-    """Wipe and re-seed the database with the default category list for all profiles."""
-    profiles_env = os.environ.get("PROFILES", "Player 1")
-    profiles = [p.strip() for p in profiles_env.split(",") if p.strip()]
-
-    click.echo("Clearing existing data...")
-    db.session.execute(db.text("SET FOREIGN_KEY_CHECKS=0"))
-    db.session.execute(db.text("DELETE FROM checkins"))
-    db.session.execute(db.text("DELETE FROM profile_game_categories"))
-    db.session.execute(db.text("DELETE FROM profile_games"))
-    Game.query.delete()
-    Category.query.delete()
-    db.session.execute(db.text("SET FOREIGN_KEY_CHECKS=1"))
-    db.session.commit()
-
-    click.echo(f"Creating categories for {len(profiles)} profile(s): {profiles}...")
-    for profile in profiles:
-        for rank, name in enumerate(CATEGORIES, start=1):
-            db.session.add(Category(name=name, rank=rank, profile_id=profile))
-    db.session.commit()
-
-    click.echo(f"Done. {len(CATEGORIES)} categories seeded per profile.")
+def seed_command(games, checkins_per_game, profiles, categories, random_seed, batch_size):
+    """Wipe and re-seed the database: categories for every profile, plus an optional synthetic library."""
+    profiles = _profile_names(profiles)
+    started = time.perf_counter()
+
+    with bulk_load_connection() as conn:
+        click.echo("Clearing existing data...")
+        _wipe(conn)
+
+        if not games:
+            click.echo(f"Creating categories for {len(profiles)} profile(s): {profiles}...")
+            conn.execute(Category.__table__.insert(), [
+                {"profile_id": profile, "name": name, "rank": rank}
+                for profile in profiles
+                for rank, name in enumerate(category_names(categories), start=1)
+            ])
+            _bump(conn, set(profiles))
+            conn.commit()
+            click.echo(f"Done. {categories} categories seeded per profile.")
+            return
+
+        click.echo(f"Generating {games} games x {len(profiles)} profile(s) {profiles}, "
+                   f"~{checkins_per_game} check-ins per active game...")
+
+        def progress(pgs, checkins):
+            click.echo(f"  {pgs} library entries, {checkins} check-ins ({time.perf_counter() - started:.0f}s)")
+
+        counts = generate_library(conn, profiles, games, checkins_per_game, categories, seed=random_seed,
+                                  batch_size=batch_size, progress=progress)
+
+    loaded = time.perf_counter()
+    click.echo("Rebuilding summaries, rollups, rankings and counters...")
+    from app.incremental import rebuild_derived
+    rebuild_derived()
+
+    click.echo("Done in {:.1f}s (load {:.1f}s, derived {:.1f}s): {}".format(
+        time.perf_counter() - started, loaded - started, time.perf_counter() - loaded,
+        ", ".join(f"{n} {table}" for table, n in counts.items()),
+    ))
@@ -0,0 +1,53 @@
+"""
+Dashboard counters.
+
+library_counts() computes the four stat-card numbers (Playing, On Hold,
+Backlog, Completed) with a single GROUP BY section, status. The result is
+cached per profile in the profile_stats table: routes that change a game's
+section or status call refresh_counts(profile) before committing, and the
+dashboard reads the cached row with get_counts(profile).
+"""
+from app import db
+from app.models import ProfileGame, ProfileStats
+
+
+def library_counts(profile):
+    """Return {"playing", "on_hold", "backlog", "completed"} from one aggregate query."""
+    rows = (
+        db.session.query(ProfileGame.section, ProfileGame.status, db.func.count())
+        .filter(ProfileGame.profile_id == profile)
+        .group_by(ProfileGame.section, ProfileGame.status)
+    )
+    counts = {"playing": 0, "on_hold": 0, "backlog": 0, "completed": 0}
+    for section, status, n in rows:
+        if section == "backlog":
+            counts["backlog"] += n
+        elif status == "Playing":
+            counts["playing"] += n
+        elif status == "On Hold":
+            counts["on_hold"] += n
+        if status == "Completed":
+            counts["completed"] += n
+    return counts
+
+
+def refresh_counts(profile):
+    """Recompute the cached counters for *profile* inside the current transaction."""
+    counts = library_counts(profile)
+    stats = ProfileStats.query.filter_by(profile_id=profile).first()
+    if stats is None:
+        stats = ProfileStats(profile_id=profile)
+        db.session.add(stats)
+    for field, value in counts.items():
+        setattr(stats, field, value)
+    return counts
+
+
+def get_counts(profile):
+    """Return the cached counters for *profile*, building them on first use."""
+    stats = ProfileStats.query.filter_by(profile_id=profile).first()
+    if stats is None:
+        counts = refresh_counts(profile)
+        db.session.commit()
+        return counts
+    return stats.to_dict()
@@ -0,0 +1,353 @@
+"""
+flask export — stream one profile's library to an NDJSON file
+flask import — load such a file into a profile
+
+Unlike db-backup/db-restore this needs no MySQL client tools and works on a
+single profile, so it can move a library between instances or load a test
+fixture. Both sides stream: export reads each table with yield_per (a
+server-side cursor on MySQL) and import inserts in executemany batches, so
+memory stays flat however large the library is.
+
+One JSON object per line, in dependency order:
+    {"type": "header", "version": 1, "profile": "...", "exported_at": "..."}
+    {"type": "game", "row": {...}}
+    {"type": "category", "row": {...}}
+    {"type": "mood_preferences", "row": {...}}
+    {"type": "profile_game", "row": {...}}
+    {"type": "profile_game_category", "row": {"profile_game_id": ..., "category_id": ...}}
+    {"type": "checkin", "row": {...}}
+    {"type": "end", "counts": {...}}
+
+Ids in the file are the exporting instance's; import maps them to new ids
+and reuses an existing Game with the same rawg_id instead of duplicating it.
+Paths ending in .gz are gzip-compressed.
+"""
+import gzip
+import json
+import os
+import sys
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import Category, CheckIn, Game, MoodPreferences, ProfileGame, profile_game_categories
+from app.utils.serialize import row_from_json, row_to_json
+
+FORMAT_VERSION = 1
+BATCH_SIZE = 500
+
+# Recomputed for the target profile after import
+DERIVED_COLUMNS = ("play_next_rank", "play_next_score", "last_checkin_at", "total_hours", "checkin_count")
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+# ------------------------------------------------------------------ #
+# Export                                                               #
+# ------------------------------------------------------------------ #
+
+def export_queries(profile):
+    """(line type, Select) pairs, in the order import needs them."""
+    pg = ProfileGame.__table__
+    link = profile_game_categories
+    profile_pgs = db.select(pg.c.id).where(pg.c.profile_id == profile)
+    return [
+        ("game", db.select(Game.__table__).where(
+            Game.id.in_(db.select(pg.c.game_id).where(pg.c.profile_id == profile))
+        ).order_by(Game.id)),
+        ("category", db.select(Category.__table__).where(Category.profile_id == profile).order_by(Category.id)),
+        ("mood_preferences", db.select(MoodPreferences.__table__).where(MoodPreferences.profile_id == profile)),
+        ("profile_game", db.select(pg).where(pg.c.profile_id == profile).order_by(pg.c.id)),
+        ("profile_game_category", db.select(link).where(link.c.profile_game_id.in_(profile_pgs))),
+        ("checkin", db.select(CheckIn.__table__).where(
+            CheckIn.profile_game_id.in_(profile_pgs)
+        ).order_by(CheckIn.id)),
+    ]
+
+
+def export_profile(profile, out):
+    """Write *profile*'s library to the text stream *out*. Returns per-type counts."""
+    def emit(obj):
+        out.write(json.dumps(obj, separators=(",", ":")) + "\n")
+
+    emit({
+        "type":        "header",
+        "version":     FORMAT_VERSION,
+        "profile":     profile,
+        "exported_at": datetime.utcnow().isoformat(timespec="seconds"),
+    })
+    counts = {}
+    for kind, query in export_queries(profile):
+        n = 0
+        # Each result is drained before the next query starts — required for
+        # MySQL server-side cursors, which hold the connection while open.
+        for row in db.session.execute(query.execution_options(yield_per=1000)).mappings():
+            emit({"type": kind, "row": row_to_json(row)})
+            n += 1
+        counts[kind] = n
+    emit({"type": "end", "counts": counts})
+    return counts
+
+
+@click.command("export")
+@click.option("--profile", required=True, help="Profile to export.")
+@click.option(
+    "--output", "-o",
+    default=None,
+    help="File to write (default: instance/exports/<profile>_<timestamp>.ndjson.gz).",
+)
+@with_appcontext
+def export_command(profile, output):
+    """Export one profile's library as NDJSON."""
+    if output is None:
+        # Under the instance folder (git-ignored), not wherever the command ran
+        folder = os.path.join(current_app.instance_path, "exports")
+        os.makedirs(folder, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in profile)
+        output = os.path.join(folder, f"{safe}_{timestamp}.ndjson.gz")
+
+    click.echo(f"Exporting '{profile}' → {output} ...")
+    with _open(output, "w") as out:
+        counts = export_profile(profile, out)
+    summary = ", ".join(f"{n} {kind}" for kind, n in counts.items())
+    click.echo(f"Done. ({summary})")
+
+
+# ------------------------------------------------------------------ #
+# Import                                                               #
+# ------------------------------------------------------------------ #
+
+class ProfileImporter:
+    """
+    Loads export lines into *profile*. Rows are buffered per type and
+    written in executemany batches; old→new id maps are kept for games,
+    categories and profile games so later lines can be re-pointed.
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.game_ids = {}
+        self.category_ids = {}
+        self.pg_ids = {}
+        self.counts = {}
+        self.reused_games = 0
+        self._kind = None
+        self._rows = []
+        self._handlers = {
+            "game":                  self._flush_games,
+            "category":              self._flush_categories,
+            "mood_preferences":      self._flush_mood_preferences,
+            "profile_game":          self._flush_profile_games,
+            "profile_game_category": self._flush_links,
+            "checkin":               self._flush_checkins,
+        }
+
+    def add(self, kind, row):
+        if kind not in self._handlers:
+            raise ValueError(f"unknown line type {kind!r}")
+        if kind != self._kind or len(self._rows) >= BATCH_SIZE:
+            self.flush()
+            self._kind = kind
+        self._rows.append(row)
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def flush(self):
+        if self._rows:
+            self._handlers[self._kind](self._rows)
+        self._rows = []
+
+    # -------------------------------------------------------------- #
+
+    def _flush_games(self, rows):
+        table = Game.__table__
+        rows = [row_from_json(table, r) for r in rows]
+
+        by_rawg = {r["rawg_id"]: r for r in rows if r.get("rawg_id") is not None}
+        existing = dict(db.session.execute(
+            db.select(table.c.rawg_id, table.c.id).where(table.c.rawg_id.in_(list(by_rawg)))
+        ).all()) if by_rawg else {}
+        self.reused_games += len(existing)
+
+        new = [_without_id(r) for rawg_id, r in by_rawg.items() if rawg_id not in existing]
+        if new:
+            db.session.execute(table.insert(), new)
+            existing.update(db.session.execute(
+                db.select(table.c.rawg_id, table.c.id).where(
+                    table.c.rawg_id.in_([r["rawg_id"] for r in new])
+                )
+            ).all())
+
+        for r in rows:
+            if r.get("rawg_id") is not None:
+                self.game_ids[r["id"]] = existing[r["rawg_id"]]
+            else:
+                self.game_ids[r["id"]] = self._manual_game_id(r)
+
+    def _manual_game_id(self, row):
+        # Games added without RAWG have no stable key; match on name, else insert
+        table = Game.__table__
+        found = db.session.execute(
+            db.select(table.c.id).where(table.c.rawg_id.is_(None), table.c.name == row["name"]).limit(1)
+        ).scalar()
+        if found is not None:
+            self.reused_games += 1
+            return found
+        return db.session.execute(table.insert().values(_without_id(row))).inserted_primary_key[0]
+
+    def _flush_categories(self, rows):
+        table = Category.__table__
+        for r in rows:
+            r = row_from_json(table, r)
+            values = dict(_without_id(r), profile_id=self.profile)
+            self.category_ids[r["id"]] = db.session.execute(table.insert().values(values)).inserted_primary_key[0]
+
+    def _flush_mood_preferences(self, rows):
+        table = MoodPreferences.__table__
+        db.session.execute(table.delete().where(table.c.profile_id == self.profile))
+        db.session.execute(table.insert().values(dict(_without_id(row_from_json(table, rows[-1])), profile_id=self.profile)))
+
+    def _flush_profile_games(self, rows):
+        table = ProfileGame.__table__
+        old_by_game = {}
+        values = []
+        for r in rows:
+            r = row_from_json(table, r)
+            game_id = self.game_ids[r["game_id"]]
+            old_by_game[game_id] = r["id"]
+            v = dict(_without_id(r), profile_id=self.profile, game_id=game_id)
+            for col in DERIVED_COLUMNS:
+                v.pop(col, None)
+            values.append(v)
+        db.session.execute(table.insert(), values)
+        # (profile_id, game_id) is unique, so it identifies the rows just inserted
+        for new_id, game_id in db.session.execute(
+            db.select(table.c.id, table.c.game_id).where(
+                table.c.profile_id == self.profile, table.c.game_id.in_(list(old_by_game))
+            )
+        ):
+            self.pg_ids[old_by_game[game_id]] = new_id
+
+    def _flush_links(self, rows):
+        db.session.execute(profile_game_categories.insert(), [
+            {"profile_game_id": self.pg_ids[r["profile_game_id"]], "category_id": self.category_ids[r["category_id"]]}
+            for r in rows
+        ])
+
+    def _flush_checkins(self, rows):
+        table = CheckIn.__table__
+        values = []
+        for r in rows:
+            r = row_from_json(table, r)
+            values.append(dict(_without_id(r), profile_game_id=self.pg_ids[r["profile_game_id"]]))
+        db.session.execute(table.insert(), values)
+
+
+def _without_id(row):
+    return {k: v for k, v in row.items() if k != "id"}
+
+
+def profile_has_data(profile):
+    return db.session.execute(
+        db.select(db.literal(1)).where(db.or_(
+            db.exists().where(ProfileGame.profile_id == profile),
+            db.exists().where(Category.profile_id == profile),
+        ))
+    ).scalar() is not None
+
+
+def clear_profile(profile):
+    """Delete a profile's library (its Games stay — they're shared)."""
+    pg = ProfileGame.__table__
+    link = profile_game_categories
+    profile_pgs = db.select(pg.c.id).where(pg.c.profile_id == profile)
+    profile_cats = db.select(Category.id).where(Category.profile_id == profile)
+    db.session.execute(CheckIn.__table__.delete().where(CheckIn.profile_game_id.in_(profile_pgs)))
+    db.session.execute(link.delete().where(db.or_(
+        link.c.profile_game_id.in_(profile_pgs), link.c.category_id.in_(profile_cats)
+    )))
+    db.session.execute(pg.delete().where(pg.c.profile_id == profile))
+    db.session.execute(Category.__table__.delete().where(Category.profile_id == profile))
+    db.session.execute(MoodPreferences.__table__.delete().where(MoodPreferences.profile_id == profile))
+
+
+def import_profile(lines, profile=None, replace=False):
+    """
+    Load an export (an iterable of NDJSON lines) into *profile* — by default
+    the profile it was exported from. Runs in one transaction; returns the
+    ProfileImporter with its counts.
+    """
+    from app.ranking import refresh_play_next
+    from app.rollups import rebuild_rollups
+    from app.stats import refresh_counts
+
+    lines = iter(lines)
+    header = json.loads(next(lines, "null") or "null")
+    if not header or header.get("type") != "header":
+        raise ValueError("not a game-journal export (missing header line)")
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"unsupported export version {header.get('version')!r}")
+    profile = profile or header["profile"]
+
+    try:
+        if profile_has_data(profile):
+            if not replace:
+                raise ValueError(f"profile {profile!r} already has data (use --replace to overwrite it)")
+            clear_profile(profile)
+
+        importer = ProfileImporter(profile)
+        footer = None
+        for line in lines:
+            entry = json.loads(line)
+            if entry["type"] == "end":
+                footer = entry
+                break
+            importer.add(entry["type"], entry["row"])
+        importer.flush()
+
+        if footer is None:
+            raise ValueError("export is truncated (no end line)")
+        if {k: v for k, v in footer["counts"].items() if v} != importer.counts:
+            raise ValueError(f"row counts don't match the export: {footer['counts']} vs {importer.counts}")
+
+        refresh_play_next(profile)
+        refresh_counts(profile)
+        rebuild_rollups(profile)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return importer
+
+
+@click.command("import")
+@click.argument("filepath")
+@click.option("--profile", default=None, help="Import into this profile (default: the exported one).")
+@click.option("--replace", is_flag=True, help="Delete the profile's existing library first.")
+@with_appcontext
+def import_command(filepath, profile, replace):
+    """Import a profile's library from an NDJSON export."""
+    from flask import current_app
+
+    if not os.path.isfile(filepath):
+        click.echo(f"ERROR: File not found: {filepath}", err=True)
+        sys.exit(1)
+
+    try:
+        with _open(filepath, "r") as f:
+            importer = import_profile(f, profile=profile, replace=replace)
+    except (ValueError, KeyError) as e:
+        click.echo(f"ERROR: {e}", err=True)
+        sys.exit(1)
+
+    summary = ", ".join(f"{n} {kind}" for kind, n in importer.counts.items())
+    click.echo(f"Imported into '{importer.profile}': {summary} ({importer.reused_games} existing game(s) reused).")
+    if importer.profile not in current_app.config["PROFILES"]:
+        click.echo(f"Note: '{importer.profile}' is not in PROFILES, so it won't appear in the profile switcher.")
@@ -0,0 +1,254 @@
+"""
+Jinja fragment cache.
+
+    {% cache "game_card", pg_key(game), game.categories | map(attribute="name") | list %}
+      ...expensive markup...
+    {% endcache %}
+
+The body is rendered once per distinct key and reused until evicted. Keys
+are built from the data the fragment shows (ids, updated_at, the Game fields
+it prints) plus a hash of the template's source, so an edit to the row or a
+deploy that changes the template simply misses — nothing is ever invalidated
+by hand. updated_at only has whole seconds on MySQL, so pg_key also carries
+the profile's version stamp (app.versions), which moves on every write.
+
+Tier 1 is a bounded per-worker LRU. Tier 2 is optional and shared between
+workers: a SQLite file under the instance folder, or any server that speaks
+the Redis protocol (Redis, Valkey, KeyDB, ...). Errors from tier 2 count as
+misses, so a cache outage never fails a page.
+
+Config (see config.py):
+    FRAGMENT_CACHE_SIZE     max entries in each worker's LRU (0 disables the cache)
+    FRAGMENT_CACHE_BACKEND  "" (LRU only), "disk", or a redis:// URL
+    FRAGMENT_CACHE_PATH     SQLite file for "disk" (default: <instance>/fragment_cache.sqlite3)
+    FRAGMENT_CACHE_TTL      seconds an entry lives in the shared tier
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+def make_key(parts):
+    """Stable cache key for a list of template values (ids, datetimes, strings, ...)."""
+    return "frag:" + hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def _profile_version(profile):
+    """The profile's version counter, read once per request and shared by every key on the page."""
+    from app.versions import get_version
+    versions = g.setdefault("fragment_versions", {})
+    if profile not in versions:
+        versions[profile] = get_version(profile)[0]
+    return versions[profile]
+
+
+def _forget_versions():
+    # g can outlive a request (an app context pushed around several); the versions mustn't
+    g.pop("fragment_versions", None)
+
+
+def pg_key(pg):
+    """The fields of a ProfileGame and its Game that cards and rows print, as a key part."""
+    game = pg.game
+    return (pg.id, _profile_version(pg.profile_id), pg.updated_at, pg.last_checkin_at, pg.total_hours,
+            game.name, game.cover_url, game.release_year)
+
+
+# ------------------------------------------------------------------ #
+# Backends                                                             #
+# ------------------------------------------------------------------ #
+
+class DiskBackend:
+    """Shared tier in a SQLite file every worker opens."""
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fragments "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=1)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM fragments WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO fragments (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl),
+            )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM fragments")
+
+
+class RedisBackend:
+    """
+    Shared tier on a Redis-protocol server. *client* is anything with
+    get(key) / set(key, value, ex=seconds) / delete(*keys) / scan_iter(match)
+    — a redis.Redis, or a local stand-in with the same four methods.
+    """
+
+    def __init__(self, client, ttl):
+        self.client = client
+        self.ttl = ttl
+
+    @classmethod
+    def from_url(cls, url, ttl):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("FRAGMENT_CACHE_BACKEND is a redis:// URL but the redis package "
+                               "isn't installed (pip install redis)") from None
+        return cls(redis.Redis.from_url(url, socket_timeout=0.2), ttl)
+
+    def get(self, key):
+        value = self.client.get(key)
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def set(self, key, value):
+        self.client.set(key, value, ex=self.ttl)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match="frag:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class FragmentCache:
+    """Per-worker LRU in front of an optional shared backend."""
+
+    def __init__(self, max_entries=2000, backend=None):
+        self.max_entries = max_entries
+        self.backend = backend
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._lru.get(key)
+            if value is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return value
+        if self.backend is not None:
+            try:
+                value = self.backend.get(key)
+            except Exception:
+                value = None
+            if value is not None:
+                value = Markup(value)
+                self._remember(key, value)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        self._remember(key, value)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, str(value))
+            except Exception:
+                pass
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+
+# ------------------------------------------------------------------ #
+# Jinja extension                                                      #
+# ------------------------------------------------------------------ #
+
+class FragmentCacheExtension(Extension):
+    """{% cache part, part, ... %}body{% endcache %} — body rendered once per distinct key."""
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        # Scope keys to this block of this version of the template
+        scope = nodes.Const(f"{self._source_hash(parser.name)}:{lineno}")
+        return nodes.CallBlock(
+            self.call_method("_render", [scope, nodes.List(parts)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _source_hash(self, name):
+        if name is None or self.environment.loader is None:
+            return ""
+        source, _, _ = self.environment.loader.get_source(self.environment, name)
+        return hashlib.sha1(source.encode()).hexdigest()[:12]
+
+    def _render(self, scope, parts, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        key = make_key([scope, *parts])
+        value = cache.get(key)
+        if value is None:
+            value = Markup(caller())
+            cache.set(key, value)
+        return value
+
+
+def init_app(app):
+    """Register {% cache %} and pg_key on the app's Jinja environment and build its cache."""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.globals["pg_key"] = pg_key
+    app.jinja_env.filters["pg_key"] = pg_key   # for `pgs | map('pg_key')`
+    app.before_request(_forget_versions)
+    size = app.config.get("FRAGMENT_CACHE_SIZE", 0)
+    if not size:
+        return
+    ttl = app.config.get("FRAGMENT_CACHE_TTL", 86400)
+    setting = app.config.get("FRAGMENT_CACHE_BACKEND") or ""
+    if setting == "disk":
+        path = app.config.get("FRAGMENT_CACHE_PATH") or os.path.join(app.instance_path, "fragment_cache.sqlite3")
+        backend = DiskBackend(path, ttl)
+    elif setting.startswith(("redis://", "rediss://", "unix://")):
+        backend = RedisBackend.from_url(setting, ttl)
+    elif setting:
+        raise RuntimeError(f"Unknown FRAGMENT_CACHE_BACKEND {setting!r} (expected '', 'disk' or a redis:// URL)")
+    else:
+        backend = None
+    app.jinja_env.fragment_cache = FragmentCache(max_entries=size, backend=backend)
@@ -1,3 +1,7 @@
+import re
+import unicodedata
+
+
 def current_profile():
     """Return the active profile name from the session, defaulting to the first profile."""
     from flask import session, current_app
@@ -18,3 +22,24 @@ def _float(value):
         return float(value) if value else None
     except (ValueError, TypeError):
         return None
+
+
+def normalize_title(title):
+    """Case-, accent- and punctuation-insensitive key: "The Witcher® 3: Wild Hunt" → "the witcher 3 wild hunt"."""
+    title = unicodedata.normalize("NFKD", title or "")
+    title = "".join(c for c in title if not unicodedata.combining(c))
+    title = re.sub(r"[™®©]", "", title).casefold()
+    return " ".join(re.sub(r"[^\w]+", " ", title).split())
+
+
+def load_options(*options):
+    """
+    Loader options for a list query, plus raiseload("*") when the app runs
+    with RAISE_ON_LAZY_LOAD so any relationship a template touches without
+    eager-loading it fails loudly instead of issuing one query per row.
+    """
+    from flask import current_app
+    from sqlalchemy.orm import raiseload
+    if current_app.config.get("RAISE_ON_LAZY_LOAD"):
+        options = (*options, raiseload("*"))
+    return options
@@ -4,13 +4,18 @@ RAWG API helpers.
 Docs: https://rawg.io/apidocs
 Free tier: 20,000 requests/month with an API key.
 
-Set RAWG_API_KEY in your .env file.
+Set RAWG_API_KEY in your .env file. RAWG_BASE_URL overrides the API root
+(e.g. to point at a local stub server).
 """
 
 import os
+import threading
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-RAWG_BASE = "https://api.rawg.io/api"
+RAWG_BASE = os.environ.get("RAWG_BASE_URL", "https://api.rawg.io/api")
 
 
 def _key():
@@ -20,20 +25,135 @@ def _key():
     return key
 
 
-def search_games(query, page_size=10):
+class _InFlight:
+    """One upstream call that concurrent identical requests wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _CappedRetry(Retry):
+    """Retry that sleeps at most *max_retry_after* seconds, whatever Retry-After asks for."""
+
+    def __init__(self, *args, max_retry_after=10, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.max_retry_after = self.max_retry_after
+        return retry
+
+    def get_retry_after(self, response):
+        seconds = super().get_retry_after(response)
+        return None if seconds is None else min(seconds, self.max_retry_after)
+
+
+class RawgClient:
+    """
+    Thin RAWG HTTP client.
+
+    - Keeps one requests.Session so connections (TCP + TLS) are reused.
+    - Retries 429 and 5xx responses with exponential backoff, honouring
+      Retry-After up to *max_retry_after* seconds per wait (retries=0
+      turns retrying off — see get_client(interactive=True)).
+    - Coalesces identical in-flight requests: if two threads ask for the same
+      URL + params at once, only one upstream call is made and both get its
+      result (or its exception).
     """
-    Search RAWG for games matching *query*.
+
+    def __init__(self, base_url=RAWG_BASE, timeout=(3.05, 8), retries=3, backoff=0.5, pool_size=10,
+                 max_retry_after=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = _CappedRetry(
+            total=retries,
+            backoff_factor=backoff,
+            backoff_max=max_retry_after,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            max_retry_after=max_retry_after,
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get_json(self, path, params=None):
+        """GET base_url + path and return the decoded JSON body."""
+        params = dict(params or {})
+        key = (path, tuple(sorted(params.items())))
+
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            params["key"] = _key()
+            resp = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+            resp.raise_for_status()
+            call.result = resp.json()
+            return call.result
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+
+    def search_games(self, query, page_size=10):
+        return self.get_json("/games", {"search": query, "page_size": page_size}).get("results", [])
+
+    def get_game(self, rawg_id):
+        return self.get_json(f"/games/{rawg_id}")
+
+
+# Web requests run in a sync gunicorn worker with a 30s timeout: one try with
+# a short read timeout, never a retry loop. CLI and bulk callers can wait.
+INTERACTIVE_CLIENT = {"timeout": (3.05, 5), "retries": 0}
+BATCH_CLIENT = {"timeout": (3.05, 8), "retries": 3, "max_retry_after": 10}
+
+_clients = {}
+_client_lock = threading.Lock()
+
+
+def get_client(interactive=False):
+    """The process-wide RawgClient for web requests (*interactive*) or for CLI/bulk work."""
+    client = _clients.get(interactive)
+    if client is None:
+        with _client_lock:
+            client = _clients.get(interactive)
+            if client is None:
+                client = _clients[interactive] = RawgClient(
+                    **(INTERACTIVE_CLIENT if interactive else BATCH_CLIENT)
+                )
+    return client
+
+
+def search_games(query, page_size=10, interactive=False):
+    """
+    Search RAWG for games matching *query*. Pass interactive=True from web
+    requests (no retries, shorter timeout).
 
     Returns a list of result dicts, each containing:
         id, name, released, background_image, genres, platforms, metacritic
     """
-    resp = requests.get(
-        f"{RAWG_BASE}/games",
-        params={"key": _key(), "search": query, "page_size": page_size},
-        timeout=8,
-    )
-    resp.raise_for_status()
-    return resp.json().get("results", [])
+    return get_client(interactive).search_games(query, page_size=page_size)
 
 
 def get_game(rawg_id):
@@ -42,13 +162,7 @@ def get_game(rawg_id):
 
     Returns the raw RAWG game dict.
     """
-    resp = requests.get(
-        f"{RAWG_BASE}/games/{rawg_id}",
-        params={"key": _key()},
-        timeout=8,
-    )
-    resp.raise_for_status()
-    return resp.json()
+    return get_client().get_game(rawg_id)
 
 
 def extract_metadata(rawg_game):
@@ -0,0 +1,228 @@
+"""
+Two-tier cache for RAWG search results.
+
+Tier 1 is an in-process LRU with a TTL — free hits for repeat keystrokes in
+the same worker. Tier 2 is a small SQLite file under the instance folder that
+every gunicorn worker opens, so a query one worker fetched is a hit for the
+others too (and survives restarts). Keys are normalized queries, so
+"  Hollow   KNIGHT" and "hollow knight" share an entry.
+
+Hit/miss counters are kept in memory and added to the SQLite file at most
+every FLUSH_INTERVAL seconds (and at exit), so a memory hit never touches the
+disk and `flask rawg-cache stats` (a separate process) still sees the totals
+across all workers, give or take the last interval.
+
+Config (see config.py):
+    RAWG_CACHE_TTL   seconds an entry stays fresh (0 disables the cache)
+    RAWG_CACHE_SIZE  max entries in each worker's in-process LRU
+    RAWG_CACHE_PATH  SQLite file (default: <instance>/rawg_cache.sqlite3)
+"""
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key        TEXT PRIMARY KEY,
+    value      TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+COUNTERS = ("memory_hits", "disk_hits", "misses")
+FLUSH_INTERVAL = 30   # seconds between counter writes per process
+
+
+def normalize_query(query):
+    """Case-fold and collapse whitespace so equivalent searches share a key."""
+    return re.sub(r"\s+", " ", (query or "").strip()).casefold()
+
+
+def search_key(query, page_size):
+    return f"search:{page_size}:{normalize_query(query)}"
+
+
+class SearchCache:
+    def __init__(self, path, ttl=86400, max_entries=256):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lru = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._pending = dict.fromkeys(COUNTERS, 0)
+        self._flush_at = time.monotonic() + FLUSH_INTERVAL
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")   # persistent: set once per file
+            conn.executescript(_SCHEMA)
+        atexit.register(self.flush_counters)
+
+    @contextmanager
+    def _connect(self):
+        """A connection that commits on success, rolls back on error, and is always closed."""
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # -------------------------------------------------------------- #
+    # Lookup                                                           #
+    # -------------------------------------------------------------- #
+
+    def get(self, key):
+        """Return the cached value for *key*, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            hit = self._lru.get(key)
+            fresh = hit is not None and hit[0] > now
+            if fresh:
+                self._lru.move_to_end(key)
+            else:
+                self._lru.pop(key, None)
+        if fresh:
+            self._count("memory_hits")
+            return hit[1]
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+
+        value = json.loads(row[0])
+        self._remember(key, value, row[1])
+        self._count("disk_hits")
+        return value
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+        self._remember(key, value, expires_at)
+
+    def get_or_fetch(self, key, fetch):
+        """Return the cached value for *key*, calling fetch() and storing its result on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = fetch()
+            self.set(key, value)
+        return value
+
+    def _remember(self, key, value, expires_at):
+        with self._lock:
+            self._lru[key] = (expires_at, value)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _count(self, counter):
+        with self._lock:
+            self._pending[counter] += 1
+            due = time.monotonic() >= self._flush_at
+        if due:
+            self.flush_counters()
+
+    def flush_counters(self):
+        """Add this process's pending hit/miss counts to the shared file."""
+        with self._lock:
+            pending = [(name, n) for name, n in self._pending.items() if n]
+            self._pending = dict.fromkeys(COUNTERS, 0)
+            self._flush_at = time.monotonic() + FLUSH_INTERVAL
+        if not pending:
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    pending,
+                )
+        except sqlite3.OperationalError:
+            pass  # counters are best-effort; never fail a search over them
+
+    # -------------------------------------------------------------- #
+    # Maintenance (used by `flask rawg-cache`)                         #
+    # -------------------------------------------------------------- #
+
+    def stats(self):
+        self.flush_counters()
+        now = time.time()
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            live, expired = conn.execute(
+                "SELECT COALESCE(SUM(expires_at > ?), 0), COALESCE(SUM(expires_at <= ?), 0) FROM entries",
+                (now, now),
+            ).fetchone()
+        result = {name: counters.get(name, 0) for name in COUNTERS}
+        result.update({
+            "entries": live,
+            "expired": expired,
+            "file_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        })
+        return result
+
+    def purge(self, expired_only=False, reset_counters=False):
+        """Delete entries (all, or only expired ones). Returns the number removed."""
+        with self._lock:
+            self._lru.clear()
+            if reset_counters:
+                self._pending = dict.fromkeys(COUNTERS, 0)
+        with self._connect() as conn:
+            if expired_only:
+                cur = conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+            else:
+                cur = conn.execute("DELETE FROM entries")
+            if reset_counters:
+                conn.execute("DELETE FROM counters")
+            removed = cur.rowcount
+        with self._connect() as conn:
+            conn.execute("VACUUM")
+        return removed
+
+
+_cache = None
+
+
+def get_cache():
+    """The process-wide SearchCache for the current app, or None if disabled."""
+    global _cache
+    from flask import current_app
+    ttl = current_app.config.get("RAWG_CACHE_TTL", 0)
+    if not ttl:
+        return None
+    path = current_app.config.get("RAWG_CACHE_PATH") or os.path.join(
+        current_app.instance_path, "rawg_cache.sqlite3"
+    )
+    if _cache is None or _cache.path != path:
+        _cache = SearchCache(path, ttl=ttl, max_entries=current_app.config.get("RAWG_CACHE_SIZE", 256))
+    return _cache
+
+
+def cached_search(query, page_size=10, interactive=False):
+    """rawg.search_games(), served from the cache when possible."""
+    from app.utils.rawg import search_games
+    cache = get_cache()
+    if cache is None:
+        return search_games(query, page_size=page_size, interactive=interactive)
+    return cache.get_or_fetch(
+        search_key(query, page_size),
+        lambda: search_games(normalize_query(query), page_size=page_size, interactive=interactive),
+    )
@@ -0,0 +1,158 @@
+"""
+Per-request timing: SQL statements, template rendering, and the total, sent
+as a Server-Timing header (visible in the browser's network panel) and
+logged when a request or a single statement is slower than its threshold.
+
+    Server-Timing: db;dur=41.2;desc="23 queries", tpl;dur=8.7, total;dur=57.9
+
+Off unless REQUEST_TIMING is set — when off, no listeners are registered and
+requests pay nothing. Template time excludes SQL run while rendering (lazy
+loads), so db + tpl never count the same millisecond twice.
+
+Config (see config.py):
+    REQUEST_TIMING   turn the whole thing on
+    SLOW_REQUEST_MS  log requests slower than this, with their slowest statements
+    SLOW_QUERY_MS    log any single statement slower than this, with its SQL
+"""
+import time
+
+from flask import before_render_template, current_app, g, has_app_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Statements listed under a slow request in the log
+SLOW_REQUEST_STATEMENTS = 5
+# SQL longer than this is cut in log lines
+SQL_LOG_CHARS = 2000
+
+
+class RequestTimer:
+    """Counters for one request, kept on flask.g while it runs."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0               # seconds in cursor.execute
+        self.template = 0.0         # seconds rendering, minus SQL run meanwhile
+        self.statements = {}        # SQL text -> [count, seconds]
+        self._render_started = None
+
+    def add_query(self, statement, elapsed):
+        self.queries += 1
+        self.db += elapsed
+        entry = self.statements.get(statement)
+        if entry is None:
+            self.statements[statement] = [1, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def slowest(self, n=SLOW_REQUEST_STATEMENTS):
+        """[(statement, count, seconds)] by total time, repeated statements summed (N+1s show up here)."""
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return [(statement, count, seconds) for statement, (count, seconds) in ranked[:n]]
+
+    def header(self, total):
+        queries = "1 query" if self.queries == 1 else f"{self.queries} queries"
+        return (f'db;dur={self.db * 1000:.1f};desc="{queries}", '
+                f"tpl;dur={self.template * 1000:.1f}, total;dur={total * 1000:.1f}")
+
+
+def _timer():
+    # Engine events also fire from CLI commands and scripts, where there's no request to charge
+    return g.get("request_timer") if has_app_context() else None
+
+
+def _shorten(statement):
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= SQL_LOG_CHARS else statement[:SQL_LOG_CHARS] + " …"
+
+
+# ------------------------------------------------------------------ #
+# SQL                                                                  #
+# ------------------------------------------------------------------ #
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _timer() is not None:
+        conn.info.setdefault("request_timing_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timer = _timer()
+    starts = conn.info.get("request_timing_start")
+    if timer is None or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    timer.add_query(statement, elapsed)
+    threshold = current_app.config.get("SLOW_QUERY_MS", 0)
+    if threshold and elapsed * 1000 >= threshold:
+        current_app.logger.warning(
+            "slow query %.1fms on %s %s: %s  params=%.200r",
+            elapsed * 1000, request.method, request.path, _shorten(statement), parameters,
+        )
+
+
+def _listen_to_engines():
+    # On the Engine class, so every engine (and every app in this process) is covered
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ------------------------------------------------------------------ #
+# Templates                                                            #
+# ------------------------------------------------------------------ #
+
+def _before_render(sender, template, context, **extra):
+    timer = _timer()
+    if timer is not None:
+        timer._render_started = (time.perf_counter(), timer.db)
+
+
+def _after_render(sender, template, context, **extra):
+    timer = _timer()
+    if timer is None or timer._render_started is None:
+        return
+    started, db_before = timer._render_started
+    timer._render_started = None
+    timer.template += (time.perf_counter() - started) - (timer.db - db_before)
+
+
+# ------------------------------------------------------------------ #
+# Request hooks                                                        #
+# ------------------------------------------------------------------ #
+
+def _start_request():
+    g.request_timer = RequestTimer()
+
+
+def _finish_request(response):
+    timer = g.pop("request_timer", None)
+    if timer is None:
+        return response
+    total = time.perf_counter() - timer.started
+    response.headers.add("Server-Timing", timer.header(total))
+
+    threshold = current_app.config.get("SLOW_REQUEST_MS", 0)
+    if threshold and total * 1000 >= threshold:
+        lines = [
+            f"  {seconds * 1000:8.1f}ms  x{count:<4} {_shorten(statement)}"
+            for statement, count, seconds in timer.slowest()
+        ]
+        current_app.logger.warning(
+            "slow request %s %s -> %s: %.1fms total, %.1fms in %d queries, %.1fms templates\n%s",
+            request.method, request.full_path.rstrip("?"), response.status_code,
+            total * 1000, timer.db * 1000, timer.queries, timer.template * 1000, "\n".join(lines),
+        )
+    return response
+
+
+def init_app(app):
+    """Time every request of *app* when REQUEST_TIMING is on; do nothing otherwise."""
+    if not app.config.get("REQUEST_TIMING"):
+        return
+    _listen_to_engines()
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
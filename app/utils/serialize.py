@@ -0,0 +1,57 @@
+"""
+JSON-safe row (de)serialization for table-level dumps.
+
+Rows are plain dicts keyed by column name. Dates and datetimes become ISO
+strings and decimals become strings; row_from_json() uses the table's column
+types to turn them back.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+import sqlalchemy as sa
+
+
+def row_to_json(row):
+    """Mapping of column → value to a JSON-serializable dict."""
+    out = {}
+    for key, value in row.items():
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        out[key] = value
+    return out
+
+
+def row_from_json(table, data):
+    """Inverse of row_to_json for *table*; unknown columns are dropped."""
+    out = {}
+    for key, value in data.items():
+        if key not in table.c:
+            continue
+        if value is not None:
+            col_type = table.c[key].type
+            if isinstance(col_type, sa.DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(col_type, sa.Date):
+                value = date.fromisoformat(value)
+            elif isinstance(col_type, sa.Numeric) and not isinstance(col_type, sa.Float):
+                value = Decimal(value)
+        out[key] = value
+    return out
+
+
+def id_ranges(ids):
+    """Compress a sorted iterable of ints into [[start, end], ...] runs."""
+    ranges = []
+    for i in ids:
+        if ranges and i == ranges[-1][1] + 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+    return ranges
+
+
+def expand_ranges(ranges):
+    for start, end in ranges:
+        yield from range(start, end + 1)
@@ -0,0 +1,208 @@
+"""
+Per-profile version stamps and conditional GETs.
+
+Each profile has one profile_versions row: a counter and the time it last
+moved. Any ORM flush that adds, changes or deletes a profile's games,
+categories, mood preferences or check-ins bumps it (see _bump_on_flush), in
+the same transaction as the write. Code that writes with Core statements
+instead of the ORM — rankings, rollup rebuilds, bulk imports, the category
+reorder — calls bump(profile) itself.
+
+Views opt in with @conditional: a GET whose If-None-Match / If-Modified-Since
+still matches the profile's stamp is answered 304 after one indexed
+lookup, before the view runs any of its queries or renders a template.
+"""
+import functools
+import hashlib
+import os
+from datetime import datetime, timezone
+
+from flask import current_app, request, session
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Category, CheckIn, Game, MoodPreferences, ProfileGame, ProfileVersion
+from app.utils.helpers import current_profile
+
+
+# ------------------------------------------------------------------ #
+# Bumping                                                              #
+# ------------------------------------------------------------------ #
+
+def _upsert_statement(profiles, now):
+    table = ProfileVersion.__table__
+    rows = [{"profile_id": p, "version": 1, "changed_at": now} for p in sorted(profiles)]
+    dialect = db.engine.dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(rows)
+        return stmt.on_duplicate_key_update(version=table.c.version + 1, changed_at=stmt.inserted.changed_at)
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.profile_id],
+            set_={"version": table.c.version + 1, "changed_at": stmt.excluded.changed_at},
+        )
+    return None
+
+
+def _bump(connection, profiles):
+    """version += 1 for each profile in one statement, creating rows as needed."""
+    if not profiles:
+        return
+    now = datetime.utcnow()
+    stmt = _upsert_statement(profiles, now)
+    if stmt is not None:
+        connection.execute(stmt)
+        return
+    table = ProfileVersion.__table__
+    for profile in profiles:
+        updated = connection.execute(
+            table.update().where(table.c.profile_id == profile)
+            .values(version=table.c.version + 1, changed_at=now)
+        ).rowcount
+        if not updated:
+            connection.execute(table.insert().values(profile_id=profile, version=1, changed_at=now))
+
+
+def bump(*profiles):
+    """Mark *profiles* as changed, inside the current transaction (caller commits)."""
+    _bump(db.session.connection(), set(profiles))
+
+
+def _profiles_with_games(connection, game_ids):
+    pg = ProfileGame.__table__
+    return set(connection.execute(
+        db.select(pg.c.profile_id).where(pg.c.game_id.in_(game_ids)).distinct()
+    ).scalars())
+
+
+def bump_for_games(game_ids):
+    """Mark every profile tracking one of *game_ids* as changed (shared Game rows)."""
+    connection = db.session.connection()
+    _bump(connection, _profiles_with_games(connection, game_ids))
+
+
+def _touched_profiles(session):
+    """Profiles whose rows this flush added, changed or deleted."""
+    profiles, pg_ids, game_ids = set(), set(), set()
+    for obj in (*session.new, *session.deleted, *(o for o in session.dirty if session.is_modified(o))):
+        if isinstance(obj, (ProfileGame, Category, MoodPreferences)):
+            profiles.add(obj.profile_id)
+        elif isinstance(obj, CheckIn):
+            pg_ids.add(obj.profile_game_id)
+        elif isinstance(obj, Game) and obj not in session.new:
+            game_ids.add(obj.id)
+
+    # Check-ins and shared Game rows reach their profiles through profile_games
+    pg = ProfileGame.__table__
+    connection = session.connection()
+    if pg_ids:
+        profiles.update(connection.execute(
+            db.select(pg.c.profile_id).where(pg.c.id.in_(pg_ids)).distinct()
+        ).scalars())
+    if game_ids:
+        profiles.update(_profiles_with_games(connection, game_ids))
+    profiles.discard(None)
+    return profiles
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_before_flush(session, flush_context, instances):
+    # Deleted check-ins must be resolved to a profile while their rows still exist
+    session.info.setdefault("versions_pending", set()).update(_touched_profiles(session))
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session, flush_context):
+    profiles = session.info.pop("versions_pending", set())
+    _bump(session.connection(), profiles)
+
+
+# ------------------------------------------------------------------ #
+# Conditional GET                                                      #
+# ------------------------------------------------------------------ #
+
+@functools.lru_cache(maxsize=1)
+def _deploy_token():
+    """Changes whenever the code or templates do, so a deploy never serves a stale 304."""
+    newest = 0.0
+    for root, _, files in os.walk(current_app.root_path):
+        for name in files:
+            if name.endswith((".py", ".html")):
+                newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+    return f"{newest:.0f}"
+
+
+def get_version(profile):
+    """(version, changed_at) for *profile*, creating the row on first use."""
+    row = db.session.execute(
+        db.select(ProfileVersion.version, ProfileVersion.changed_at).filter_by(profile_id=profile)
+    ).first()
+    if row is None:
+        bump(profile)
+        db.session.commit()
+        return get_version(profile)
+    return row.version, row.changed_at
+
+
+def _second(changed_at):
+    return changed_at.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def _etag(profile, version, changed_at, daily):
+    parts = [profile, str(version), changed_at.isoformat(), _deploy_token()]
+    if daily:
+        # Pages showing "today" / "this week" go stale at midnight even without writes
+        parts.append(datetime.utcnow().date().isoformat())
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+def conditional(view=None, *, daily=False):
+    """
+    Answer GETs with 304 Not Modified when the profile hasn't changed since
+    the client's copy. Pass daily=True for pages that depend on the date.
+
+    Skipped when flash messages are waiting — the page must render them.
+    """
+    if view is None:
+        return functools.partial(conditional, daily=daily)
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if (request.method not in ("GET", "HEAD") or not current_app.config.get("CONDITIONAL_GET", True)
+                or session.get("_flashes")):
+            return view(*args, **kwargs)
+
+        profile = current_profile()
+        version, changed_at = get_version(profile)
+        etag = _etag(profile, version, changed_at, daily)
+
+        if request.if_none_match:
+            fresh = request.if_none_match.contains_weak(etag)
+        elif request.if_modified_since and not daily:
+            fresh = _second(changed_at) <= request.if_modified_since
+        else:
+            fresh = False
+        if fresh:
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            # A first visit can write (e.g. building the stored ranking) — stamp what was rendered
+            new_version, changed_at = get_version(profile)
+            if new_version != version:
+                etag = _etag(profile, new_version, changed_at, daily)
+        if not daily:
+            response.last_modified = _second(changed_at)
+        response.set_etag(etag, weak=True)
+        # Revalidate on every load; the page depends on the profile cookie
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.vary.add("Cookie")
+        return response
+
+    return wrapper
@@ -0,0 +1 @@
+"""Synthetic-data benchmarks for the hot routes — see benchmarks/run.py."""
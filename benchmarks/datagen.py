@@ -0,0 +1,25 @@
+"""
+Deterministic synthetic library for benchmarks.
+
+generate() fills an empty database with N profiles × M games × ~K check-ins
+per active game × C categories per profile, using the same streaming
+generator as `flask seed --games` (app.seeds.generate_library). The same
+arguments and seed always give the same rows. Check-in dates are relative to
+*today* (recorded in the benchmark metadata), so "this week" on the
+dashboard has data.
+"""
+from app.incremental import rebuild_derived
+from app.seeds import bulk_load_connection, generate_library
+
+
+def profile_names(n):
+    return [f"Player {i}" for i in range(1, n + 1)]
+
+
+def generate(profiles=2, games=500, checkins=10, categories=8, seed=1, today=None):
+    """Fill an empty database and rebuild derived data; returns row counts per table."""
+    with bulk_load_connection() as conn:
+        counts = generate_library(conn, profile_names(profiles), games, checkins, categories,
+                                  seed=seed, today=today)
+    rebuild_derived()
+    return counts
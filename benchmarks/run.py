@@ -0,0 +1,285 @@
+"""
+Hot-route benchmarks.
+
+    python -m benchmarks.run                       # SQLite temp file, default dataset
+    python -m benchmarks.run --games 2000 --checkins 20 --save-baseline
+    python -m benchmarks.run --baseline benchmarks/baseline.json   # exit 1 on regression
+    python -m benchmarks.run --database mysql+pymysql://u:p@localhost/gj_bench
+
+Builds a deterministic library (benchmarks/datagen.py), then requests each
+route through the Flask test client: one cold request, a few warm-ups, then
+--requests timed ones. Reports p50/p95 latency, SQL statements per request
+and the peak Python heap allocated while serving one request, writes the
+lot to JSON and compares it with a saved baseline.
+"""
+import gc
+import json
+import math
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+
+import click
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_OUT = os.path.join(HERE, "results", "latest.json")
+
+# name -> URL (playing.detail is filled in with the busiest active game)
+ROUTES = {
+    "backlog.play_next": "/backlog/play-next",
+    "main.index":        "/",
+    "backlog.index":     "/backlog/",
+    "playing.index":     "/playing/",
+    "playing.detail":    None,
+}
+
+# Slower than baseline by more than this fraction *and* this many ms is a regression
+LATENCY_TOLERANCE = 0.25
+LATENCY_FLOOR_MS = 2.0
+MEMORY_TOLERANCE = 0.25
+MEMORY_FLOOR_KIB = 256
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ------------------------------------------------------------------ #
+# Measuring                                                            #
+# ------------------------------------------------------------------ #
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+def _detail_url(profile):
+    from app.models import ProfileGame
+    pg = (ProfileGame.query
+          .filter_by(profile_id=profile, section="active")
+          .order_by(ProfileGame.checkin_count.desc(), ProfileGame.id)
+          .first())
+    return f"/playing/{pg.id}" if pg else None
+
+
+def measure(client, url, counter, requests, warmup):
+    """Cold + warm timings (ms), statements per warm request, and peak KiB for one request."""
+    def get():
+        counter.count = 0
+        started = time.perf_counter()
+        response = client.get(url)
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise click.ClickException(f"GET {url} returned {response.status_code}")
+        return elapsed, counter.count
+
+    cold_ms, _ = get()
+    for _ in range(warmup):
+        get()
+    gc.collect()   # don't charge this route for the previous route's garbage
+    samples, queries = [], []
+    for _ in range(requests):
+        elapsed, n = get()
+        samples.append(elapsed)
+        queries.append(n)
+
+    # Separate pass: tracemalloc slows everything down, so it never touches the timings
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        get()
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "url":      url,
+        "cold_ms":  round(cold_ms, 2),
+        "p50_ms":   round(percentile(samples, 50), 2),
+        "p95_ms":   round(percentile(samples, 95), 2),
+        "mean_ms":  round(statistics.fmean(samples), 2),
+        "min_ms":   round(min(samples), 2),
+        "queries":  max(queries),
+        "peak_kib": round(peak / 1024),
+    }
+
+
+# ------------------------------------------------------------------ #
+# Baseline comparison                                                  #
+# ------------------------------------------------------------------ #
+
+def compare(result, baseline, tolerance=LATENCY_TOLERANCE):
+    """
+    Human-readable regressions of *result* against *baseline* (empty list =
+    pass). Query counts are deterministic, so any increase fails; latency and
+    memory get some slack for noise.
+    """
+    problems = []
+    for name, base in baseline["routes"].items():
+        cur = result["routes"].get(name)
+        if cur is None:
+            problems.append(f"{name}: missing from this run")
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            limit = base[key] * (1 + tolerance)
+            if cur[key] > limit and cur[key] - base[key] > LATENCY_FLOOR_MS:
+                problems.append(f"{name}: {key} {cur[key]:.1f} vs baseline {base[key]:.1f} "
+                                f"(+{(cur[key] / base[key] - 1) * 100:.0f}%)")
+        if cur["queries"] > base["queries"]:
+            problems.append(f"{name}: {cur['queries']} queries vs baseline {base['queries']}")
+        limit = base["peak_kib"] * (1 + MEMORY_TOLERANCE)
+        if cur["peak_kib"] > limit and cur["peak_kib"] - base["peak_kib"] > MEMORY_FLOOR_KIB:
+            problems.append(f"{name}: peak {cur['peak_kib']} KiB vs baseline {base['peak_kib']} KiB")
+    return problems
+
+
+def _report(result, baseline):
+    header = f"{'route':<20} {'cold':>8} {'p50':>8} {'p95':>8} {'queries':>8} {'peak KiB':>9}"
+    click.echo(header)
+    click.echo("-" * len(header))
+    for name, r in result["routes"].items():
+        line = (f"{name:<20} {r['cold_ms']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                f"{r['queries']:>8} {r['peak_kib']:>9}")
+        base = baseline and baseline["routes"].get(name)
+        if base:
+            line += f"   (baseline p95 {base['p95_ms']:.1f}, {base['queries']} queries)"
+        click.echo(line)
+
+
+# ------------------------------------------------------------------ #
+# CLI                                                                  #
+# ------------------------------------------------------------------ #
+
+@click.command()
+@click.option("--profiles", default=2, show_default=True, help="Profiles to generate.")
+@click.option("--games", default=500, show_default=True, help="Games per profile.")
+@click.option("--checkins", default=10, show_default=True, help="Average check-ins per active game.")
+@click.option("--categories", default=8, show_default=True, help="Categories per profile.")
+@click.option("--seed", default=1, show_default=True, help="Random seed for the generator.")
+@click.option("--database", default=None, help="SQLAlchemy URL (default: a temporary SQLite file).")
+@click.option("--reuse", is_flag=True, help="Benchmark --database as it is instead of requiring it empty.")
+@click.option("--requests", "n_requests", default=30, show_default=True, help="Timed requests per route.")
+@click.option("--warmup", default=3, show_default=True, help="Untimed requests per route after the cold one.")
+@click.option("--route", "only", multiple=True, type=click.Choice(list(ROUTES)), help="Only these routes.")
+@click.option("--out", default=DEFAULT_OUT, show_default=True, help="Where to write this run's JSON.")
+@click.option("--baseline", default=DEFAULT_BASELINE, show_default=True, help="Baseline JSON to compare with.")
+@click.option("--save-baseline", is_flag=True, help="Also write this run as the new baseline.")
+@click.option("--tolerance", default=LATENCY_TOLERANCE, show_default=True,
+              help="Allowed p50/p95 slowdown vs the baseline, as a fraction.")
+def main(profiles, games, checkins, categories, seed, database, reuse, n_requests, warmup, only,
+         out, baseline, save_baseline, tolerance):
+    """Benchmark the hot routes on a synthetic library."""
+    tmpdir = None
+    if database is None:
+        tmpdir = tempfile.TemporaryDirectory(prefix="gj-bench-")
+        database = f"sqlite:///{os.path.join(tmpdir.name, 'bench.sqlite3')}"
+    # config.py reads these at import time
+    os.environ["DATABASE_URL"] = database
+    os.environ["PROFILES"] = ",".join(f"Player {i}" for i in range(1, profiles + 1))
+    os.environ.setdefault("FLASK_SECRET_KEY", "benchmarks")
+    os.environ["REQUEST_TIMING"] = ""
+    os.environ["ADMIN_PROFILING"] = ""
+
+    from sqlalchemy import event
+    from app import create_app, db
+    from app.models import Game
+    from benchmarks.datagen import generate
+
+    app = create_app("production")
+    if tmpdir is not None:
+        app.config["FRAGMENT_CACHE_PATH"] = os.path.join(tmpdir.name, "fragments.sqlite3")
+    today = date.today()
+
+    with app.app_context():
+        db.create_all()
+        if db.session.query(Game.id).first() is None:
+            started = time.perf_counter()
+            counts = generate(profiles, games, checkins, categories, seed=seed, today=today)
+            click.echo(f"Generated {counts} in {time.perf_counter() - started:.1f}s")
+        elif not reuse:
+            raise click.ClickException(f"{database} already has data; pass --reuse to benchmark it as is")
+
+        counter = QueryCounter()
+        event.listen(db.engine, "after_cursor_execute", counter)
+        routes = {name: url or _detail_url("Player 1") for name, url in ROUTES.items() if not only or name in only}
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["profile"] = "Player 1"
+
+    result = {
+        "meta": {
+            "dataset": {"profiles": profiles, "games": games, "checkins": checkins,
+                        "categories": categories, "seed": seed},
+            "dialect": database.split(":", 1)[0],
+            "requests": n_requests,
+            "today": today.isoformat(),
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "routes": {},
+    }
+    for name, url in routes.items():
+        if url is None:
+            click.echo(f"{name}: no active game to open, skipped")
+            continue
+        result["routes"][name] = measure(client, url, counter, n_requests, warmup)
+    result["meta"]["max_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+
+    base = None
+    if os.path.exists(baseline) and not save_baseline:
+        with open(baseline) as f:
+            base = json.load(f)
+        if base["meta"]["dataset"] != result["meta"]["dataset"] or base["meta"]["dialect"] != result["meta"]["dialect"]:
+            click.echo(f"Baseline {baseline} was recorded on a different dataset or database; not comparing.")
+            base = None
+    _report(result, base)
+    click.echo(f"\nWrote {out}")
+
+    if save_baseline:
+        with open(baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        click.echo(f"Saved baseline {baseline}")
+    elif base is not None:
+        problems = compare(result, base, tolerance)
+        if problems:
+            click.secho("\nREGRESSION against baseline:", fg="red", bold=True, err=True)
+            for problem in problems:
+                click.secho(f"  {problem}", fg="red", err=True)
+            sys.exit(1)
+        click.secho("No regressions against baseline.", fg="green")
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,36 @@ class Config:
     SECRET_KEY = os.environ.get("FLASK_SECRET_KEY", "change-me")
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Raise instead of lazy-loading relationships on list queries (see load_options)
+    RAISE_ON_LAZY_LOAD = os.environ.get("RAISE_ON_LAZY_LOAD", "").lower() in ("1", "true", "yes")
+    # RAWG search cache: in-process LRU backed by a SQLite file shared by all workers
+    RAWG_CACHE_TTL  = int(os.environ.get("RAWG_CACHE_TTL", 7 * 24 * 3600))   # 0 disables
+    RAWG_CACHE_SIZE = int(os.environ.get("RAWG_CACHE_SIZE", 256))
+    RAWG_CACHE_PATH = os.environ.get("RAWG_CACHE_PATH")   # default: instance/rawg_cache.sqlite3
+    # Cover-art thumbnails (default: instance/covers)
+    COVER_CACHE_DIR = os.environ.get("COVER_CACHE_DIR")
+    # Hosts the server downloads covers from; other URLs are left to the browser
+    COVER_HOSTS = [h.strip() for h in os.environ.get("COVER_HOSTS", "media.rawg.io").split(",") if h.strip()]
+    COVER_RETRY_AFTER = int(os.environ.get("COVER_RETRY_AFTER", 3600))   # seconds before a failed cover is retried
+    # Rendered-fragment cache for {% cache %} blocks (see app/utils/fragment_cache.py)
+    FRAGMENT_CACHE_SIZE    = int(os.environ.get("FRAGMENT_CACHE_SIZE", 5000))   # per worker; 0 disables
+    FRAGMENT_CACHE_BACKEND = os.environ.get("FRAGMENT_CACHE_BACKEND", "")      # "", "disk" or redis://host:6379/0
+    FRAGMENT_CACHE_PATH    = os.environ.get("FRAGMENT_CACHE_PATH")             # default: instance/fragment_cache.sqlite3
+    FRAGMENT_CACHE_TTL     = int(os.environ.get("FRAGMENT_CACHE_TTL", 24 * 3600))
+    # 304 Not Modified for unchanged pages (see app/versions.py)
+    CONDITIONAL_GET = os.environ.get("CONDITIONAL_GET", "1").lower() in ("1", "true", "yes")
+    # Server-Timing header + slow request/query log (see app/utils/request_timing.py)
+    REQUEST_TIMING  = os.environ.get("REQUEST_TIMING", "").lower() in ("1", "true", "yes")
+    SLOW_REQUEST_MS = int(os.environ.get("SLOW_REQUEST_MS", 500))   # 0 disables the log line
+    SLOW_QUERY_MS   = int(os.environ.get("SLOW_QUERY_MS", 100))
+    # On-demand cProfile / tracemalloc for live workers (see app/profiling.py)
+    ADMIN_PROFILING = os.environ.get("ADMIN_PROFILING", "").lower() in ("1", "true", "yes")
+    ADMIN_NETWORKS = [   # clients allowed at /admin/profiling: Tailscale's ranges + loopback
+        n.strip()
+        for n in os.environ.get("ADMIN_NETWORKS", "100.64.0.0/10,fd7a:115c:a1e0::/48,127.0.0.0/8,::1/128").split(",")
+        if n.strip()
+    ]
+    PROFILING_DIR = os.environ.get("PROFILING_DIR")   # default: instance/profiling
     PROFILES = [
         p.strip()
         for p in os.environ.get("PROFILES", "Player 1").split(",")
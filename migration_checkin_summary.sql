@@ -0,0 +1,34 @@
+-- Per-game check-in summary on profile_games
+-- last_checkin_at / total_hours / checkin_count let the library cards show
+-- "last played" and hours without touching checkins, and let the playing
+-- index sort by recency from an index. They replace the profile_game_playtime
+-- table from migration_playtime_rollups.sql.
+--
+-- Run after migration_playtime_rollups.sql. Verify afterwards with:
+--   flask rebuild-rollups --check
+
+-- 1. Columns and indexes
+ALTER TABLE profile_games
+    ADD COLUMN last_checkin_at DATETIME     NULL,
+    ADD COLUMN total_hours     DECIMAL(8,1) NOT NULL DEFAULT 0,
+    ADD COLUMN checkin_count   INT          NOT NULL DEFAULT 0,
+    ADD INDEX ix_profile_games_profile_section_status_last_checkin (profile_id, section, status, last_checkin_at),
+    ADD INDEX ix_profile_games_profile_total_hours (profile_id, total_hours);
+
+-- 2. Backfill from existing check-ins (updated_at kept as is)
+UPDATE profile_games pg
+JOIN (
+    SELECT profile_game_id,
+           COUNT(*)                       AS n,
+           COALESCE(SUM(hours_played), 0) AS hours,
+           MAX(created_at)                AS last_at
+    FROM checkins
+    GROUP BY profile_game_id
+) c ON c.profile_game_id = pg.id
+SET pg.checkin_count   = c.n,
+    pg.total_hours     = c.hours,
+    pg.last_checkin_at = c.last_at,
+    pg.updated_at      = pg.updated_at;
+
+-- 3. The per-game totals table is no longer used
+DROP TABLE IF EXISTS profile_game_playtime;
@@ -0,0 +1,13 @@
+-- Keyset pagination for check-in history
+-- The game detail page now reads check-ins a page at a time with
+--   WHERE profile_game_id = ? AND (created_at, id) < (?, ?)
+--   ORDER BY created_at DESC, id DESC LIMIT 21
+-- Adding id to the index makes that a single range read with no filesort,
+-- however long the history is. The new index is added before the old one is
+-- dropped, so the profile_game_id foreign key always has an index to use.
+--
+-- Run after migration_profile_indexes.sql.
+
+ALTER TABLE checkins
+    ADD INDEX ix_checkins_profile_game_created_id (profile_game_id, created_at, id),
+    DROP INDEX ix_checkins_profile_game_created;
@@ -0,0 +1,16 @@
+-- Library search
+-- FULLTEXT indexes behind /search: game names, library notes and check-in
+-- notes, each queried with MATCH ... AGAINST (... IN BOOLEAN MODE).
+-- The first FULLTEXT index on a table makes InnoDB rebuild it, so the
+-- checkins statement can take a while on a long history.
+--
+-- Run after migration_checkin_summary.sql.
+
+-- 1. Game names
+ALTER TABLE games ADD FULLTEXT INDEX ix_games_name_fulltext (name);
+
+-- 2. Library notes
+ALTER TABLE profile_games ADD FULLTEXT INDEX ix_profile_games_notes_fulltext (notes);
+
+-- 3. Check-in notes
+ALTER TABLE checkins ADD FULLTEXT INDEX ix_checkins_note_fulltext (note);
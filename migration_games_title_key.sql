@@ -0,0 +1,12 @@
+-- Normalized game titles for library import
+-- The CSV import matches titles to existing games case-, accent- and
+-- punctuation-insensitively (app/library_import.py normalize_title). It used
+-- to read every games.name to do that; with the key stored and indexed it
+-- looks up only the titles in the file.
+--
+-- Existing rows are left NULL here: SQL can't fold accents and punctuation
+-- the way normalize_title() does, so the app keys them on the next import.
+
+ALTER TABLE games
+    ADD COLUMN title_key VARCHAR(255) NULL AFTER name,
+    ADD INDEX ix_games_title_key (title_key);
@@ -0,0 +1,16 @@
+-- Game edit tracking for incremental backups
+-- Renaming a game or editing its cover, genres or platforms doesn't touch any
+-- profile_games row, so deltas need the games row's own change time.
+
+-- 1. Add the column, backfilled from the last RAWG sync (else created_at)
+ALTER TABLE games
+    ADD COLUMN updated_at DATETIME NULL AFTER created_at;
+
+UPDATE games SET updated_at = COALESCE(rawg_synced_at, created_at);
+
+ALTER TABLE games
+    MODIFY COLUMN updated_at DATETIME NOT NULL;
+
+-- 2. Index for the delta scan
+ALTER TABLE games
+    ADD INDEX ix_games_updated_at (updated_at);
@@ -0,0 +1,13 @@
+-- Materialized play-next ranking
+-- Stores each game's play-next score next to the existing play_next_rank column
+-- so the Play Next page and dashboard can read the ranking with one ordered SELECT.
+--
+-- After running this, populate both columns once with:
+--     flask rebuild-rankings
+
+-- 1. Add the score column
+ALTER TABLE profile_games
+    ADD COLUMN play_next_score INT NULL AFTER play_next_rank;
+
+-- 2. Clear any stale ranks left over from the old manual ordering
+UPDATE profile_games SET play_next_rank = NULL;
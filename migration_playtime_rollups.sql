@@ -0,0 +1,30 @@
+-- Play-time rollups
+-- Running sums of check-in hours per ProfileGame and per profile per
+-- day / week / month, kept up to date by the check-in and delete routes.
+--
+-- After applying, backfill from existing check-ins with:
+--   flask rebuild-rollups
+
+-- 1. Per-game totals
+CREATE TABLE profile_game_playtime (
+    profile_game_id INT           NOT NULL,
+    profile_id      VARCHAR(100)  NOT NULL,
+    hours           DECIMAL(8,1)  NOT NULL DEFAULT 0,
+    checkins        INT           NOT NULL DEFAULT 0,
+    PRIMARY KEY (profile_game_id),
+    INDEX ix_profile_game_playtime_profile_hours (profile_id, hours),
+    CONSTRAINT fk_profile_game_playtime_pg
+        FOREIGN KEY (profile_game_id) REFERENCES profile_games (id) ON DELETE CASCADE
+);
+
+-- 2. Per-profile day / week (Monday) / month buckets, by UTC date
+CREATE TABLE playtime_buckets (
+    id           INT            NOT NULL AUTO_INCREMENT,
+    profile_id   VARCHAR(100)   NOT NULL,
+    period       ENUM('day', 'week', 'month') NOT NULL,
+    period_start DATE           NOT NULL,
+    hours        DECIMAL(10,1)  NOT NULL DEFAULT 0,
+    checkins     INT            NOT NULL DEFAULT 0,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_playtime_buckets_profile_period (profile_id, period, period_start)
+);
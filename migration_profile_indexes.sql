@@ -0,0 +1,64 @@
+-- Composite indexes for profile-scoped queries
+-- Every route filters profile_games by profile_id plus section/status, lists
+-- categories by profile_id ordered by rank, name, and reads check-ins per game
+-- newest first. None of these had an index beyond the primary/foreign keys.
+--
+-- Run after migration_issue_46.sql and migration_issue_47.sql (the
+-- categories.profile_id and checkins.profile_game_id columns indexed below).
+-- Verify afterwards with: flask db-explain
+
+-- 1. profile_games: section/status lists and dashboard counts
+ALTER TABLE profile_games
+    ADD INDEX ix_profile_games_profile_section_status (profile_id, section, status),
+    ADD INDEX ix_profile_games_profile_status (profile_id, status),
+    ADD INDEX ix_profile_games_profile_play_next_rank (profile_id, play_next_rank);
+
+-- 2. profile_games: one row per (profile, game). The app already refuses
+--    duplicates, but older databases may have some, and the unique key can't
+--    be added while they exist. Each duplicate is folded into the oldest row
+--    for its (profile, game): its check-ins and categories move over, and its
+--    own survey and notes are dropped (run `flask rebuild-rankings` afterwards
+--    if any were). To review them first:
+--      SELECT profile_id, game_id, COUNT(*) FROM profile_games
+--      GROUP BY profile_id, game_id HAVING COUNT(*) > 1;
+CREATE TEMPORARY TABLE pg_duplicates AS
+    SELECT pg.id AS dup_id, k.keep_id
+    FROM profile_games pg
+    JOIN (
+        SELECT profile_id, game_id, MIN(id) AS keep_id
+        FROM profile_games
+        GROUP BY profile_id, game_id
+        HAVING COUNT(*) > 1
+    ) k ON k.profile_id = pg.profile_id AND k.game_id = pg.game_id AND pg.id <> k.keep_id;
+
+UPDATE checkins c
+    JOIN pg_duplicates d ON d.dup_id = c.profile_game_id
+    SET c.profile_game_id = d.keep_id;
+
+INSERT IGNORE INTO profile_game_categories (profile_game_id, category_id)
+    SELECT d.keep_id, pgc.category_id
+    FROM profile_game_categories pgc
+    JOIN pg_duplicates d ON d.dup_id = pgc.profile_game_id;
+
+DELETE pgc FROM profile_game_categories pgc
+    JOIN pg_duplicates d ON d.dup_id = pgc.profile_game_id;
+
+DELETE pg FROM profile_games pg
+    JOIN pg_duplicates d ON d.dup_id = pg.id;
+
+DROP TEMPORARY TABLE pg_duplicates;
+
+ALTER TABLE profile_games
+    ADD UNIQUE KEY uq_profile_games_profile_game (profile_id, game_id);
+
+-- 3. categories: per-profile list ordered by priority
+ALTER TABLE categories
+    ADD INDEX ix_categories_profile_rank_name (profile_id, `rank`, name);
+
+-- 4. profile_game_categories: category → games (backlog page, play-next scoring)
+ALTER TABLE profile_game_categories
+    ADD INDEX ix_profile_game_categories_category (category_id, profile_game_id);
+
+-- 5. checkins: per-game history, newest first
+ALTER TABLE checkins
+    ADD INDEX ix_checkins_profile_game_created (profile_game_id, created_at);
@@ -0,0 +1,14 @@
+-- Cached dashboard counters
+-- One row per profile holding the Playing / On Hold / Backlog / Completed
+-- counts. Rows are created on the first dashboard visit, so no backfill is needed.
+
+CREATE TABLE profile_stats (
+    id         INT          NOT NULL AUTO_INCREMENT,
+    profile_id VARCHAR(100) NOT NULL,
+    playing    INT          NOT NULL DEFAULT 0,
+    on_hold    INT          NOT NULL DEFAULT 0,
+    backlog    INT          NOT NULL DEFAULT 0,
+    completed  INT          NOT NULL DEFAULT 0,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_profile_stats_profile (profile_id)
+);
@@ -0,0 +1,14 @@
+-- Per-profile version stamps
+-- One row per profile with a counter bumped in the same transaction as every
+-- write to that profile's data; pages answer conditional GETs (ETag /
+-- Last-Modified → 304) from it. Rows are created on the first page view, so
+-- no backfill is needed.
+
+CREATE TABLE profile_versions (
+    id         INT          NOT NULL AUTO_INCREMENT,
+    profile_id VARCHAR(100) NOT NULL,
+    version    INT          NOT NULL DEFAULT 0,
+    changed_at DATETIME     NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_profile_versions_profile (profile_id)
+);
@@ -0,0 +1,11 @@
+-- RAWG metadata refresh tracking
+-- Records when `flask rawg-refresh` last fetched each game's metadata so stale
+-- rows can be found (and interrupted runs resumed) without re-fetching everything.
+
+-- 1. Add the column (NULL = never refreshed)
+ALTER TABLE games
+    ADD COLUMN rawg_synced_at DATETIME NULL AFTER created_at;
+
+-- 2. Index for the stale-row scan
+ALTER TABLE games
+    ADD INDEX ix_games_rawg_synced_at (rawg_synced_at);
@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py reads the environment at import time, so this runs before any app import
+_DB_DIR = tempfile.mkdtemp(prefix="gj-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.sqlite3')}"
+os.environ["PROFILES"] = "Player 1,Player 2"
+os.environ["FLASK_SECRET_KEY"] = "tests"
+os.environ["RAWG_CACHE_TTL"] = "0"
+os.environ["REQUEST_TIMING"] = ""
+os.environ["ADMIN_PROFILING"] = ""
+os.environ["RAISE_ON_LAZY_LOAD"] = ""
+
+
+@pytest.fixture
+def app(tmp_path):
+    """An app on an empty SQLite database, inside an app context."""
+    from app import create_app, db
+
+    app = create_app("development")
+    app.config.update(TESTING=True, COVER_CACHE_DIR=str(tmp_path / "covers"))
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["profile"] = "Player 1"
+    return client
+
+
+@pytest.fixture
+def library(app):
+    """build(games, ...) fills the empty database with app.seeds.generate_library and rebuilds derived data."""
+    from app.incremental import rebuild_derived
+    from app.seeds import bulk_load_connection, generate_library
+
+    def build(games, checkins=3, profiles=("Player 1", "Player 2"), categories=6, seed=1):
+        with bulk_load_connection() as conn:
+            generate_library(conn, list(profiles), games, checkins, categories, seed=seed)
+        rebuild_derived()
+
+    return build
@@ -0,0 +1,22 @@
+from app import db
+from app.models import Game, ProfileGame
+
+
+def _page(client):
+    response = client.get("/playing/")
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def test_edit_within_the_same_second_is_not_served_stale(client):
+    pg = ProfileGame(profile_id="Player 1", game=Game(name="Celeste"), section="active", status="Playing", hype=1)
+    db.session.add(pg)
+    db.session.commit()
+    before = _page(client)
+    assert _page(client) == before
+
+    # MySQL DATETIME has whole seconds: a second edit can leave updated_at unchanged
+    pg.hype, pg.updated_at = 5, ProfileGame.updated_at
+    db.session.commit()
+
+    assert _page(client) != before
@@ -0,0 +1,83 @@
+"""Delta replay: rows come back, and FOREIGN_KEY_CHECKS is restored on the replaying connection."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app import incremental
+from app.models import CheckIn, Game, ProfileGame
+
+
+@pytest.fixture
+def fk_calls(monkeypatch):
+    """Record _set_foreign_key_checks calls as (DBAPI connection, enabled, inside a transaction)."""
+    calls = []
+
+    def record(conn, enabled):
+        calls.append((conn.connection.dbapi_connection, enabled, conn.in_transaction()))
+
+    monkeypatch.setattr(incremental, "_set_foreign_key_checks", record)
+    return calls
+
+
+def _write_full_delta(tmp_path):
+    parent = {
+        "kind": "full",
+        "file": "base.sql.gz",
+        "snapshot_at": datetime(2000, 1, 1).isoformat(),   # everything is newer
+        "id_ranges": {},
+    }
+    return incremental.write_delta(str(tmp_path / "delta.ndjson.gz"), parent)
+
+
+def test_replay_restores_rows_and_foreign_key_checks_on_one_connection(app, library, tmp_path, fk_calls):
+    library(5)
+    expected = (Game.query.count(), ProfileGame.query.count(), CheckIn.query.count())
+    _write_full_delta(tmp_path)
+
+    renamed = Game.query.order_by(Game.id).first()
+    renamed_id, original_name = renamed.id, renamed.name
+    renamed.name = "Changed after the backup"
+    CheckIn.query.delete()
+    db.session.commit()
+    db.session.remove()
+
+    used = set()
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "DELETE")):
+            used.add(conn.connection.dbapi_connection)
+
+    event.listen(db.engine, "before_cursor_execute", on_execute)
+    try:
+        incremental.apply_delta(str(tmp_path / "delta.ndjson.gz"))
+    finally:
+        event.remove(db.engine, "before_cursor_execute", on_execute)
+
+    assert (Game.query.count(), ProfileGame.query.count(), CheckIn.query.count()) == expected
+    assert db.session.get(Game, renamed_id).name == original_name
+
+    (off_conn, off, _), (on_conn, on, on_in_tx) = fk_calls
+    assert (off, on) == (False, True)
+    assert off_conn is on_conn
+    assert on_in_tx, "checks must come back on before the commit"
+    assert used == {off_conn}, "every replay statement must run on the connection with checks off"
+
+
+def test_failed_replay_still_restores_foreign_key_checks(app, library, tmp_path, fk_calls, monkeypatch):
+    library(3)
+    _write_full_delta(tmp_path)
+    before = CheckIn.query.count()
+    db.session.remove()
+
+    def broken(table, row):
+        raise ValueError("corrupt row")
+
+    monkeypatch.setattr(incremental, "row_from_json", broken)
+    with pytest.raises(ValueError):
+        incremental.apply_delta(str(tmp_path / "delta.ndjson.gz"))
+
+    assert [enabled for _, enabled, _ in fk_calls] == [False, True]
+    assert fk_calls[0][0] is fk_calls[1][0]
+    assert CheckIn.query.count() == before
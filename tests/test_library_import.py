@@ -0,0 +1,63 @@
+from sqlalchemy import event
+
+from app import db
+from app.library_import import ImportReport, import_csv, parse_csv, _existing_games
+from app.models import Game, ProfileGame
+
+
+def _rows(text):
+    return parse_csv(text, ImportReport())
+
+
+def test_new_games_get_a_title_key(app):
+    db.session.add(Game(name="The Witcher® 3: Wild Hunt"))
+    db.session.commit()
+    import_csv("Player 1", "name\nPokémon Snap\n", match=False)
+
+    keys = dict(db.session.execute(db.select(Game.name, Game.title_key)).all())
+    assert keys == {"The Witcher® 3: Wild Hunt": "the witcher 3 wild hunt", "Pokémon Snap": "pokemon snap"}
+
+    game = Game.query.filter_by(name="Pokémon Snap").one()
+    game.name = "New Pokémon Snap!"
+    db.session.commit()
+    assert game.title_key == "new pokemon snap"
+
+
+def test_existing_games_are_looked_up_by_key_not_scanned(app):
+    db.session.add_all([Game(name="Celeste"), Game(name="CELESTE")])
+    db.session.add_all(Game(name=f"Filler {i}") for i in range(200))
+    db.session.commit()
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        by_rawg, by_name = _existing_games(_rows("name\nceleste\nHollow Knight\n"))
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    # The oldest game wins a shared key
+    assert by_name == {"celeste": Game.query.filter_by(name="Celeste").one().id}
+    assert by_rawg == {}
+    # Only indexed reads: the NULL-key backfill check and the IN lookup
+    reads = [sql for sql in statements if "FROM games" in sql]
+    assert len(reads) == 2 and all("WHERE games.title_key" in sql for sql in reads)
+
+
+def test_games_without_a_key_are_backfilled_on_import(app):
+    legacy = Game(name="Hollow Knight: Silksong")
+    db.session.add(legacy)
+    db.session.commit()
+    # As left by migration_games_title_key.sql
+    db.session.execute(Game.__table__.update().values(title_key=None))
+    db.session.commit()
+    updated_at = db.session.execute(db.select(Game.updated_at)).scalar()
+
+    report = import_csv("Player 1", "name\nhollow knight silksong\n", match=False)
+
+    assert report.new_games == 0
+    assert ProfileGame.query.filter_by(profile_id="Player 1").one().game_id == legacy.id
+    db.session.refresh(legacy)
+    assert legacy.title_key == "hollow knight silksong"
+    assert legacy.updated_at == updated_at
@@ -0,0 +1,66 @@
+"""
+List pages run a fixed number of queries, whatever the library size, and
+never lazy-load: RAISE_ON_LAZY_LOAD turns any relationship a template
+touches without eager-loading it into an error.
+"""
+import pytest
+from sqlalchemy import event
+
+from app import db
+
+LIST_PAGES = ["/", "/backlog/", "/playing/", "/backlog/play-next"]
+ACTIVE_STATUSES = ["Playing", "On Hold", "Completed", "Dropped"]
+
+
+def _build(games):
+    """A generated library where Player 1 has games in every section, so no page skips a query for an empty list."""
+    from app.incremental import rebuild_derived
+    from app.models import ProfileGame
+    from app.seeds import _wipe, bulk_load_connection, generate_library
+
+    with bulk_load_connection() as conn:
+        _wipe(conn)
+        generate_library(conn, ["Player 1", "Player 2"], games, 3, 6, seed=1)
+    pgs = ProfileGame.query.filter_by(profile_id="Player 1").order_by(ProfileGame.id).limit(len(ACTIVE_STATUSES))
+    for pg, status in zip(pgs, ACTIVE_STATUSES):
+        pg.section, pg.status = "active", status
+    db.session.commit()
+    rebuild_derived()
+    db.session.remove()
+
+
+def _statements_per_page(app, client):
+    app.config["RAISE_ON_LAZY_LOAD"] = True
+    counts = {}
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        for url in LIST_PAGES:
+            client.get(url)   # first hit may build caches (counters, fragments)
+            statements.clear()
+            response = client.get(url)
+            assert response.status_code == 200, url
+            counts[url] = len(statements)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+    return counts
+
+
+@pytest.mark.parametrize("games", [5, 50])
+def test_list_pages_render_without_lazy_loads(app, client, games):
+    _build(games)
+    counts = _statements_per_page(app, client)
+    assert all(n > 0 for n in counts.values())
+
+
+def test_list_page_query_counts_do_not_grow_with_the_library(app, client):
+    _build(5)
+    small = _statements_per_page(app, client)
+    # Ten times the games: a per-row query would show up here
+    _build(50)
+    large = _statements_per_page(app, client)
+    assert small == large
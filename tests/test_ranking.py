@@ -0,0 +1,122 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app import ranking
+from app.ranking import MOOD_FIELDS, N_COLS, rank_games, score_rows
+from app.scoring import LENGTH_SCORES
+
+needs_numpy = pytest.mark.skipif(ranking.np is None, reason="NumPy is not installed")
+
+
+def _random_row(rnd):
+    """A feature row, including values the forms never produce (rank 0 and far past the bonus)."""
+    return [
+        rnd.randint(0, 5),
+        rnd.choice([0, *LENGTH_SCORES.values()]),
+        rnd.randint(0, 1),
+        rnd.choice([0, 1, 2, 3, 6, 7, 8, rnd.randint(9, 1000)]),
+        *(rnd.randint(0, 5) for _ in MOOD_FIELDS),
+        rnd.randint(0, 2),
+    ]
+
+
+def _random_prefs(rnd):
+    return rnd.choice([
+        None,
+        SimpleNamespace(**{f: 0 for f in MOOD_FIELDS}),
+        SimpleNamespace(**{f: 5 for f in MOOD_FIELDS}),
+        SimpleNamespace(**{f: rnd.choice([None, 0, 1, 2, 3, 4, 5]) for f in MOOD_FIELDS}),
+    ])
+
+
+def _random_pg(rnd, pg_id):
+    return SimpleNamespace(
+        id=pg_id,
+        hype=rnd.choice([None, 1, 2, 3, 4, 5]),
+        estimated_length=rnd.choice([None, "", *LENGTH_SCORES]),
+        series_continuity=rnd.choice([None, False, True]),
+        categories=[SimpleNamespace(rank=rnd.randint(0, 10)) for _ in range(rnd.randint(0, 3))],
+        status=rnd.choice([None, "Playing", "On Hold", "Dropped", "Completed"]),
+        **{f: rnd.choice([None, 1, 2, 3, 4, 5]) for f in MOOD_FIELDS},
+    )
+
+
+@needs_numpy
+@pytest.mark.parametrize("seed", range(20))
+def test_numpy_and_python_scores_are_identical(seed):
+    rnd = random.Random(seed)
+    rows = [_random_row(rnd) for _ in range(rnd.randint(1, 500))]
+    prefs = _random_prefs(rnd)
+
+    fast = score_rows(rows, prefs, use_numpy=True)
+    slow = score_rows(rows, prefs, use_numpy=False)
+
+    assert fast == slow
+    assert all(type(s) is int for s in fast)
+
+
+@needs_numpy
+@pytest.mark.parametrize("seed", range(20))
+def test_numpy_and_python_rank_in_the_same_order(seed):
+    rnd = random.Random(seed)
+    # Few distinct feature values, so many games tie
+    pgs = [_random_pg(rnd, pg_id) for pg_id in range(1, rnd.randint(2, 300))]
+    prefs = _random_prefs(rnd)
+
+    fast, fast_scores = rank_games(pgs, prefs, use_numpy=True)
+    slow, slow_scores = rank_games(pgs, prefs, use_numpy=False)
+
+    assert [pg.id for pg in fast] == [pg.id for pg in slow]
+    assert fast_scores == slow_scores
+
+
+def test_score_rows_edge_cases_agree():
+    rows = [[0] * N_COLS, [5, 20, 1, 1, 5, 5, 5, 5, 5, 1], [0, 0, 0, 1000, 0, 0, 0, 0, 0, 2]]
+    assert score_rows([], use_numpy=False) == []
+    expected = score_rows(rows, SimpleNamespace(**{f: 5 for f in MOOD_FIELDS}), use_numpy=False)
+    assert expected == [0, 50 + 20 + 25 + 30 + 30 + 30, -15]
+    if ranking.np is not None:
+        assert score_rows(rows, SimpleNamespace(**{f: 5 for f in MOOD_FIELDS}), use_numpy=True) == expected
+
+
+@pytest.fixture
+def tied_library(app, library):
+    """A generated library plus groups of games with identical surveys, in both sections."""
+    from app import db
+    from app.models import Category, Game, ProfileGame
+
+    library(40, checkins=0, profiles=("Player 1",), seed=7)
+    category = Category.query.filter_by(profile_id="Player 1").order_by(Category.rank).first()
+    for i in range(12):
+        section, status = [("backlog", None), ("active", "Playing"), ("active", "On Hold")][i % 3]
+        pg = ProfileGame(
+            profile_id="Player 1", game=Game(name=f"Twin {i}"), section=section, status=status,
+            hype=3, estimated_length="Medium",
+            # Half have no mood blend at all, half the same one
+            **{f: (None if i % 2 else 4) for f in MOOD_FIELDS},
+        )
+        if i % 4 == 0:
+            pg.categories.append(category)
+        db.session.add(pg)
+    db.session.commit()
+
+
+@pytest.mark.parametrize("moods", [None, 0, 5, (5, 0, 3, 1, 0)], ids=["no-prefs", "zeros", "max", "mixed"])
+def test_play_next_query_matches_rank_games(tied_library, moods):
+    from app.models import MoodPreferences
+    from app.ranking import play_next_candidates, play_next_query
+
+    prefs = None
+    if moods is not None:
+        values = moods if isinstance(moods, tuple) else (moods,) * len(MOOD_FIELDS)
+        prefs = MoodPreferences(profile_id="Player 1", **dict(zip(MOOD_FIELDS, values)))
+
+    ranked, scores = rank_games(play_next_candidates("Player 1"), prefs)
+    rows = play_next_query("Player 1", prefs).all()
+
+    assert [pg.id for pg, _ in rows] == [pg.id for pg in ranked]
+    assert {pg.id: score for pg, score in rows} == scores
+    # The fixture really does produce ties, across both sections
+    assert len(set(scores.values())) < len(scores)
@@ -0,0 +1,123 @@
+"""
+RawgClient against a local stub server: coalescing, retries, the Retry-After
+cap and the no-retry interactive client.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.utils.rawg import INTERACTIVE_CLIENT, RawgClient
+
+
+class StubRawg:
+    """Serves queued (status, headers) replies, then 200s; counts every hit."""
+
+    def __init__(self):
+        self.hits = 0
+        self.replies = []
+        self.delay = 0
+        self.lock = threading.Lock()
+
+    def handle(self, handler):
+        with self.lock:
+            self.hits += 1
+            status, headers = self.replies.pop(0) if self.replies else (200, {})
+        time.sleep(self.delay)
+        body = json.dumps({"results": [{"id": 1, "name": "Hades"}]} if status == 200 else {}).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setenv("RAWG_API_KEY", "test")
+    state = StubRawg()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            state.handle(self)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.url = f"http://127.0.0.1:{server.server_port}/api"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_identical_concurrent_requests_share_one_upstream_call(stub):
+    stub.delay = 0.3
+    client = RawgClient(base_url=stub.url)
+    results, errors = [], []
+
+    def search():
+        try:
+            results.append(client.search_games("hades", page_size=5))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=search) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert stub.hits == 1
+    assert results == [[{"id": 1, "name": "Hades"}]] * 8
+
+
+def test_different_params_are_not_coalesced(stub):
+    client = RawgClient(base_url=stub.url)
+    client.search_games("hades", page_size=5)
+    client.search_games("hades", page_size=8)
+    assert stub.hits == 2
+
+
+def test_retries_429_and_5xx_then_succeeds(stub):
+    stub.replies = [(503, {}), (429, {}), (502, {})]
+    client = RawgClient(base_url=stub.url, retries=3, backoff=0)
+    assert client.search_games("hades") == [{"id": 1, "name": "Hades"}]
+    assert stub.hits == 4
+
+
+def test_gives_up_after_retries(stub):
+    stub.replies = [(503, {})] * 5
+    client = RawgClient(base_url=stub.url, retries=2, backoff=0)
+    with pytest.raises(requests.HTTPError):
+        client.search_games("hades")
+    assert stub.hits == 3
+
+
+def test_retry_after_is_capped(stub):
+    stub.replies = [(429, {"Retry-After": "120"})]
+    client = RawgClient(base_url=stub.url, retries=1, backoff=0, max_retry_after=0.2)
+    started = time.monotonic()
+    assert client.search_games("hades") == [{"id": 1, "name": "Hades"}]
+    assert time.monotonic() - started < 2
+    assert stub.hits == 2
+
+
+def test_interactive_client_does_not_retry(stub):
+    stub.replies = [(429, {"Retry-After": "120"})]
+    client = RawgClient(base_url=stub.url, **INTERACTIVE_CLIENT)
+    started = time.monotonic()
+    with pytest.raises(requests.HTTPError):
+        client.search_games("hades")
+    assert time.monotonic() - started < 2
+    assert stub.hits == 1
@@ -0,0 +1,127 @@
+import pytest
+
+from app import db
+from app import search as search_module
+from app.models import CheckIn, Game, ProfileGame
+from app.search import search
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes():
+    search_module._indexes.clear()
+    yield
+    search_module._indexes.clear()
+
+
+def _add(name, notes=None, checkins=(), profile="Player 1", section="backlog"):
+    game = Game(name=name)
+    pg = ProfileGame(profile_id=profile, game=game, section=section, notes=notes)
+    pg.checkins = [CheckIn(note=note) for note in checkins]
+    db.session.add(pg)
+    db.session.commit()
+    return pg
+
+
+def _kinds(hits):
+    return [(hit.kind, hit.game) for hit in hits]
+
+
+def test_game_name_outranks_note_mentions(app):
+    _add("Dragon Quest")
+    _add("Hollow Knight", notes="Better than any dragon game")
+    _add("Celeste", checkins=["The dragon level was hard"])
+
+    hits, has_next = search("Player 1", "dragon")
+
+    assert hits[0].kind == "game" and hits[0].game == "Dragon Quest"
+    assert sorted(_kinds(hits[1:])) == [("checkin", "Celeste"), ("notes", "Hollow Knight")]
+    assert not has_next
+
+
+def test_terms_are_prefixes_and_all_required(app):
+    _add("Dragons of the North")
+    _add("Dark Souls", notes="dragon fights")
+    _add("Souls of Dragons")
+
+    assert {h.game for h in search("Player 1", "drag")[0]} == {
+        "Dragons of the North", "Dark Souls", "Souls of Dragons",
+    }
+    assert _kinds(search("Player 1", "dragon souls")[0]) == [("game", "Souls of Dragons")]
+
+
+def test_short_terms_are_ignored_like_mysql(app):
+    _add("Ys VIII Lacrimosa of Dana")
+
+    # "ys" and "of" are below MYSQL_MIN_TOKEN, so neither narrows nor matches
+    assert search("Player 1", "ys")[0] == []
+    assert _kinds(search("Player 1", "ys lacrimosa of")[0]) == [("game", "Ys VIII Lacrimosa of Dana")]
+
+
+def test_only_the_profiles_own_library(app):
+    _add("Dragon Quest", profile="Player 2")
+
+    assert search("Player 1", "dragon")[0] == []
+    assert len(search("Player 2", "dragon")[0]) == 1
+
+
+def test_pages_cover_every_hit_once(app):
+    for i in range(7):
+        _add(f"Castle {i}", checkins=[f"castle run {i}"])
+
+    seen = []
+    for page in (1, 2, 3, 4):
+        hits, has_next = search("Player 1", "castle", page=page, per_page=4)
+        seen += [(h.kind, h.pg_id, h.checkin_id) for h in hits]
+        assert has_next == (page < 4)
+    assert len(seen) == len(set(seen)) == 14
+    # Every name hit ranks above every check-in hit
+    assert [kind for kind, _, _ in seen] == ["game"] * 7 + ["checkin"] * 7
+
+
+def test_memory_backend_honours_limit_per_source(app):
+    for i in range(5):
+        _add(f"Castle {i}", notes="castle", checkins=["castle"] * 2)
+
+    hits = search_module._search_memory("Player 1", ["castle"], 3)
+
+    assert sorted(h.kind for h in hits) == ["checkin"] * 3 + ["game"] * 3 + ["notes"] * 3
+    # Ties keep the MySQL order: lowest pg id for games, newest check-in first
+    games = [h.pg_id for h in hits if h.kind == "game"]
+    checkins = [h.checkin_id for h in hits if h.kind == "checkin"]
+    assert games == sorted(games)[:3] == [1, 2, 3]
+    assert checkins == [10, 9, 8]
+
+
+def test_snippet_marks_matches_and_escapes_html(app):
+    _add("Hollow Knight", notes="<b>Boss</b> rush: bosses " + "filler " * 60 + "and a final boss")
+
+    hit, = search("Player 1", "boss")[0]
+    snippet = str(hit.snippet)
+
+    assert "&lt;b&gt;<mark>Boss</mark>&lt;/b&gt;" in snippet
+    assert "<mark>bosses</mark>" in snippet
+    assert snippet.endswith("…")
+    assert len(hit.snippet.striptags()) <= search_module.SNIPPET_WIDTH + 1
+
+
+def test_index_is_updated_in_place(app):
+    keep = _add("Hollow Knight", checkins=["castle grind", "castle boss"])
+    gone = _add("Castle Crashers")
+    index = search_module.profile_index("Player 1")
+    assert len(search("Player 1", "castle")[0]) == 3
+
+    db.session.delete(keep.checkins.filter_by(note="castle grind").one())
+    db.session.delete(gone)
+    keep.game.name = "Hollow Castle"
+    keep.checkins.append(CheckIn(note="castle again"))
+    db.session.commit()
+
+    hits = search("Player 1", "castle")[0]
+    assert search_module.profile_index("Player 1") is index
+    assert sorted(_kinds(hits)) == [
+        ("checkin", "Hollow Castle"), ("checkin", "Hollow Castle"), ("game", "Hollow Castle"),
+    ]
+    assert {h.text for h in hits if h.kind == "checkin"} == {"castle boss", "castle again"}
+    # Nothing left of the deleted rows
+    assert index.index.live == 3
+    assert search("Player 1", "grind crashers")[0] == []